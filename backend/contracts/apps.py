@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ContractsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contracts'
+
+    def ready(self):
+        # Registra las señales que mantienen el cubo de KPIs sincronizado
+        from . import signals  # noqa: F401
@@ -0,0 +1,98 @@
+import hashlib
+from functools import wraps
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from rest_framework.response import Response
+from .models import ContractDataVersion
+
+# Descripción General del Código:
+
+# Este código implementa la caché de respuestas de los endpoints de opciones de contratos
+# (filters_options, contratistas_options, rubros_options, anios_options), cuyas listas solo cambian
+# cuando se importan o editan contratos.
+
+# Funcionalidades Principales:
+
+# 1. ETag por versión de datos (etag_by_data_version):
+#    - Calcula un ETag fuerte a partir de ContractDataVersion, la ruta y los parámetros de la petición.
+#    - Si el navegador envía `If-None-Match` con el mismo ETag se responde 304 sin ejecutar la vista.
+#    - Agrega `Cache-Control: no-cache` para que el navegador siempre revalide.
+#    - Se aplica dentro de @api_view, de modo que la autenticación y los permisos de DRF ya se verificaron
+#      antes de responder 304 (un 304 nunca se entrega a quien no tendría acceso a la respuesta completa).
+
+# 2. Caché de datos por versión (cache_by_data_version):
+#    - Guarda `response.data` en la caché de Django con una clave que incluye la versión de datos,
+#      de modo que cualquier escritura de contratos invalida las entradas anteriores.
+
+# 3. Datos en caché dentro de otra vista (get_or_set_by_data_version):
+#    - Permite a dashboard_bundle reutilizar las opciones de filtro en caché sin depender de la URL de la petición.
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_data_version(request):
+    """
+    Retorna la versión de datos de contratos, consultándola una sola vez por petición.
+    """
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, 'contracts_data_version'):
+        http_request.contracts_data_version = ContractDataVersion.current()
+    return http_request.contracts_data_version
+
+
+def _request_signature(request):
+    """
+    Resume la ruta y los parámetros de la petición en un hash corto.
+    """
+    http_request = getattr(request, '_request', request)
+    raw = f"{http_request.path}?{http_request.GET.urlencode()}"
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _etag(request, *args, **kwargs):
+    return f"contracts-{get_data_version(request)}-{_request_signature(request)}"
+
+
+def etag_by_data_version(view_func):
+    """
+    Decorador (interno a @api_view, antes de cache_by_data_version) que agrega ETag y responde 304
+    cuando los datos no cambiaron. Al ir dentro de @api_view se ejecuta después de la autenticación
+    y los permisos de DRF.
+    """
+    @condition(etag_func=_etag)
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
+
+
+def cache_by_data_version(view_func):
+    """
+    Decorador (interno a @api_view) que guarda los datos de la respuesta en caché por versión de datos.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = f"contracts:{view_func.__name__}:{get_data_version(request)}:{_request_signature(request)}"
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+def get_or_set_by_data_version(request, name, compute):
+    """
+    Retorna el valor en caché para `name` y la versión de datos actual, calculándolo con `compute()` si no existe.
+    """
+    key = f"contracts:{name}:{get_data_version(request)}"
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
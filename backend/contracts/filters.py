@@ -0,0 +1,221 @@
+import django_filters
+from django_filters.constants import EMPTY_VALUES
+from django.db import models
+from django.db.models import Count, Value, CharField, F
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+from .models import Contract, ContractKpiCube
+
+# Descripción General del Código:
+
+# Este código define el filtro compartido por todos los endpoints analíticos de contratos.
+# Antes cada endpoint copiaba los mismos filtros de `request.GET` y los aplicaba con `icontains`,
+# lo que obliga a SQLite a recorrer toda la tabla con un LIKE.
+
+# Funcionalidades Principales:
+
+# 1. Filtros por faceta (anio, rubro, grupo, subgrupo, area, tipo_proceso, sistema_publicacion, impacto, supervisor):
+#    - Los valores llegan desde los selects alimentados por `filters_options`, por lo que por defecto
+#      se comparan con igualdad exacta y pueden usar los índices del modelo Contract.
+#    - Con `match=contains` se conserva la búsqueda por subcadena anterior.
+
+# 2. Filtros de texto libre (contratista):
+#    - Se mantienen con `icontains`.
+
+# 3. Rango de fechas (fecha_inicio_desde, fecha_inicio_hasta):
+#    - Filtran la fecha de inicio de ejecución.
+
+# Clases y Funciones:
+
+# - ContractFilter: FilterSet de django-filter con los filtros de contratos. Si todos los filtros
+#   aplicados son dimensiones del cubo de KPIs, `cube_queryset()` retorna las celdas equivalentes.
+#   `materialize()` evalúa una sola vez los filtros costosos (LIKE) para que varias secciones compartan
+#   los ids resultantes.
+# - filter_contracts(params, queryset=None): construye y valida el filtro, lanzando un error 400 si algún valor es inválido.
+# - facet_counts(params, facets=None): cuenta los contratos por cada valor de cada faceta en una sola consulta (UNION ALL).
+
+
+class ContractFilter(django_filters.FilterSet):
+    """
+    Filtro compartido de contratos: igualdad exacta para facetas y `icontains` solo para texto libre.
+    """
+    # Parámetro -> campo del modelo para las facetas que vienen de `filters_options`
+    FACET_FIELDS = {
+        'anio': 'anio_paa',
+        'rubro': 'rubro',
+        'grupo': 'grupo',
+        'subgrupo': 'subgrupo',
+        'area': 'area_pertenece',
+        'tipo_proceso': 'tipo_proceso',
+        'sistema_publicacion': 'sistema_publicacion',
+        'impacto': 'impacto',
+        'supervisor': 'supervisor_contrato',
+    }
+
+    # Facetas que también son dimensiones de ContractKpiCube
+    CUBE_PARAMS = {'anio', 'rubro', 'grupo', 'area', 'tipo_proceso', 'sistema_publicacion', 'supervisor'}
+
+    # Máximo de ids que materialize() pasa como parámetros (por debajo del límite de 999 variables
+    # de las versiones antiguas de SQLite)
+    MATERIALIZE_MAX_IDS = 900
+
+    MATCH_EXACT = 'exact'
+    MATCH_CONTAINS = 'contains'
+
+    match = django_filters.ChoiceFilter(
+        choices=[(MATCH_EXACT, 'Exacto'), (MATCH_CONTAINS, 'Contiene')],
+        method='filter_match',
+    )
+
+    anio = django_filters.NumberFilter(field_name='anio_paa')
+    rubro = django_filters.CharFilter(field_name='rubro', method='filter_facet')
+    grupo = django_filters.CharFilter(field_name='grupo', method='filter_facet')
+    subgrupo = django_filters.CharFilter(field_name='subgrupo', method='filter_facet')
+    area = django_filters.CharFilter(field_name='area_pertenece', method='filter_facet')
+    tipo_proceso = django_filters.CharFilter(field_name='tipo_proceso', method='filter_facet')
+    sistema_publicacion = django_filters.CharFilter(field_name='sistema_publicacion', method='filter_facet')
+    impacto = django_filters.CharFilter(field_name='impacto', method='filter_facet')
+    supervisor = django_filters.CharFilter(field_name='supervisor_contrato', method='filter_facet')
+
+    contratista = django_filters.CharFilter(field_name='nombre_contratista', lookup_expr='icontains')
+    fecha_inicio_desde = django_filters.DateFilter(field_name='fecha_inicio_ejecucion', lookup_expr='gte')
+    fecha_inicio_hasta = django_filters.DateFilter(field_name='fecha_inicio_ejecucion', lookup_expr='lte')
+
+    class Meta:
+        model = Contract
+        fields = []
+
+    @property
+    def match_mode(self):
+        """
+        Retorna el modo de comparación de las facetas ('exact' por defecto).
+        """
+        return self.form.cleaned_data.get('match') or self.MATCH_EXACT
+
+    @property
+    def applied(self):
+        """
+        Retorna un diccionario con los filtros que realmente se aplicaron (parámetro -> valor limpio).
+        """
+        return {
+            name: value for name, value in self.form.cleaned_data.items()
+            if name != 'match' and value not in EMPTY_VALUES
+        }
+
+    def cube_queryset(self):
+        """
+        Retorna las celdas de ContractKpiCube que corresponden a los filtros aplicados,
+        o None si algún filtro no es una dimensión del cubo y hay que consultar la tabla de contratos.
+        """
+        applied = self.applied
+        if self.match_mode != self.MATCH_EXACT or not set(applied) <= self.CUBE_PARAMS:
+            return None
+        return ContractKpiCube.objects.filter(
+            **{self.FACET_FIELDS[name]: value for name, value in applied.items()}
+        )
+
+    @property
+    def expensive(self):
+        """
+        True si algún filtro aplicado es un LIKE (contratista o facetas con `match=contains`),
+        que SQLite resuelve recorriendo toda la tabla en lugar de usar un índice.
+        """
+        applied = self.applied
+        if 'contratista' in applied:
+            return True
+        return self.match_mode == self.MATCH_CONTAINS and any(name in self.FACET_FIELDS for name in applied)
+
+    def materialize(self):
+        """
+        Evalúa una sola vez los filtros costosos y reemplaza `qs` por un filtro `id__in` con los ids obtenidos,
+        para que las consultas siguientes no repitan los LIKE.
+        Si los filtros no son costosos, o coinciden más de MATERIALIZE_MAX_IDS contratos (demasiados
+        parámetros para una sola consulta), `qs` se deja igual.
+        """
+        if not self.expensive:
+            return self
+        ids = list(self.qs.order_by().values_list('id', flat=True)[:self.MATERIALIZE_MAX_IDS + 1])
+        if len(ids) <= self.MATERIALIZE_MAX_IDS:
+            self._qs = self.queryset.filter(id__in=ids)
+        return self
+
+    def filter_match(self, queryset, name, value):
+        """
+        El modo de comparación no filtra por sí mismo; solo lo leen las facetas.
+        """
+        return queryset
+
+    def filter_facet(self, queryset, name, value):
+        """
+        Aplica una faceta con igualdad exacta o, si se pidió `match=contains`, con `icontains`.
+        """
+        lookup = 'icontains' if self.match_mode == self.MATCH_CONTAINS else 'exact'
+        return queryset.filter(**{f'{name}__{lookup}': value})
+
+
+def filter_contracts(params, queryset=None):
+    """
+    Construye el ContractFilter a partir de los parámetros de la petición y lo valida.
+    Lanza ValidationError (respuesta 400) si algún filtro tiene un valor inválido.
+    """
+    if queryset is None:
+        queryset = Contract.objects.all()
+    filterset = ContractFilter(params, queryset=queryset)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return filterset
+
+
+# Facetas disponibles para conteos: nombre -> campo del modelo
+FACET_DIMENSIONS = {
+    'anio': 'anio_paa',
+    'rubro': 'rubro',
+    'contratista': 'nombre_contratista',
+    'grupo': 'grupo',
+    'subgrupo': 'subgrupo',
+    'area': 'area_pertenece',
+    'tipo_proceso': 'tipo_proceso',
+    'sistema_publicacion': 'sistema_publicacion',
+    'impacto': 'impacto',
+    'supervisor': 'supervisor_contrato',
+    'adjudicado': 'adjudicado',
+}
+
+
+def facet_counts(params, facets=None):
+    """
+    Retorna {faceta: [(valor, conteo), ...]} para las facetas indicadas, respetando los filtros de `params`.
+    Cada faceta ignora su propio filtro (para que el usuario vea las demás opciones) y todas las
+    facetas se resuelven en una sola consulta con UNION ALL de agrupaciones.
+    """
+    facets = facets or FACET_DIMENSIONS
+    filter_contracts(params)  # valida los parámetros una sola vez
+
+    parts = []
+    for name, field in facets.items():
+        data = params.copy()
+        data.pop(name, None)
+        qs = filter_contracts(data).qs.exclude(**{f'{field}__isnull': True})
+        if isinstance(Contract._meta.get_field(field), models.IntegerField):
+            valor = Cast(field, output_field=CharField())
+        else:
+            qs = qs.exclude(**{field: ''})
+            valor = F(field)
+        parts.append(
+            qs.annotate(facet=Value(name, output_field=CharField()), valor=valor)
+            .values('facet', 'valor')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+
+    counts = {name: [] for name in facets}
+    if not parts:
+        return counts
+    for row in parts[0].union(*parts[1:], all=True):
+        valor = row['valor']
+        if isinstance(Contract._meta.get_field(facets[row['facet']]), models.IntegerField):
+            valor = int(valor)
+        counts[row['facet']].append((valor, row['count']))
+    for values in counts.values():
+        values.sort(key=lambda item: (-item[1], str(item[0])))
+    return counts
@@ -1,8 +1,14 @@
 import datetime
+import hashlib
+import json
+import time
+from collections import defaultdict
 from decimal import Decimal
 from openpyxl import load_workbook
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from contracts.models import Contract
+from contracts.signals import contract_bulk_changes
 
 # Descripción General del Código:
 
@@ -26,6 +32,17 @@ from contracts.models import Contract
 #    - Permite especificar la ruta del archivo Excel como un argumento del comando.
 #    - Utiliza constantes para definir el mapeo de columnas y los tipos de datos, lo que facilita la configuración y la modificación.
 
+# 4. Modo masivo (--bulk) y actualización idempotente (--upsert):
+#    - Abre el libro en modo solo lectura y recorre las filas con `iter_rows(values_only=True)`.
+#    - Resuelve una sola vez el conversor de cada columna a partir de la cabecera.
+#    - Inserta con `bulk_create` por lotes dentro de una sola transacción y reporta filas/segundo.
+#    - Con --upsert identifica cada fila por número de contrato (o número de proceso y año PAA) y compara
+#      el hash de su contenido: inserta las nuevas, actualiza con `bulk_update` solo las que cambiaron
+#      y reporta insertados, actualizados y sin cambios.
+#    - Los contratos sin hash guardado se comparan con el hash de sus valores actuales, y solo se
+#      actualizan las columnas presentes en la hoja. Si la hoja no trae todas las columnas, la comparación
+#      (y la identificación de filas sin número de contrato ni de proceso) usa solo las columnas presentes.
+
 # Clases:
 
 # - Command: Clase que hereda de BaseCommand y define el comando de Django para importar los datos de contratos.
@@ -38,15 +55,215 @@ from contracts.models import Contract
 # - handle(self, *args, **options):
 #   - Implementa la lógica principal del comando para leer los datos del Excel y guardarlos en la base de datos.
 
+# - import_rows(self, ws) / bulk_import_rows(self, ws, batch_size) / upsert_rows(self, ws, batch_size):
+#   - Recorren las filas de la hoja y guardan los contratos fila por fila, por lotes o actualizando los existentes.
+
+# Mapeo de columnas Excel -> campos del modelo Contract
+COLUMN_MAPPING = {
+    "num Total": "num_total",
+    "num": "num",
+    "Código UNSPSC": "codigo_unspsc",
+    "Rubro": "rubro",
+    "Descripción del Rubro": "descripcion_rubro",
+    "Grupo": "grupo",
+    "Subgrupo": "subgrupo",
+    "Detalle": "detalle",
+    "Pertenece a la OASTI": "pertenece_a_la_oasti",
+    "Area a la que pertenece": "area_pertenece",
+    "Año PAA": "anio_paa",
+    "Línea PAA": "linea_paa",
+    "Contratado 2024": "contratado_2024",
+    "Adjudicado ?": "adjudicado",
+    "Supervisor del contrato": "supervisor_contrato",
+    "Apoyo de la supervisión": "apoyo_supervision",
+    "Fecha de designacion de supervisión": "fecha_designacion_supervision",
+    "Impacto": "impacto",
+    "Sistema de Información donde esta publicado el proceso": "sistema_publicacion",
+    "Nombre del Contratista": "nombre_contratista",
+    "Objeto": "objeto",
+    "Numero de proceso o de evento de cotización": "numero_proceso",
+    "Numero del contrato": "numero_contrato",
+    "Fecha de suscripción de contrato": "fecha_suscripcion_contrato",
+    "Fecha aprobación póliza": "fecha_aprobacion_poliza",
+    "Fecha de inicio de ejecución (acta de inicio)": "fecha_inicio_ejecucion",
+    "Fecha Final": "fecha_final",
+    "Fecha de inicio de servicio": "fecha_inicio_servicio",
+    "Fecha Final del servicio": "fecha_final_servicio",
+    "Fuente vigencia": "fuente_vigencia",
+    "Modalida presentación General Cuadro": "modalidad_presentacion_general_cuadro",
+    "Tipo de proceso": "tipo_proceso",
+    "Valor total incial del contrato": "valor_total_inicial_contrato",
+    "Valor adiciones/reducciones": "valor_adiciones_reducciones",
+    "Valor total final del contrato": "valor_total_final_contrato",
+    "Valor antes del 2024": "valor_antes_2024",
+    "Valor asignado al 2024": "valor_asignado_2024",
+    "Valor despues del 2024": "valor_despues_2024",
+    "Valor total asignado al PAA 2024": "valor_total_asignado_paa_2024",
+    "Diferencia con lo contratado respecto al PAA": "diferencia_contratado_respecto_paa",
+    "Liberaciones de CDP": "liberaciones_cdp",
+    "Cantidad de pagos vigencia 2024 con corte al 31 de julio de 2024": "cantidad_pagos_2024_hasta_31_julio",
+    "Valor ejecutado vigencia 2024 Corte 31 de Julio presupuesto 2024": "valor_ejecutado_2024_hasta_31_julio",
+    "Pago Mensual Aproximado": "pago_mensual_aproximado",
+    "Porcentaje de ejecución presupuestal 2024": "porcentaje_ejecucion_2024",
+    "Presupuesto pendiente de ejecutar o  liberar en el 2024": "presupuesto_pendiente_2024",
+    "Expediente Gestión Documental": "expediente_gestion_documental",
+    "URL SECOP II/TVEC": "url_secop_tv",
+    "Observaciones": "observaciones",
+}
+
+# Set para saber qué campos son fechas, decimales, enteros
+DATE_FIELDS = {
+    "fecha_designacion_supervision",
+    "fecha_suscripcion_contrato",
+    "fecha_aprobacion_poliza",
+    "fecha_inicio_ejecucion",
+    "fecha_final",
+    "fecha_inicio_servicio",
+    "fecha_final_servicio"
+}
+
+DECIMAL_FIELDS = {
+    "contratado_2024",
+    "valor_total_inicial_contrato",
+    "valor_adiciones_reducciones",
+    "valor_total_final_contrato",
+    "valor_antes_2024",
+    "valor_asignado_2024",
+    "valor_despues_2024",
+    "valor_total_asignado_paa_2024",
+    "diferencia_contratado_respecto_paa",
+    "liberaciones_cdp",
+    "valor_ejecutado_2024_hasta_31_julio",
+    "pago_mensual_aproximado",
+    "porcentaje_ejecucion_2024",
+    "presupuesto_pendiente_2024"
+}
+
+INT_FIELDS = {
+    "num_total",
+    "num",
+    "anio_paa",
+    "cantidad_pagos_2024_hasta_31_julio"
+}
+
+
+def to_date(cell_val):
+    """
+    Convierte el valor de una celda en fecha (None si está vacía o no se puede interpretar).
+    """
+    if not cell_val:
+        return None
+    if isinstance(cell_val, datetime.date):
+        return cell_val
+    # Intentamos parsear manualmente si no es date
+    try:
+        return datetime.datetime.strptime(str(cell_val), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def to_decimal(cell_val):
+    """
+    Convierte el valor de una celda en Decimal, aceptando coma como separador decimal.
+    """
+    if cell_val is None:
+        return None
+    try:
+        return Decimal(str(cell_val).replace(',', '.'))
+    except ArithmeticError:
+        return None
+
+
+def to_int(cell_val):
+    """
+    Convierte el valor de una celda en entero.
+    """
+    if cell_val is None:
+        return None
+    try:
+        return int(cell_val)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_text(cell_val):
+    """
+    Convierte el valor de una celda en texto sin espacios en los extremos.
+    """
+    if cell_val is None:
+        return None
+    return str(cell_val).strip()
+
+
+def converter_for(field_name):
+    """
+    Retorna la función de conversión que corresponde al tipo del campo.
+    """
+    if field_name in DATE_FIELDS:
+        return to_date
+    if field_name in DECIMAL_FIELDS:
+        return to_decimal
+    if field_name in INT_FIELDS:
+        return to_int
+    return to_text
+
+
+def header_name(value):
+    """
+    Normaliza el texto de una celda de cabecera.
+    """
+    return str(value).strip() if value else ""
+
+
+def hash_value(value):
+    """
+    Normaliza un valor para el hash de modo que coincida con lo que retorna la base de datos
+    (fechas sin hora, decimales con los dos decimales de los campos del modelo).
+    """
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, Decimal) and value.is_finite():
+        return value.quantize(Decimal('0.01'))
+    return value
+
+
+def content_hash(data, fields=None):
+    """
+    Calcula el hash del contenido importado de una fila para detectar si cambió respecto a la importación anterior.
+    Sirve tanto para una fila del Excel como para los valores guardados de un contrato.
+    Con `fields` solo se consideran esos campos (p. ej. las columnas de una hoja parcial).
+    """
+    fields = sorted(fields if fields is not None else COLUMN_MAPPING.values())
+    payload = json.dumps([hash_value(data.get(field_name)) for field_name in fields],
+                         default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def import_key(data, row_hash):
+    """
+    Retorna la clave con la que se identifica un contrato entre importaciones: el número de contrato,
+    o el número de proceso más el año PAA; si no tiene ninguno, el propio hash del contenido.
+    """
+    if data.get('numero_contrato'):
+        return ('contrato', data['numero_contrato'])
+    if data.get('numero_proceso'):
+        return ('proceso', data['numero_proceso'], data.get('anio_paa'))
+    return ('hash', row_hash)
+
+
 class Command(BaseCommand):
     """
     Clase que define el comando de Django para importar datos de contratos desde un archivo Excel.
     """
     help = "Importa los datos de contratos desde un archivo Excel."
 
+    SHEET_NAME = "Contratos 2024"
+    # La fila 7 es la de cabeceras
+    HEADER_ROW = 7
+
     def add_arguments(self, parser):
         """
-        Define los argumentos que se pueden pasar al comando desde la línea de comandos, en este caso, la ruta del archivo Excel.
+        Define los argumentos que se pueden pasar al comando desde la línea de comandos: la ruta del archivo Excel y el modo masivo.
         """
         parser.add_argument(
             '--file',
@@ -54,169 +271,202 @@ class Command(BaseCommand):
             default='C:\\Users\\edwin.paz\\Documents\\Tablero_Seguimient_Andje\\contratos.xlsx',
             help='Ruta del archivo Excel a importar'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Lee el Excel en modo solo lectura e inserta los contratos por lotes en una sola transacción'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Actualiza los contratos existentes (por número de contrato, o número de proceso y año PAA) en lugar de duplicarlos'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Cantidad de contratos por lote en el modo masivo'
+        )
 
     def handle(self, *args, **options):
         """
         Implementa la lógica principal del comando para leer los datos del Excel, convertirlos y guardarlos en la base de datos.
         """
         file_path = options['file']
-        
-        # Mapeo de columnas Excel -> campos del modelo Contract
-        COLUMN_MAPPING = {
-            "num Total": "num_total",
-            "num": "num",
-            "Código UNSPSC": "codigo_unspsc",
-            "Rubro": "rubro",
-            "Descripción del Rubro": "descripcion_rubro",
-            "Grupo": "grupo",
-            "Subgrupo": "subgrupo",
-            "Detalle": "detalle",
-            "Pertenece a la OASTI": "pertenece_a_la_oasti",
-            "Area a la que pertenece": "area_pertenece",
-            "Año PAA": "anio_paa",
-            "Línea PAA": "linea_paa",
-            "Contratado 2024": "contratado_2024",
-            "Adjudicado ?": "adjudicado",
-            "Supervisor del contrato": "supervisor_contrato",
-            "Apoyo de la supervisión": "apoyo_supervision",
-            "Fecha de designacion de supervisión": "fecha_designacion_supervision",
-            "Impacto": "impacto",
-            "Sistema de Información donde esta publicado el proceso": "sistema_publicacion",
-            "Nombre del Contratista": "nombre_contratista",
-            "Objeto": "objeto",
-            "Numero de proceso o de evento de cotización": "numero_proceso",
-            "Numero del contrato": "numero_contrato",
-            "Fecha de suscripción de contrato": "fecha_suscripcion_contrato",
-            "Fecha aprobación póliza": "fecha_aprobacion_poliza",
-            "Fecha de inicio de ejecución (acta de inicio)": "fecha_inicio_ejecucion",
-            "Fecha Final": "fecha_final",
-            "Fecha de inicio de servicio": "fecha_inicio_servicio",
-            "Fecha Final del servicio": "fecha_final_servicio",
-            "Fuente vigencia": "fuente_vigencia",
-            "Modalida presentación General Cuadro": "modalidad_presentacion_general_cuadro",
-            "Tipo de proceso": "tipo_proceso",
-            "Valor total incial del contrato": "valor_total_inicial_contrato",
-            "Valor adiciones/reducciones": "valor_adiciones_reducciones",
-            "Valor total final del contrato": "valor_total_final_contrato",
-            "Valor antes del 2024": "valor_antes_2024",
-            "Valor asignado al 2024": "valor_asignado_2024",
-            "Valor despues del 2024": "valor_despues_2024",
-            "Valor total asignado al PAA 2024": "valor_total_asignado_paa_2024",
-            "Diferencia con lo contratado respecto al PAA": "diferencia_contratado_respecto_paa",
-            "Liberaciones de CDP": "liberaciones_cdp",
-            "Cantidad de pagos vigencia 2024 con corte al 31 de julio de 2024": "cantidad_pagos_2024_hasta_31_julio",
-            "Valor ejecutado vigencia 2024 Corte 31 de Julio presupuesto 2024": "valor_ejecutado_2024_hasta_31_julio",
-            "Pago Mensual Aproximado": "pago_mensual_aproximado",
-            "Porcentaje de ejecución presupuestal 2024": "porcentaje_ejecucion_2024",
-            "Presupuesto pendiente de ejecutar o  liberar en el 2024": "presupuesto_pendiente_2024",
-            "Expediente Gestión Documental": "expediente_gestion_documental",
-            "URL SECOP II/TVEC": "url_secop_tv",
-            "Observaciones": "observaciones",
-        }
-
-        # Set para saber qué campos son fechas, decimales, enteros
-        DATE_FIELDS = {
-            "fecha_designacion_supervision",
-            "fecha_suscripcion_contrato",
-            "fecha_aprobacion_poliza",
-            "fecha_inicio_ejecucion",
-            "fecha_final",
-            "fecha_inicio_servicio",
-            "fecha_final_servicio"
-        }
-
-        DECIMAL_FIELDS = {
-            "contratado_2024",
-            "valor_total_inicial_contrato",
-            "valor_adiciones_reducciones",
-            "valor_total_final_contrato",
-            "valor_antes_2024",
-            "valor_asignado_2024",
-            "valor_despues_2024",
-            "valor_total_asignado_paa_2024",
-            "diferencia_contratado_respecto_paa",
-            "liberaciones_cdp",
-            "valor_ejecutado_2024_hasta_31_julio",
-            "pago_mensual_aproximado",
-            "porcentaje_ejecucion_2024",
-            "presupuesto_pendiente_2024"
-        }
-
-        INT_FIELDS = {
-            "num_total",
-            "num",
-            "anio_paa",
-            "cantidad_pagos_2024_hasta_31_julio"
-        }
 
         try:
-            wb = load_workbook(file_path, data_only=True)
+            wb = load_workbook(file_path, read_only=options['bulk'] or options['upsert'], data_only=True)
         except Exception as e:
             raise CommandError(f"No se pudo abrir el archivo {file_path}: {e}")
 
-        if "Contratos 2024" not in wb.sheetnames:
-            raise CommandError("La hoja 'Contratos 2024' no existe en el archivo Excel.")
+        if self.SHEET_NAME not in wb.sheetnames:
+            raise CommandError(f"La hoja '{self.SHEET_NAME}' no existe en el archivo Excel.")
 
-        ws = wb["Contratos 2024"]
+        ws = wb[self.SHEET_NAME]
+        start = time.perf_counter()
 
-        # La fila 7 es la de cabeceras
-        header_row = 7
-        headers = {}
-        for col_idx, cell in enumerate(ws[header_row], start=1):
-            val = str(cell.value).strip() if cell.value else ""
-            headers[col_idx] = val
+        # Durante la importación no se refresca el cubo de KPIs por fila; se reconstruye al final
+        try:
+            with contract_bulk_changes():
+                if options['upsert']:
+                    created_count, updated_count, unchanged_count = self.upsert_rows(ws, options['batch_size'])
+                elif options['bulk']:
+                    created_count = self.bulk_import_rows(ws, options['batch_size'])
+                else:
+                    created_count = self.import_rows(ws)
+        finally:
+            wb.close()
+
+        elapsed = time.perf_counter() - start
+        if options['upsert']:
+            total = created_count + updated_count + unchanged_count
+            rate = total / elapsed if elapsed > 0 else total
+            self.stdout.write(self.style.SUCCESS(
+                f"Importación completada. Insertados: {created_count}, actualizados: {updated_count}, "
+                f"sin cambios: {unchanged_count} en {elapsed:.2f} s ({rate:.0f} filas/s)."
+            ))
+            return
+
+        rate = created_count / elapsed if elapsed > 0 else created_count
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación completada. Se crearon {created_count} contratos "
+            f"en {elapsed:.2f} s ({rate:.0f} filas/s)."
+        ))
 
-        # Verificamos que todas las columnas esperadas estén
+    def check_headers(self, headers):
+        """
+        Advierte por cada columna esperada que no esté en la cabecera del Excel.
+        """
         for col_name in COLUMN_MAPPING.keys():
-            if col_name not in headers.values():
+            if col_name not in headers:
                 self.stderr.write(self.style.WARNING(f"La columna '{col_name}' no se encontró en el Excel."))
 
+    def import_rows(self, ws):
+        """
+        Guarda los contratos fila por fila leyendo cada celda de la hoja.
+        """
+        headers = {}
+        for col_idx, cell in enumerate(ws[self.HEADER_ROW], start=1):
+            headers[col_idx] = header_name(cell.value)
+        self.check_headers(headers.values())
+
         # Iteramos las filas a partir de la 8 en adelante
         created_count = 0
-        for row_idx in range(header_row+1, ws.max_row+1):
+        for row_idx in range(self.HEADER_ROW + 1, ws.max_row + 1):
             row_cells = ws[row_idx]
-            # Si la primera celda de la fila está vacía, puede que sea el final
             if all([c.value is None for c in row_cells]):
                 continue  # omite filas completamente vacías
 
             data = {}
-            for col_idx, header_name in headers.items():
-                if header_name in COLUMN_MAPPING:
-                    field_name = COLUMN_MAPPING[header_name]
+            for col_idx, header in headers.items():
+                if header in COLUMN_MAPPING:
+                    field_name = COLUMN_MAPPING[header]
                     cell_val = ws.cell(row=row_idx, column=col_idx).value
+                    data[field_name] = converter_for(field_name)(cell_val)
 
-                    # Convertimos según el tipo de campo:
-                    if field_name in DATE_FIELDS and cell_val:
-                        if isinstance(cell_val, datetime.date):
-                            data[field_name] = cell_val
-                        else:
-                            # Intentamos parsear manualmente si no es date
-                            # (si no viene como date)
-                            try:
-                                data[field_name] = datetime.datetime.strptime(str(cell_val), '%Y-%m-%d').date()
-                            except:
-                                data[field_name] = None
-                    elif field_name in DECIMAL_FIELDS and cell_val is not None:
-                        try:
-                            data[field_name] = Decimal(str(cell_val).replace(',', '.'))
-                        except:
-                            data[field_name] = None
-                    elif field_name in INT_FIELDS and cell_val is not None:
-                        try:
-                            data[field_name] = int(cell_val)
-                        except:
-                            data[field_name] = None
-                    else:
-                        # Campo texto u otro
-                        if cell_val is not None:
-                            data[field_name] = str(cell_val).strip()
-                        else:
-                            data[field_name] = None
-
-            # Creamos el objeto Contract si hay al menos algo en data
-            # (en general, sí lo habrá)
-            contract = Contract(**data)
+            contract = Contract(content_hash=content_hash(data), **data)
             contract.save()
             created_count += 1
 
-        self.stdout.write(self.style.SUCCESS(f"Importación completada. Se crearon {created_count} contratos."))
+        return created_count
+
+    def read_rows(self, ws):
+        """
+        Recorre la hoja en modo streaming y retorna un diccionario campo -> valor convertido por cada fila no vacía.
+        """
+        rows = ws.iter_rows(min_row=self.HEADER_ROW, values_only=True)
+        headers = [header_name(value) for value in next(rows, ())]
+        self.check_headers(headers)
+
+        # Conversores resueltos una sola vez: (índice de columna, campo, función)
+        columns = [
+            (col_idx, COLUMN_MAPPING[header], converter_for(COLUMN_MAPPING[header]))
+            for col_idx, header in enumerate(headers)
+            if header in COLUMN_MAPPING
+        ]
+        # Campos que trae la hoja: --upsert solo escribe estos en los contratos existentes
+        self.sheet_fields = list(dict.fromkeys(field_name for _, field_name, _ in columns))
+
+        for values in rows:
+            if all(value is None for value in values):
+                continue  # omite filas completamente vacías
+            yield {
+                field_name: convert(values[col_idx] if col_idx < len(values) else None)
+                for col_idx, field_name, convert in columns
+            }
+
+    def bulk_import_rows(self, ws, batch_size):
+        """
+        Guarda los contratos con bulk_create por lotes en una sola transacción.
+        """
+        created_count = 0
+        batch = []
+        with transaction.atomic():
+            for data in self.read_rows(ws):
+                batch.append(Contract(content_hash=content_hash(data), **data))
+                if len(batch) >= batch_size:
+                    Contract.objects.bulk_create(batch)
+                    created_count += len(batch)
+                    batch = []
+
+            if batch:
+                Contract.objects.bulk_create(batch)
+                created_count += len(batch)
+
+        return created_count
+
+    def upsert_rows(self, ws, batch_size):
+        """
+        Inserta los contratos nuevos, actualiza con bulk_update solo los que cambiaron y omite los que siguen iguales.
+        Retorna (insertados, actualizados, sin cambios).
+        """
+        rows = list(self.read_rows(ws))
+        # Si la hoja no trae todas las columnas, las filas se comparan solo por las columnas presentes:
+        # el hash completo de un contrato guardado incluye valores que la hoja no puede reproducir.
+        partial = not set(COLUMN_MAPPING.values()) <= set(self.sheet_fields)
+        match_fields = self.sheet_fields if partial else None
+
+        # Contratos existentes por clave, en orden de id: clave -> [(valores guardados, hash para comparar), ...]
+        # Los contratos sin hash (importados antes de --upsert o editados después) se comparan con el hash
+        # de sus valores guardados; sin esto los que no tienen número de contrato ni de proceso nunca coincidirían.
+        existing = defaultdict(list)
+        for stored in Contract.objects.values('id', 'content_hash', *COLUMN_MAPPING.values()).order_by('id'):
+            if partial or stored['content_hash'] is None:
+                stored_hash = content_hash(stored, match_fields)
+            else:
+                stored_hash = stored['content_hash']
+            existing[import_key(stored, stored_hash)].append((stored, stored_hash))
+
+        # Una misma clave puede repetirse (p. ej. un contrato con varios rubros): la n-ésima fila
+        # del Excel con esa clave se compara con el n-ésimo contrato existente con la misma clave.
+        seen = defaultdict(int)
+        to_create, to_update, to_rehash = [], [], []
+        unchanged_count = 0
+        for data in rows:
+            row_hash = content_hash(data, match_fields)
+            key = import_key(data, row_hash)
+            occurrence = seen[key]
+            seen[key] += 1
+
+            matches = existing.get(key, [])
+            if occurrence >= len(matches):
+                to_create.append(Contract(content_hash=content_hash(data), **data))
+                continue
+
+            stored, stored_hash = matches[occurrence]
+            if stored_hash == row_hash:
+                unchanged_count += 1
+                if stored['content_hash'] is None:
+                    to_rehash.append(Contract(id=stored['id'], content_hash=content_hash(stored)))
+            else:
+                # El hash guardado cubre todas las columnas: las ausentes de la hoja conservan su valor
+                full_hash = content_hash({**stored, **data})
+                to_update.append(Contract(id=stored['id'], content_hash=full_hash, **data))
+
+        with transaction.atomic():
+            Contract.objects.bulk_create(to_create, batch_size=batch_size)
+            # Solo se escriben las columnas presentes en la hoja: una columna ausente no borra los valores guardados
+            Contract.objects.bulk_update(to_update, self.sheet_fields + ['content_hash'], batch_size=batch_size)
+            Contract.objects.bulk_update(to_rehash, ['content_hash'], batch_size=batch_size)
+
+        return len(to_create), len(to_update), unchanged_count
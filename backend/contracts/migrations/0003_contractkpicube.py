@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:12
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, Q, F, ExpressionWrapper, DurationField
+from django.db.models.functions import ExtractMonth
+
+
+def build_cube(apps, schema_editor):
+    """
+    Llena el cubo con los contratos existentes (equivale a ContractKpiCube.rebuild()).
+    """
+    Contract = apps.get_model('contracts', 'Contract')
+    ContractKpiCube = apps.get_model('contracts', 'ContractKpiCube')
+    duracion = ExpressionWrapper(F('fecha_final') - F('fecha_inicio_ejecucion'), output_field=DurationField())
+    rows = (Contract.objects
+            .annotate(mes_suscripcion=ExtractMonth('fecha_suscripcion_contrato'))
+            .values('anio_paa', 'rubro', 'grupo', 'area_pertenece', 'tipo_proceso',
+                    'sistema_publicacion', 'supervisor_contrato', 'mes_suscripcion')
+            .annotate(
+                total_contratos=Count('id'),
+                contratos_adjudicados=Count('id', filter=Q(adjudicado__iexact='si')),
+                valor_asignado_2024=Sum('valor_asignado_2024'),
+                valor_total_final=Sum('valor_total_final_contrato'),
+                contratos_con_valor_final=Count('valor_total_final_contrato'),
+                valor_ejecutado_2024=Sum('valor_ejecutado_2024_hasta_31_julio'),
+                duracion_total=Sum(duracion),
+                contratos_con_duracion=Count(duracion),
+                count_adiciones=Count('id', filter=Q(valor_adiciones_reducciones__gt=0)),
+                total_adiciones=Sum('valor_adiciones_reducciones', filter=Q(valor_adiciones_reducciones__gt=0)),
+            )
+            .order_by())
+    cells = []
+    for row in rows:
+        duracion_total = row.pop('duracion_total')
+        row['duracion_total_dias'] = duracion_total.days if duracion_total else 0
+        cells.append(ContractKpiCube(**row))
+    ContractKpiCube.objects.bulk_create(cells)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0002_contract_facet_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractKpiCube',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio_paa', models.IntegerField(blank=True, null=True)),
+                ('rubro', models.CharField(blank=True, max_length=255, null=True)),
+                ('grupo', models.CharField(blank=True, max_length=255, null=True)),
+                ('area_pertenece', models.CharField(blank=True, max_length=255, null=True)),
+                ('tipo_proceso', models.CharField(blank=True, max_length=255, null=True)),
+                ('sistema_publicacion', models.CharField(blank=True, max_length=255, null=True)),
+                ('supervisor_contrato', models.CharField(blank=True, max_length=255, null=True)),
+                ('mes_suscripcion', models.IntegerField(blank=True, null=True)),
+                ('total_contratos', models.IntegerField(default=0)),
+                ('contratos_adjudicados', models.IntegerField(default=0)),
+                ('valor_asignado_2024', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('valor_total_final', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('contratos_con_valor_final', models.IntegerField(default=0)),
+                ('valor_ejecutado_2024', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('duracion_total_dias', models.BigIntegerField(default=0)),
+                ('contratos_con_duracion', models.IntegerField(default=0)),
+                ('count_adiciones', models.IntegerField(default=0)),
+                ('total_adiciones', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['anio_paa'], name='contract_cube_anio_idx')],
+            },
+        ),
+        migrations.RunPython(build_cube, migrations.RunPython.noop),
+    ]
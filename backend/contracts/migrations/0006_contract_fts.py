@@ -0,0 +1,71 @@
+from django.db import migrations
+
+FTS_FIELDS = 'objeto, detalle, descripcion_rubro, observaciones'
+OLD_VALUES = 'old.objeto, old.detalle, old.descripcion_rubro, old.observaciones'
+NEW_VALUES = 'new.objeto, new.detalle, new.descripcion_rubro, new.observaciones'
+
+CREATE_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE contracts_contract_fts USING fts5(
+        {FTS_FIELDS},
+        content='contracts_contract',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER contracts_contract_fts_ai AFTER INSERT ON contracts_contract BEGIN
+        INSERT INTO contracts_contract_fts(rowid, {FTS_FIELDS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER contracts_contract_fts_ad AFTER DELETE ON contracts_contract BEGIN
+        INSERT INTO contracts_contract_fts(contracts_contract_fts, rowid, {FTS_FIELDS})
+        VALUES ('delete', old.id, {OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER contracts_contract_fts_au AFTER UPDATE OF {FTS_FIELDS} ON contracts_contract BEGIN
+        INSERT INTO contracts_contract_fts(contracts_contract_fts, rowid, {FTS_FIELDS})
+        VALUES ('delete', old.id, {OLD_VALUES});
+        INSERT INTO contracts_contract_fts(rowid, {FTS_FIELDS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    # Indexa los contratos que ya existían
+    "INSERT INTO contracts_contract_fts(contracts_contract_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS_SQL = [
+    "DROP TRIGGER IF EXISTS contracts_contract_fts_ai",
+    "DROP TRIGGER IF EXISTS contracts_contract_fts_ad",
+    "DROP TRIGGER IF EXISTS contracts_contract_fts_au",
+    "DROP TABLE IF EXISTS contracts_contract_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    """
+    Crea el índice FTS5 de contratos y sus triggers (solo SQLite; en otros motores la búsqueda usa icontains).
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_FTS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0005_contract_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
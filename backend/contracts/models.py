@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.db.models import Count, Sum, Q, F, ExpressionWrapper, DurationField
+from django.db.models.functions import ExtractMonth
 
 # Descripción General del Código:
 
@@ -19,6 +22,10 @@ from django.db import models
 # Clases:
 
 # - Contract: Modelo Django que define la estructura de la tabla de contratos en la base de datos.
+# - ContractKpiCube: Tabla de agregados precalculados (sumas y conteos) por dimensiones de filtro,
+#   usada por los endpoints analíticos para no recorrer la tabla de contratos en cada gráfica.
+# - ContractDataVersion: Contador (fila única pk=1) que cambia con cada escritura de contratos;
+#   sirve como clave de caché y ETag de los endpoints de opciones.
 
 # Campos del Modelo:
 
@@ -71,6 +78,7 @@ from django.db import models
 # - expediente_gestion_documental: Cadena de texto (CharField)
 # - url_secop_tv: URL (URLField)
 # - observaciones: Texto largo (TextField)
+# - content_hash: Hash del contenido importado (CharField, no editable)
 
 class Contract(models.Model):
     """
@@ -125,9 +133,178 @@ class Contract(models.Model):
     expediente_gestion_documental = models.CharField(max_length=255, blank=True, null=True)
     url_secop_tv = models.URLField(blank=True, null=True)
     observaciones = models.TextField(blank=True, null=True)
+    # Hash del contenido importado desde Excel; permite a `import_contracts --upsert` omitir filas sin cambios
+    content_hash = models.CharField(max_length=64, blank=True, null=True, editable=False)
+
+    class Meta:
+        # Índices para las facetas que ContractFilter compara con igualdad exacta
+        indexes = [
+            models.Index(fields=['rubro'], name='contract_rubro_idx'),
+            models.Index(fields=['grupo'], name='contract_grupo_idx'),
+            models.Index(fields=['subgrupo'], name='contract_subgrupo_idx'),
+            models.Index(fields=['area_pertenece'], name='contract_area_idx'),
+            models.Index(fields=['tipo_proceso'], name='contract_tipo_proceso_idx'),
+            models.Index(fields=['sistema_publicacion'], name='contract_sistema_pub_idx'),
+            models.Index(fields=['impacto'], name='contract_impacto_idx'),
+            models.Index(fields=['supervisor_contrato'], name='contract_supervisor_idx'),
+            models.Index(fields=['anio_paa'], name='contract_anio_paa_idx'),
+        ]
 
     def __str__(self):
         """
         Define cómo se representa un objeto Contract como una cadena de texto, facilitando la depuración y la visualización de los datos.
         """
         return f"Contrato {self.numero_contrato or self.num or 'sin num'}"
+
+
+
+class ContractKpiCube(models.Model):
+    """
+    Define una celda del cubo de KPIs de contratos: sumas y conteos precalculados para cada combinación
+    de las dimensiones de filtro. Se refresca de forma incremental desde las señales de Contract y
+    se reconstruye por completo tras `import_contracts`.
+    """
+    # Dimensiones del cubo: campo del cubo -> campo de Contract
+    DIMENSIONS = [
+        'anio_paa',
+        'rubro',
+        'grupo',
+        'area_pertenece',
+        'tipo_proceso',
+        'sistema_publicacion',
+        'supervisor_contrato',
+        'mes_suscripcion',
+    ]
+
+    anio_paa = models.IntegerField(blank=True, null=True)
+    rubro = models.CharField(max_length=255, blank=True, null=True)
+    grupo = models.CharField(max_length=255, blank=True, null=True)
+    area_pertenece = models.CharField(max_length=255, blank=True, null=True)
+    tipo_proceso = models.CharField(max_length=255, blank=True, null=True)
+    sistema_publicacion = models.CharField(max_length=255, blank=True, null=True)
+    supervisor_contrato = models.CharField(max_length=255, blank=True, null=True)
+    mes_suscripcion = models.IntegerField(blank=True, null=True)
+
+    total_contratos = models.IntegerField(default=0)
+    contratos_adjudicados = models.IntegerField(default=0)
+    valor_asignado_2024 = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    valor_total_final = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    contratos_con_valor_final = models.IntegerField(default=0)
+    valor_ejecutado_2024 = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+    duracion_total_dias = models.BigIntegerField(default=0)
+    contratos_con_duracion = models.IntegerField(default=0)
+    count_adiciones = models.IntegerField(default=0)
+    total_adiciones = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['anio_paa'], name='contract_cube_anio_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Representa la celda con sus dimensiones principales.
+        """
+        return f"Cubo {self.anio_paa} / {self.rubro} / mes {self.mes_suscripcion}"
+
+    @classmethod
+    def aggregate_contracts(cls, queryset):
+        """
+        Agrupa un queryset de Contract por las dimensiones del cubo y retorna las celdas sin guardar.
+        """
+        duracion = ExpressionWrapper(F('fecha_final') - F('fecha_inicio_ejecucion'), output_field=DurationField())
+        rows = (queryset
+                .annotate(mes_suscripcion=ExtractMonth('fecha_suscripcion_contrato'))
+                .values(*cls.DIMENSIONS)
+                .annotate(
+                    total_contratos=Count('id'),
+                    contratos_adjudicados=Count('id', filter=Q(adjudicado__iexact='si')),
+                    valor_asignado_2024=Sum('valor_asignado_2024'),
+                    valor_total_final=Sum('valor_total_final_contrato'),
+                    contratos_con_valor_final=Count('valor_total_final_contrato'),
+                    valor_ejecutado_2024=Sum('valor_ejecutado_2024_hasta_31_julio'),
+                    duracion_total=Sum(duracion),
+                    contratos_con_duracion=Count(duracion),
+                    count_adiciones=Count('id', filter=Q(valor_adiciones_reducciones__gt=0)),
+                    total_adiciones=Sum('valor_adiciones_reducciones', filter=Q(valor_adiciones_reducciones__gt=0)),
+                )
+                .order_by())
+        cells = []
+        for row in rows:
+            duracion_total = row.pop('duracion_total')
+            row['duracion_total_dias'] = duracion_total.days if duracion_total else 0
+            cells.append(cls(**row))
+        return cells
+
+    @staticmethod
+    def cell_key(contract):
+        """
+        Retorna las dimensiones del cubo a las que pertenece un contrato.
+        """
+        fecha = contract.fecha_suscripcion_contrato
+        return (
+            contract.anio_paa,
+            contract.rubro,
+            contract.grupo,
+            contract.area_pertenece,
+            contract.tipo_proceso,
+            contract.sistema_publicacion,
+            contract.supervisor_contrato,
+            fecha.month if fecha else None,
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Reconstruye el cubo completo a partir de la tabla de contratos.
+        """
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(cls.aggregate_contracts(Contract.objects.all()))
+
+    @classmethod
+    def refresh_cells(cls, keys):
+        """
+        Recalcula solo las celdas indicadas (tuplas de dimensiones, ver `cell_key`).
+        """
+        with transaction.atomic():
+            for key in set(keys):
+                cube_lookup = {}
+                contract_lookup = {}
+                for dimension, value in zip(cls.DIMENSIONS, key):
+                    contract_field = dimension
+                    if dimension == 'mes_suscripcion':
+                        contract_field = ('fecha_suscripcion_contrato' if value is None
+                                          else 'fecha_suscripcion_contrato__month')
+                    if value is None:
+                        cube_lookup[f'{dimension}__isnull'] = True
+                        contract_lookup[f'{contract_field}__isnull'] = True
+                    else:
+                        cube_lookup[dimension] = value
+                        contract_lookup[contract_field] = value
+                cls.objects.filter(**cube_lookup).delete()
+                cls.objects.bulk_create(cls.aggregate_contracts(Contract.objects.filter(**contract_lookup)))
+
+
+class ContractDataVersion(models.Model):
+    """
+    Guarda la versión de los datos de contratos en una fila única (pk=1). Se incrementa con cada
+    escritura de Contract y al terminar `import_contracts`, lo que invalida las respuestas en caché.
+    """
+    version = models.BigIntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls):
+        """
+        Retorna la versión actual de los datos de contratos.
+        """
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        """
+        Incrementa la versión de los datos de contratos.
+        """
+        if not cls.objects.filter(pk=1).update(version=F('version') + 1, last_updated=timezone.now()):
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
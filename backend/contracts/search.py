@@ -0,0 +1,83 @@
+from django.db import connection, DatabaseError
+from django.db.models import Q
+from core.fts import build_match_query, search_words
+from .models import Contract
+
+# Descripción General del Código:
+
+# Este código implementa la búsqueda de texto completo sobre los campos de texto libre de los contratos
+# (objeto, detalle, descripcion_rubro, observaciones) con un índice FTS5 de SQLite.
+
+# Funcionalidades Principales:
+
+# 1. Índice FTS5 (contracts_contract_fts):
+#    - Tabla virtual de contenido externo sobre contracts_contract: guarda solo el índice invertido,
+#      el texto se sigue leyendo de la tabla de contratos.
+#    - Tokenizador `unicode61 remove_diacritics 2`: insensible a mayúsculas y tildes ("licitacion" encuentra "Licitación").
+#    - Lo crea la migración 0006_contract_fts. Sus triggers de INSERT, UPDATE y DELETE lo mantienen
+#      sincronizado con cualquier escritura, incluidas las de `bulk_create` y `bulk_update` que no disparan señales de Django.
+
+# 2. Búsqueda ordenada por relevancia (search_contracts):
+#    - Cada palabra de la consulta se busca como prefijo ("licencia" encuentra "licenciamiento")
+#      y todas deben aparecer en el contrato.
+#    - Los resultados se ordenan con bm25 y se paginan con LIMIT/OFFSET en la misma consulta.
+#    - Se pueden combinar con los filtros de ContractFilter.
+#    - Si la base de datos no tiene el índice (otro motor) se usa `icontains` sin orden por relevancia.
+
+# Funciones:
+
+# - build_match_query(text) (core/fts.py): convierte el texto del usuario en una expresión MATCH segura.
+# - search_contracts(text, queryset=None, offset=0, limit=20): retorna (total, [(id, rango), ...]).
+
+FTS_TABLE = 'contracts_contract_fts'
+FTS_FIELDS = ('objeto', 'detalle', 'descripcion_rubro', 'observaciones')
+
+def search_contracts(text, queryset=None, offset=0, limit=20):
+    """
+    Busca `text` en los campos de texto libre y retorna (total, [(id, rango), ...]) ordenado por relevancia.
+    Si se pasa `queryset` (p. ej. el de ContractFilter) solo se consideran esos contratos.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return 0, []
+
+    if connection.vendor != 'sqlite':
+        return _search_contracts_fallback(text, queryset, offset, limit)
+
+    where = f"{FTS_TABLE} MATCH %s"
+    params = [match]
+    if queryset is not None:
+        subquery, subparams = queryset.values('id').query.sql_with_params()
+        where += f" AND rowid IN ({subquery})"
+        params.extend(subparams)
+
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}", params)
+        except DatabaseError:
+            # SQLite compilado sin FTS5 o índice aún no creado
+            return _search_contracts_fallback(text, queryset, offset, limit)
+        total = cursor.fetchone()[0]
+        if total == 0 or offset >= total:
+            return total, []
+        cursor.execute(
+            f"SELECT rowid, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} WHERE {where} "
+            f"ORDER BY rank, rowid LIMIT %s OFFSET %s",
+            params + [limit, offset],
+        )
+        return total, list(cursor.fetchall())
+
+
+def _search_contracts_fallback(text, queryset, offset, limit):
+    """
+    Búsqueda sin índice para motores sin FTS5: todas las palabras con `icontains`, ordenadas por id y sin rango.
+    """
+    qs = queryset if queryset is not None else Contract.objects.all()
+    for word in search_words(text):
+        condition = Q()
+        for field in FTS_FIELDS:
+            condition |= Q(**{f'{field}__icontains': word})
+        qs = qs.filter(condition)
+    total = qs.count()
+    ids = qs.order_by('id').values_list('id', flat=True)[offset:offset + limit]
+    return total, [(contract_id, None) for contract_id in ids]
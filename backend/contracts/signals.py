@@ -0,0 +1,107 @@
+import threading
+from contextlib import contextmanager
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Contract, ContractKpiCube, ContractDataVersion
+
+# Descripción General del Código:
+
+# Este código mantiene sincronizadas las estructuras derivadas de la tabla de contratos
+# (el cubo de KPIs ContractKpiCube y la versión de datos ContractDataVersion) cuando se crea,
+# modifica o elimina un Contract.
+
+# Funcionalidades Principales:
+
+# 1. Refresco incremental:
+#    - Antes de guardar o eliminar se leen las dimensiones actuales del contrato en la base de datos.
+#    - Después se recalculan solo las celdas del cubo afectadas (la anterior y la nueva).
+#    - Se incrementa la versión de datos para invalidar las respuestas en caché.
+
+# 2. Cargas masivas (contract_bulk_changes):
+#    - Context manager que desactiva el refresco por fila y, al terminar, reconstruye el cubo
+#      e incrementa la versión de datos una sola vez.
+#    - Lo usa `import_contracts`, donde además `bulk_create` no dispara señales.
+
+# 3. Hash de importación:
+#    - Una edición fuera de la importación (admin o API) borra `content_hash`, para que el siguiente
+#      `import_contracts --upsert` vuelva a escribir la fila en lugar de darla por sin cambios.
+
+_state = threading.local()
+
+
+def _refresh_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+@contextmanager
+def contract_bulk_changes():
+    """
+    Suspende el refresco por fila durante una carga masiva; al finalizar reconstruye el cubo e incrementa la versión de datos.
+    """
+    previous = _refresh_suspended()
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+        if not previous:
+            ContractKpiCube.rebuild()
+            ContractDataVersion.bump()
+
+
+def _stored_cell_key(pk):
+    """
+    Retorna la celda del cubo a la que pertenece el contrato según lo guardado en la base de datos.
+    """
+    contract = Contract.objects.filter(pk=pk).only(
+        'anio_paa', 'rubro', 'grupo', 'area_pertenece', 'tipo_proceso',
+        'sistema_publicacion', 'supervisor_contrato', 'fecha_suscripcion_contrato',
+    ).first()
+    return ContractKpiCube.cell_key(contract) if contract else None
+
+
+@receiver(pre_save, sender=Contract)
+def remember_previous_cell(sender, instance, raw=False, **kwargs):
+    """
+    Guarda la celda anterior del contrato para poder recalcularla si cambian sus dimensiones
+    y descarta el hash de importación, que ya no corresponde al contenido editado.
+    """
+    if raw or _refresh_suspended() or instance.pk is None:
+        return
+    instance.content_hash = None
+    instance._previous_cube_key = _stored_cell_key(instance.pk)
+
+
+@receiver(post_save, sender=Contract)
+def refresh_cube_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Recalcula las celdas del cubo afectadas por la creación o modificación de un contrato.
+    """
+    if raw or _refresh_suspended():
+        return
+    keys = [_stored_cell_key(instance.pk), getattr(instance, '_previous_cube_key', None)]
+    ContractKpiCube.refresh_cells(key for key in keys if key is not None)
+    ContractDataVersion.bump()
+
+
+@receiver(pre_delete, sender=Contract)
+def remember_deleted_cell(sender, instance, **kwargs):
+    """
+    Guarda la celda del contrato antes de eliminarlo.
+    """
+    if _refresh_suspended():
+        return
+    instance._previous_cube_key = _stored_cell_key(instance.pk)
+
+
+@receiver(post_delete, sender=Contract)
+def refresh_cube_on_delete(sender, instance, **kwargs):
+    """
+    Recalcula la celda del cubo de la que salió el contrato eliminado.
+    """
+    if _refresh_suspended():
+        return
+    key = getattr(instance, '_previous_cube_key', None)
+    if key is not None:
+        ContractKpiCube.refresh_cells([key])
+    ContractDataVersion.bump()
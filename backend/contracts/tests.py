@@ -0,0 +1,247 @@
+import io
+import os
+import tempfile
+from unittest import mock
+from datetime import date, datetime
+from decimal import Decimal
+from openpyxl import Workbook
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .caching import etag_by_data_version
+from .filters import ContractFilter, filter_contracts
+from .models import Contract
+from .signals import contract_bulk_changes
+
+# Descripción General del Código:
+
+# Pruebas de los endpoints de contratos.
+
+# 1. Resumen de KPIs (kpis_full_summary):
+#    - Fija el número de consultas del resumen, tanto cuando se lee del cubo (ContractKpiCube) como cuando
+#      se recorre la tabla filtrada (p. ej. con `match=contains`), para que no vuelva a crecer con una
+#      consulta por KPI.
+
+# 2. Listado (contracts_list):
+#    - `limit` debe ser mayor que cero en la paginación por llave y en el modo NDJSON.
+
+#    - La búsqueda (contracts_search) omite los contratos eliminados después de consultar el índice.
+
+#    - El tablero agrupado (dashboard_bundle) evalúa los filtros de texto una sola vez para todas las secciones.
+
+# 3. ETag de las opciones (etag_by_data_version):
+#    - Responde 304 cuando el ETag no cambió y, al ir dentro de @api_view, nunca antes de verificar los permisos.
+
+# 4. Importación con --upsert (import_contracts):
+#    - Los contratos importados antes de --upsert (sin hash) no se duplican y las columnas ausentes
+#      de la hoja no borran los valores guardados.
+
+KPIS_URL = '/api/contracts/kpis-full-summary/'
+
+
+class KpisFullSummaryQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        with contract_bulk_changes():
+            Contract.objects.bulk_create([
+                Contract(
+                    anio_paa=2024,
+                    rubro=f'Rubro {i % 3}',
+                    grupo='Grupo',
+                    area_pertenece='OASTI',
+                    tipo_proceso='Contratación directa' if i % 2 else 'Mínima cuantía',
+                    sistema_publicacion='SECOP II',
+                    supervisor_contrato=f'Supervisor {i % 2}',
+                    nombre_contratista=f'Contratista {i}',
+                    adjudicado='Si' if i % 2 else 'No',
+                    fecha_suscripcion_contrato=date(2024, i % 12 + 1, 1),
+                    fecha_inicio_ejecucion=date(2024, 1, 1),
+                    fecha_final=date(2024, 12, 31),
+                    valor_asignado_2024=Decimal(1000 * i),
+                    valor_total_final_contrato=Decimal(1500 * i),
+                    valor_ejecutado_2024_hasta_31_julio=Decimal(500 * i),
+                )
+                for i in range(1, 21)
+            ])
+
+    def test_cube_path_query_count(self):
+        # agregado escalar + rubros + procesos + meses (cubo) y top de contratistas (tabla)
+        with self.assertNumQueries(5):
+            response = self.client.get(KPIS_URL, {'anio': 2024, 'rubro': 'Rubro 1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['kpis_generales']['total_contratos'], 7)
+
+    def test_base_table_fallback_query_count(self):
+        with self.assertNumQueries(5):
+            response = self.client.get(KPIS_URL, {'rubro': 'rubro 1', 'match': 'contains'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['kpis_generales']['total_contratos'], 7)
+
+    def test_cube_and_fallback_agree(self):
+        cube = self.client.get(KPIS_URL, {'anio': 2024}).json()
+        table = self.client.get(KPIS_URL, {'anio': 2024, 'match': 'contains'}).json()
+        self.assertEqual(cube['kpis_generales'], table['kpis_generales'])
+
+
+class ContractsListLimitTest(TestCase):
+
+    def test_zero_or_negative_limit_rejected_in_every_mode(self):
+        for params in ({'limit': 0}, {'limit': -1}, {'limit': 0, 'after': 0}, {'limit': 0, 'stream': 'ndjson'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/contracts/contracts-list/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('limit', response.json())
+
+    def test_after_zero_is_valid(self):
+        response = self.client.get('/api/contracts/contracts-list/', {'after': 0, 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+
+class DashboardBundleTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        with contract_bulk_changes():
+            Contract.objects.bulk_create([
+                Contract(anio_paa=2024, nombre_contratista=f'Contratista {i}', adjudicado='Si' if i % 2 else 'No')
+                for i in range(1, 13)
+            ])
+
+    def bundle(self, params):
+        """
+        Retorna (datos, consultas con el LIKE del filtro de contratista) de una petición a dashboard-bundle.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/contracts/dashboard-bundle/', params)
+        self.assertEqual(response.status_code, 200)
+        like_queries = [q['sql'] for q in queries if 'LIKE' in q['sql'] and 'nombre_contratista' in q['sql']]
+        return response.json(), like_queries
+
+    def test_shared_filter_is_evaluated_once(self):
+        data, like_queries = self.bundle({'contratista': 'contratista 1', 'sections': 'kpis,estados,contratos'})
+        self.assertEqual(len(like_queries), 1)
+
+        # Contratista 1, 10, 11 y 12
+        self.assertEqual(data['kpis']['kpis_generales']['total_contratos'], 4)
+        self.assertEqual(data['estados'], {'Si': 2, 'No': 2})
+        self.assertEqual(len(data['contratos']), 4)
+
+    def test_kpis_section_uses_materialized_ids(self):
+        # El top de contratistas de kpis también lee la tabla filtrada
+        data, like_queries = self.bundle({'contratista': 'contratista 1', 'sections': 'kpis,estados'})
+        self.assertEqual(len(like_queries), 1)
+        self.assertEqual(data['estados'], {'Si': 2, 'No': 2})
+
+    def test_large_results_keep_the_filter_as_a_subquery(self):
+        with mock.patch.object(ContractFilter, 'MATERIALIZE_MAX_IDS', 2):
+            data, like_queries = self.bundle({'contratista': 'contratista 1', 'sections': 'estados,contratos'})
+        # Un intento de materializar más el LIKE de cada sección, sin una lista de ids enorme
+        self.assertEqual(len(like_queries), 3)
+        self.assertEqual(len(data['contratos']), 4)
+
+    def test_only_like_filters_are_materialized(self):
+        self.assertFalse(filter_contracts({'anio': 2024, 'rubro': 'Rubro'}).expensive)
+        self.assertTrue(filter_contracts({'rubro': 'rubro', 'match': 'contains'}).expensive)
+        self.assertTrue(filter_contracts({'contratista': 'contratista'}).expensive)
+
+        filterset = filter_contracts({'anio': 2024})
+        qs = filterset.qs
+        self.assertIs(filterset.materialize().qs, qs)
+
+
+class ContractsSearchTest(TestCase):
+
+    def test_contract_deleted_after_index_query_is_skipped(self):
+        contract = Contract.objects.create(objeto='Soporte de impresoras')
+        matches = (2, [(contract.id, -1.5), (contract.id + 1000, -1.0)])
+        with mock.patch('contracts.views.search_contracts', return_value=matches):
+            response = self.client.get('/api/contracts/contracts-search/', {'q': 'impresoras'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [contract.id])
+
+
+class EtagByDataVersionTest(TestCase):
+
+    def test_not_modified_when_etag_matches(self):
+        response = self.client.get('/api/contracts/anios-options/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get('/api/contracts/anios-options/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_permissions_checked_before_not_modified(self):
+        @api_view(['GET'])
+        @permission_classes([IsAuthenticated])
+        @etag_by_data_version
+        def protected(request):
+            return Response({'ok': True})
+
+        # `If-None-Match: *` coincide con cualquier ETag: si el decorador corriera antes de DRF respondería 304
+        response = protected(RequestFactory().get('/protected/', HTTP_IF_NONE_MATCH='*'))
+        self.assertEqual(response.status_code, 401)
+
+
+class ImportContractsUpsertTest(TestCase):
+
+    def write_sheet(self, headers, rows):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'Contratos 2024'
+        for col_idx, header in enumerate(headers, start=1):
+            sheet.cell(row=7, column=col_idx, value=header)
+        for row_idx, row in enumerate(rows, start=8):
+            for col_idx, value in enumerate(row, start=1):
+                sheet.cell(row=row_idx, column=col_idx, value=value)
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        workbook.save(path)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def upsert(self, path):
+        call_command('import_contracts', file=path, upsert=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_legacy_rows_without_keys_are_not_duplicated(self):
+        # Contrato importado antes de --upsert: sin número de contrato ni de proceso y sin hash
+        Contract.objects.create(
+            rubro='Rubro', objeto='Soporte', valor_asignado_2024=Decimal('1500'),
+            fecha_suscripcion_contrato=date(2024, 3, 1),
+        )
+        self.assertIsNone(Contract.objects.get().content_hash)
+
+        path = self.write_sheet(
+            ['Rubro', 'Objeto', 'Valor asignado al 2024', 'Fecha de suscripción de contrato'],
+            [['Rubro', 'Soporte', 1500, datetime(2024, 3, 1)]],
+        )
+        self.upsert(path)
+        self.assertEqual(Contract.objects.count(), 1)
+        self.assertIsNotNone(Contract.objects.get().content_hash)
+
+        self.upsert(path)
+        self.assertEqual(Contract.objects.count(), 1)
+
+    def test_missing_columns_keep_stored_values(self):
+        Contract.objects.create(numero_contrato='C-1', rubro='Rubro', supervisor_contrato='Ana')
+        path = self.write_sheet(['Numero del contrato', 'Rubro'], [['C-1', 'Otro rubro']])
+        self.upsert(path)
+
+        contract = Contract.objects.get()
+        self.assertEqual(contract.rubro, 'Otro rubro')
+        self.assertEqual(contract.supervisor_contrato, 'Ana')
+
+    def test_keyless_rows_from_partial_sheet_are_matched(self):
+        # Contrato sin número de contrato ni de proceso, con una columna que la hoja no trae
+        Contract.objects.create(rubro='Rubro', objeto='Soporte', supervisor_contrato='Ana')
+        path = self.write_sheet(['Rubro', 'Objeto'], [['Rubro', 'Soporte']])
+        self.upsert(path)
+        self.upsert(path)
+
+        contract = Contract.objects.get()
+        self.assertEqual(contract.supervisor_contrato, 'Ana')
+        self.assertIsNotNone(contract.content_hash)
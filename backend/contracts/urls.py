@@ -12,7 +12,10 @@ from .views import (
     sistemas_info_stats,
     filters_options,
     estados_stats,
-    contracts_list
+    facets,
+    contracts_list,
+    contracts_search,
+    dashboard_bundle
 )
 
 router = DefaultRouter()
@@ -29,5 +32,8 @@ urlpatterns = [
     path('sistemas-info-stats/', sistemas_info_stats, name='sistemas-info-stats'),
     path('filters-options/', filters_options, name='filters-options'),
     path('estados-stats/', estados_stats, name='estados-stats'),
+    path('facets/', facets, name='facets'),
     path('contracts-list/', contracts_list, name='contracts-list'),
+    path('contracts-search/', contracts_search, name='contracts-search'),
+    path('dashboard-bundle/', dashboard_bundle, name='dashboard-bundle'),
 ]
@@ -1,11 +1,18 @@
+import json
 from rest_framework import viewsets
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
-from django.db.models import Sum, Count, Avg, F
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.db.models import Sum, Count, Avg, F, Q, ExpressionWrapper, DurationField
 from django.db.models.functions import ExtractMonth
 from .models import Contract
 from .serializers import ContractSerializer
+from .filters import filter_contracts, facet_counts, FACET_DIMENSIONS
+from .caching import etag_by_data_version, cache_by_data_version, get_or_set_by_data_version
+from .search import search_contracts
 
 # Descripción General del Código:
 
@@ -33,16 +40,31 @@ from .serializers import ContractSerializer
 # 3. Opciones de Filtro (contratistas_options, rubros_options, anios_options, filters_options):
 #    - Retorna listas de opciones únicas para diferentes campos (contratistas, rubros, años)
 #      que pueden ser utilizadas en la interfaz de usuario para filtrar los resultados.
+#    - Las respuestas se guardan en caché por versión de datos y llevan ETag (304 si no hay cambios).
 
 # 4. Estadísticas (adiciones_stats, supervisores_stats, sistemas_info_stats, estados_stats):
+#    - Cuando todos los filtros aplicados son dimensiones del cubo (ContractKpiCube), los KPIs y estas
+#      estadísticas se leen de los agregados precalculados en lugar de recorrer la tabla de contratos.
 #    - Calcula y retorna estadísticas sobre diferentes aspectos de los contratos, como:
 #      - Adiciones (cantidad, valor total, distribución mensual)
 #      - Supervisores (cantidad de contratos supervisados, valor total de los contratos)
 #      - Sistemas de publicación (cantidad de contratos publicados, valor total de los contratos)
 #      - Estados (conteo de contratos por estado, como "adjudicado")
 
-# 5. Listado de Contratos (contracts_list):
+# 5. Facetas (facets):
+#    - Retorna los valores de cada faceta con su conteo de contratos, respetando los filtros aplicados,
+#      en una sola consulta. Sirve para mostrar conteos en vivo junto a cada opción del panel de filtros.
+
+# 6. Listado de Contratos (contracts_list):
 #    - Retorna una lista de contratos con campos básicos, aplicando filtros.
+#    - Soporta paginación por llave sobre `id` y un modo de streaming NDJSON.
+
+# 7. Búsqueda de Texto Completo (contracts_search):
+#    - Busca en los campos de texto libre con el índice FTS5 y retorna los contratos ordenados por relevancia, paginados.
+
+# 8. Paquete del tablero (dashboard_bundle):
+#    - Retorna en una sola respuesta las secciones que pide ContractsDashboard (KPIs, adiciones, supervisores,
+#      sistemas, estados, opciones de filtro y listado), validando los filtros una sola vez.
 
 # Tecnologías Utilizadas:
 
@@ -83,133 +105,130 @@ class ContractViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticated, IsAdminUser]
         return [perm() for perm in permission_classes]
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def kpis_full_summary(request):
+def _kpis_summary(request, filterset):
     """
-    Calcula y retorna un resumen completo de los KPIs (Indicadores Clave de Rendimiento) relacionados con los contratos, aplicando filtros y agregaciones.
+    Calcula el resumen de KPIs para un ContractFilter ya validado (lo usan kpis_full_summary y dashboard_bundle).
     """
-    qs = Contract.objects.all()
-
-    # Filtros existentes
-    anio = request.GET.get('anio')
-    rubro = request.GET.get('rubro')
-    contratista = request.GET.get('contratista')
-    fecha_inicio_desde = request.GET.get('fecha_inicio_desde')
-    fecha_inicio_hasta = request.GET.get('fecha_inicio_hasta')
-
-    # Filtros adicionales
-    grupo = request.GET.get('grupo')
-    subgrupo = request.GET.get('subgrupo')
-    area = request.GET.get('area')  # area_pertenece
-    tipo_proceso = request.GET.get('tipo_proceso')
-    sistema_pub = request.GET.get('sistema_publicacion')
-    impacto = request.GET.get('impacto')
-    supervisor = request.GET.get('supervisor')
-
-    if anio:
-        qs = qs.filter(anio_paa=anio)
-    if rubro:
-        qs = qs.filter(rubro__icontains=rubro)
-    if contratista:
-        qs = qs.filter(nombre_contratista__icontains=contratista)
-    if fecha_inicio_desde:
-        qs = qs.filter(fecha_inicio_ejecucion__gte=fecha_inicio_desde)
-    if fecha_inicio_hasta:
-        qs = qs.filter(fecha_inicio_ejecucion__lte=fecha_inicio_hasta)
-    if grupo:
-        qs = qs.filter(grupo__icontains=grupo)
-    if subgrupo:
-        qs = qs.filter(subgrupo__icontains=subgrupo)
-    if area:
-        qs = qs.filter(area_pertenece__icontains=area)
-    if tipo_proceso:
-        qs = qs.filter(tipo_proceso__icontains=tipo_proceso)
-    if sistema_pub:
-        qs = qs.filter(sistema_publicacion__icontains=sistema_pub)
-    if impacto:
-        qs = qs.filter(impacto__icontains=impacto)
-    if supervisor:
-        qs = qs.filter(supervisor_contrato__icontains=supervisor)
-
-    total_contratos = qs.count()
-    valor_total_asignado_2024 = qs.aggregate(total=Sum('valor_asignado_2024'))['total'] or 0
-    valor_total_final = qs.aggregate(total=Sum('valor_total_final_contrato'))['total'] or 0
-    valor_promedio_final = qs.aggregate(prom=Avg('valor_total_final_contrato'))['prom'] or 0
-
-    # Calculo de duracion promedio
-    duracion_qs = qs.filter(fecha_inicio_ejecucion__isnull=False, fecha_final__isnull=False).values('fecha_inicio_ejecucion', 'fecha_final')
-    total_dias = 0
-    count_contratos_con_duracion = 0
-    for c in duracion_qs:
-        inicio = c['fecha_inicio_ejecucion']
-        fin = c['fecha_final']
-        if inicio and fin:
-            diff = (fin - inicio).days
-            total_dias += diff
-            count_contratos_con_duracion += 1
-
-    if count_contratos_con_duracion > 0:
-        duracion_promedio = total_dias / count_contratos_con_duracion
+    qs = filterset.qs
+    cube = filterset.cube_queryset()
+
+    if cube is not None:
+        # Todos los filtros son dimensiones del cubo: se suman las celdas precalculadas
+        kpis = cube.aggregate(
+            total_contratos=Sum('total_contratos'),
+            valor_total_asignado_2024=Sum('valor_asignado_2024'),
+            valor_total_final=Sum('valor_total_final'),
+            contratos_con_valor_final=Sum('contratos_con_valor_final'),
+            duracion_total_dias=Sum('duracion_total_dias'),
+            contratos_con_duracion=Sum('contratos_con_duracion'),
+            contratos_adjudicados=Sum('contratos_adjudicados'),
+            valor_ejecutado_2024=Sum('valor_ejecutado_2024'),
+        )
+
+        valor_por_rubro = (cube.values('rubro')
+                           .annotate(total=Sum('valor_asignado_2024'))
+                           .order_by('-total')[:5])
+
+        contratos_por_proceso = (cube.values('tipo_proceso')
+                                 .annotate(count=Sum('total_contratos'))
+                                 .order_by('-count'))
+
+        valor_por_mes = (cube.filter(mes_suscripcion__isnull=False)
+                         .annotate(mes=F('mes_suscripcion'))
+                         .values('mes')
+                         .annotate(total=Sum('valor_asignado_2024'))
+                         .order_by('mes'))
     else:
-        duracion_promedio = 0
-
-    valor_por_rubro = (qs.values('rubro')
-                       .annotate(total=Sum('valor_asignado_2024'))
-                       .order_by('-total')[:5])
-
+        # Todos los KPIs escalares se calculan en una sola consulta con agregados condicionales;
+        # la duración se suma en SQL como la diferencia entre fecha final e inicio.
+        duracion = ExpressionWrapper(F('fecha_final') - F('fecha_inicio_ejecucion'), output_field=DurationField())
+        kpis = qs.aggregate(
+            total_contratos=Count('id'),
+            valor_total_asignado_2024=Sum('valor_asignado_2024'),
+            valor_total_final=Sum('valor_total_final_contrato'),
+            contratos_con_valor_final=Count('valor_total_final_contrato'),
+            duracion_total=Sum(duracion),
+            contratos_con_duracion=Count(duracion),
+            contratos_adjudicados=Count('id', filter=Q(adjudicado__iexact='si')),
+            valor_ejecutado_2024=Sum('valor_ejecutado_2024_hasta_31_julio'),
+        )
+        duracion_total = kpis.pop('duracion_total')
+        kpis['duracion_total_dias'] = duracion_total.days if duracion_total else 0
+
+        valor_por_rubro = (qs.values('rubro')
+                           .annotate(total=Sum('valor_asignado_2024'))
+                           .order_by('-total')[:5])
+
+        contratos_por_proceso = (qs.values('tipo_proceso')
+                                 .annotate(count=Count('id'))
+                                 .order_by('-count'))
+
+        valor_por_mes = (qs.filter(fecha_suscripcion_contrato__isnull=False)
+                         .annotate(mes=F('fecha_suscripcion_contrato__month'))
+                         .values('mes')
+                         .annotate(total=Sum('valor_asignado_2024'))
+                         .order_by('mes'))
+
+    # El contratista no es dimensión del cubo; siempre se agrupa sobre la tabla filtrada
     top_contratistas = (qs.values('nombre_contratista')
                         .annotate(count=Count('id'), valor=Sum('valor_total_final_contrato'))
                         .order_by('-valor')[:5])
 
-    contratos_por_proceso = (qs.values('tipo_proceso')
-                             .annotate(count=Count('id'))
-                             .order_by('-count'))
-
-    valor_por_mes = (qs.filter(fecha_suscripcion_contrato__isnull=False)
-                     .annotate(mes=F('fecha_suscripcion_contrato__month'))
-                     .values('mes')
-                     .annotate(total=Sum('valor_asignado_2024'))
-                     .order_by('mes'))
+    if kpis['contratos_con_valor_final']:
+        valor_promedio_final = kpis['valor_total_final'] / kpis['contratos_con_valor_final']
+    else:
+        valor_promedio_final = 0
 
-    # Contratos adjudicados (asumiendo 'si' = adjudicado)
-    contratos_adjudicados = qs.filter(adjudicado__iexact='si').count()
-    valor_ejecutado_2024 = qs.aggregate(ej=Sum('valor_ejecutado_2024_hasta_31_julio'))['ej'] or 0
+    if kpis['contratos_con_duracion']:
+        duracion_promedio = kpis['duracion_total_dias'] / kpis['contratos_con_duracion']
+    else:
+        duracion_promedio = 0
 
     data = {
         'filtros_aplicados': {
-            'anio': anio or 'todos',
-            'rubro': rubro or 'todos',
-            'contratista': contratista or 'todos',
-            'fecha_inicio_desde': fecha_inicio_desde or 'N/A',
-            'fecha_inicio_hasta': fecha_inicio_hasta or 'N/A',
-            'grupo': grupo or 'todos',
-            'subgrupo': subgrupo or 'todos',
-            'area': area or 'todos',
-            'tipo_proceso': tipo_proceso or 'todos',
-            'sistema_publicacion': sistema_pub or 'todos',
-            'impacto': impacto or 'todos',
-            'supervisor': supervisor or 'todos',
+            'anio': request.GET.get('anio') or 'todos',
+            'rubro': request.GET.get('rubro') or 'todos',
+            'contratista': request.GET.get('contratista') or 'todos',
+            'fecha_inicio_desde': request.GET.get('fecha_inicio_desde') or 'N/A',
+            'fecha_inicio_hasta': request.GET.get('fecha_inicio_hasta') or 'N/A',
+            'grupo': request.GET.get('grupo') or 'todos',
+            'subgrupo': request.GET.get('subgrupo') or 'todos',
+            'area': request.GET.get('area') or 'todos',
+            'tipo_proceso': request.GET.get('tipo_proceso') or 'todos',
+            'sistema_publicacion': request.GET.get('sistema_publicacion') or 'todos',
+            'impacto': request.GET.get('impacto') or 'todos',
+            'supervisor': request.GET.get('supervisor') or 'todos',
         },
         'kpis_generales': {
-            'total_contratos': total_contratos,
-            'valor_total_asignado_2024': float(valor_total_asignado_2024),
-            'valor_total_final': float(valor_total_final),
+            'total_contratos': kpis['total_contratos'] or 0,
+            'valor_total_asignado_2024': float(kpis['valor_total_asignado_2024'] or 0),
+            'valor_total_final': float(kpis['valor_total_final'] or 0),
             'valor_promedio_final': float(valor_promedio_final),
             'duracion_promedio_dias': duracion_promedio,
-            'contratos_adjudicados': contratos_adjudicados,
-            'valor_ejecutado_2024': float(valor_ejecutado_2024),
+            # Contratos adjudicados (asumiendo 'si' = adjudicado)
+            'contratos_adjudicados': kpis['contratos_adjudicados'] or 0,
+            'valor_ejecutado_2024': float(kpis['valor_ejecutado_2024'] or 0),
         },
         'top_rubros_valor_2024': list(valor_por_rubro),
         'top_contratistas_valor': list(top_contratistas),
         'contratos_por_proceso': list(contratos_por_proceso),
         'valor_por_mes_2024': list(valor_por_mes),
     }
+    return data
 
-    return Response(data)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+def kpis_full_summary(request):
+    """
+    Calcula y retorna un resumen completo de los KPIs (Indicadores Clave de Rendimiento) relacionados con los contratos, aplicando filtros y agregaciones.
+    """
+    return Response(_kpis_summary(request, filter_contracts(request.GET)))
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@etag_by_data_version
+@cache_by_data_version
 def contratistas_options(request):
     """
     Retorna una lista de opciones de contratistas únicos para ser usadas en filtros o selects de la interfaz de usuario.
@@ -222,6 +241,8 @@ def contratistas_options(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@etag_by_data_version
+@cache_by_data_version
 def rubros_options(request):
     """
     Retorna una lista de opciones de rubros únicos para ser usadas en filtros o selects de la interfaz de usuario.
@@ -234,6 +255,8 @@ def rubros_options(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@etag_by_data_version
+@cache_by_data_version
 def anios_options(request):
     """
     Retorna una lista de opciones de años únicos para ser usadas en filtros o selects de la interfaz de usuario.
@@ -243,104 +266,176 @@ def anios_options(request):
     anios = sorted(anios)
     return Response(anios)
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def adiciones_stats(request):
+def _adiciones_stats(filterset):
     """
-    Calcula estadísticas relacionadas con las adiciones a los contratos, como el número total, el valor total y la distribución mensual.
+    Calcula las estadísticas de adiciones para un ContractFilter ya validado.
     """
-    adiciones_qs = Contract.objects.filter(valor_adiciones_reducciones__gt=0)
-    count_adiciones = adiciones_qs.count()
-    total_adiciones = adiciones_qs.aggregate(total=Sum('valor_adiciones_reducciones'))['total'] or 0
+    cube = filterset.cube_queryset()
+
+    if cube is not None:
+        adiciones_cube = cube.filter(count_adiciones__gt=0)
+        resumen = adiciones_cube.aggregate(count=Sum('count_adiciones'), total=Sum('total_adiciones'))
+        distribucion_mensual = (adiciones_cube.filter(mes_suscripcion__isnull=False)
+                                .annotate(mes=F('mes_suscripcion'))
+                                .values('mes')
+                                .annotate(total=Sum('total_adiciones'))
+                                .order_by('mes'))
+    else:
+        adiciones_qs = filterset.qs.filter(valor_adiciones_reducciones__gt=0)
+        resumen = adiciones_qs.aggregate(count=Count('id'), total=Sum('valor_adiciones_reducciones'))
+        distribucion_mensual = (adiciones_qs.filter(fecha_suscripcion_contrato__isnull=False)
+                                .annotate(mes=ExtractMonth('fecha_suscripcion_contrato'))
+                                .values('mes')
+                                .annotate(total=Sum('valor_adiciones_reducciones'))
+                                .order_by('mes'))
+
+    count_adiciones = resumen['count'] or 0
+    total_adiciones = resumen['total'] or 0
     promedio_adiciones = total_adiciones / count_adiciones if count_adiciones > 0 else 0
 
-    distribucion_mensual = (adiciones_qs.filter(fecha_suscripcion_contrato__isnull=False)
-                            .annotate(mes=ExtractMonth('fecha_suscripcion_contrato'))
-                            .values('mes')
-                            .annotate(total=Sum('valor_adiciones_reducciones'))
-                            .order_by('mes'))
-
     data = {
         'count_adiciones': count_adiciones,
         'total_adiciones': float(total_adiciones),
         'promedio_adiciones': float(promedio_adiciones),
         'distribucion_mensual': list(distribucion_mensual),
     }
+    return data
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def adiciones_stats(request):
+    """
+    Calcula estadísticas relacionadas con las adiciones a los contratos, como el número total, el valor total y la distribución mensual.
+    Acepta los mismos filtros que kpis_full_summary.
+    """
+    return Response(_adiciones_stats(filter_contracts(request.GET)))
+
+def _supervisores_stats(filterset):
+    """
+    Agrupa los contratos por supervisor para un ContractFilter ya validado.
+    """
+    cube = filterset.cube_queryset()
+
+    if cube is not None:
+        supervisores_qs = (cube.exclude(supervisor_contrato__isnull=True)
+                           .exclude(supervisor_contrato__exact='')
+                           .values('supervisor_contrato')
+                           .annotate(
+                               count=Sum('total_contratos'),
+                               valor=Sum('valor_total_final')
+                           )
+                           .order_by('-valor'))
+    else:
+        supervisores_qs = (filterset.qs.exclude(supervisor_contrato__isnull=True)
+                           .exclude(supervisor_contrato__exact='')
+                           .values('supervisor_contrato')
+                           .annotate(
+                               count=Count('id'),
+                               valor=Sum('valor_total_final_contrato')
+                           )
+                           .order_by('-valor'))
+
+    return list(supervisores_qs)
 
-    return Response(data)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def supervisores_stats(request):
     """
     Calcula estadísticas de los supervisores de los contratos, como la cantidad de contratos supervisados y el valor total de los contratos supervisados.
+    Acepta los mismos filtros que kpis_full_summary.
     """
-    supervisores_qs = (Contract.objects.exclude(supervisor_contrato__isnull=True)
-                       .exclude(supervisor_contrato__exact='')
-                       .values('supervisor_contrato')
+    return Response(_supervisores_stats(filter_contracts(request.GET)))
+
+def _sistemas_info_stats(filterset):
+    """
+    Agrupa los contratos por sistema de publicación para un ContractFilter ya validado.
+    """
+    cube = filterset.cube_queryset()
+
+    if cube is not None:
+        sistemas_qs = (cube.exclude(sistema_publicacion__isnull=True)
+                       .exclude(sistema_publicacion__exact='')
+                       .values('sistema_publicacion')
+                       .annotate(
+                           count=Sum('total_contratos'),
+                           valor=Sum('valor_total_final')
+                       )
+                       .order_by('-valor'))
+    else:
+        sistemas_qs = (filterset.qs.exclude(sistema_publicacion__isnull=True)
+                       .exclude(sistema_publicacion__exact='')
+                       .values('sistema_publicacion')
                        .annotate(
                            count=Count('id'),
                            valor=Sum('valor_total_final_contrato')
                        )
                        .order_by('-valor'))
 
-    data = list(supervisores_qs)
-    return Response(data)
+    return list(sistemas_qs)
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def sistemas_info_stats(request):
     """
     Calcula estadísticas sobre los sistemas de publicación utilizados para los contratos.
+    Acepta los mismos filtros que kpis_full_summary.
     """
-    sistemas_qs = (Contract.objects.exclude(sistema_publicacion__isnull=True)
-                   .exclude(sistema_publicacion__exact='')
-                   .values('sistema_publicacion')
-                   .annotate(
-                       count=Count('id'),
-                       valor=Sum('valor_total_final_contrato')
-                   )
-                   .order_by('-valor'))
-
-    data = list(sistemas_qs)
-    return Response(data)
+    return Response(_sistemas_info_stats(filter_contracts(request.GET)))
 
 
 # NUEVO ENDPOINT filters-options
+def _filters_options():
+    """
+    Calcula las opciones de todos los filtros (sin filtrar); lo usan filters_options y dashboard_bundle.
+    """
+    def to_dict(values):
+        return [{"label": v, "value": v} for v in sorted(values) if v]
+
+    # Una sola consulta (UNION ALL) en lugar de un DISTINCT por cada campo
+    facets = facet_counts({}, {name: field for name, field in FACET_DIMENSIONS.items() if name != 'adjudicado'})
+    valores = {name: [valor for valor, _ in counts] for name, counts in facets.items()}
+
+    data = {
+        'anios': sorted(valores['anio']),
+        'rubros': to_dict(valores['rubro']),
+        'contratistas': to_dict(valores['contratista']),
+        'grupos': to_dict(valores['grupo']),
+        'subgrupos': to_dict(valores['subgrupo']),
+        'areas': to_dict(valores['area']),
+        'tipos_proceso': to_dict(valores['tipo_proceso']),
+        'sistemas_publicacion': to_dict(valores['sistema_publicacion']),
+        'impactos': to_dict(valores['impacto']),
+        'supervisores': to_dict(valores['supervisor'])
+    }
+    return data
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@etag_by_data_version
+@cache_by_data_version
 def filters_options(request):
     """
     Retorna un diccionario con todas las opciones de filtro (años, rubros, contratistas, etc.) para ser usadas en la interfaz de usuario.
     """
-    def to_dict(values):
-        return [{"label": v, "value": v} for v in values if v]
-
-    anios = Contract.objects.exclude(anio_paa__isnull=True).values_list('anio_paa', flat=True).distinct()
-    rubros = Contract.objects.exclude(rubro__isnull=True).exclude(rubro='').values_list('rubro', flat=True).distinct()
-    contratistas = Contract.objects.exclude(nombre_contratista__isnull=True).exclude(nombre_contratista='').values_list('nombre_contratista', flat=True).distinct()
-    grupos = Contract.objects.exclude(grupo__isnull=True).exclude(grupo='').values_list('grupo', flat=True).distinct()
-    subgrupos = Contract.objects.exclude(subgrupo__isnull=True).exclude(subgrupo='').values_list('subgrupo', flat=True).distinct()
-    areas = Contract.objects.exclude(area_pertenece__isnull=True).exclude(area_pertenece='').values_list('area_pertenece', flat=True).distinct()
-    tipos_proceso = Contract.objects.exclude(tipo_proceso__isnull=True).exclude(tipo_proceso='').values_list('tipo_proceso', flat=True).distinct()
-    sistemas_pub = Contract.objects.exclude(sistema_publicacion__isnull=True).exclude(sistema_publicacion='').values_list('sistema_publicacion', flat=True).distinct()
-    impactos = Contract.objects.exclude(impacto__isnull=True).exclude(impacto='').values_list('impacto', flat=True).distinct()
-    supervisores = Contract.objects.exclude(supervisor_contrato__isnull=True).exclude(supervisor_contrato='').values_list('supervisor_contrato', flat=True).distinct()
+    return Response(_filters_options())
 
-    data = {
-        'anios': sorted(anios),
-        'rubros': to_dict(rubros),
-        'contratistas': to_dict(contratistas),
-        'grupos': to_dict(grupos),
-        'subgrupos': to_dict(subgrupos),
-        'areas': to_dict(areas),
-        'tipos_proceso': to_dict(tipos_proceso),
-        'sistemas_publicacion': to_dict(sistemas_pub),
-        'impactos': to_dict(impactos),
-        'supervisores': to_dict(supervisores)
-    }
+def _estados_stats(filterset):
+    """
+    Cuenta los contratos por estado para un ContractFilter ya validado.
+    """
+    qs = filterset.qs
+
+    # Un solo GROUP BY en lugar de un count() por cada estado
+    estados = (qs.exclude(adjudicado__isnull=True).exclude(adjudicado='')
+               .values('adjudicado')
+               .annotate(count=Count('id'))
+               .order_by())
+    return {row['adjudicado']: row['count'] for row in estados}
 
-    return Response(data)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -348,54 +443,85 @@ def estados_stats(request):
     """
     Retorna un conteo de los contratos agrupados por su estado (adjudicado, etc.), aplicando filtros.
     """
-    qs = Contract.objects.all()
-    # Copiamos los mismos filtros de kpis_full_summary:
-    anio = request.GET.get('anio')
-    rubro = request.GET.get('rubro')
-    contratista = request.GET.get('contratista')
-    fecha_inicio_desde = request.GET.get('fecha_inicio_desde')
-    fecha_inicio_hasta = request.GET.get('fecha_inicio_hasta')
-    grupo = request.GET.get('grupo')
-    subgrupo = request.GET.get('subgrupo')
-    area = request.GET.get('area')
-    tipo_proceso = request.GET.get('tipo_proceso')
-    sistema_pub = request.GET.get('sistema_publicacion')
-    impacto = request.GET.get('impacto')
-    supervisor = request.GET.get('supervisor')
-
-    if anio:
-        qs = qs.filter(anio_paa=anio)
-    if rubro:
-        qs = qs.filter(rubro__icontains=rubro)
-    if contratista:
-        qs = qs.filter(nombre_contratista__icontains=contratista)
-    if fecha_inicio_desde:
-        qs = qs.filter(fecha_inicio_ejecucion__gte=fecha_inicio_desde)
-    if fecha_inicio_hasta:
-        qs = qs.filter(fecha_inicio_ejecucion__lte=fecha_inicio_hasta)
-    if grupo:
-        qs = qs.filter(grupo__icontains=grupo)
-    if subgrupo:
-        qs = qs.filter(subgrupo__icontains=subgrupo)
-    if area:
-        qs = qs.filter(area_pertenece__icontains=area)
-    if tipo_proceso:
-        qs = qs.filter(tipo_proceso__icontains=tipo_proceso)
-    if sistema_pub:
-        qs = qs.filter(sistema_publicacion__icontains=sistema_pub)
-    if impacto:
-        qs = qs.filter(impacto__icontains=impacto)
-    if supervisor:
-        qs = qs.filter(supervisor_contrato__icontains=supervisor)
-
-    estados_count = {}
-    # Extraer todos los valores únicos de adjudicado
-    adjudicados = qs.exclude(adjudicado__isnull=True).exclude(adjudicado='').values_list('adjudicado', flat=True).distinct()
-    for estado_val in adjudicados:
-        count = qs.filter(adjudicado=estado_val).count()
-        estados_count[estado_val] = count
-
-    return Response(estados_count)
+    return Response(_estados_stats(filter_contracts(request.GET)))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def facets(request):
+    """
+    Retorna, para cada faceta (año, rubro, contratista, grupo, etc.), los valores disponibles con su conteo de contratos,
+    respetando los filtros aplicados. Cada faceta ignora su propio filtro y todas se calculan en una sola consulta.
+    Con `facets=rubro,grupo` se limita la respuesta a esas facetas.
+    """
+    selected = FACET_DIMENSIONS
+    if request.GET.get('facets'):
+        names = [name.strip() for name in request.GET['facets'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in FACET_DIMENSIONS]
+        if unknown:
+            raise ValidationError({'facets': f"Facetas desconocidas: {', '.join(unknown)}"})
+        selected = {name: FACET_DIMENSIONS[name] for name in names}
+
+    params = request.GET.copy()
+    params.pop('facets', None)
+    counts = facet_counts(params, selected)
+
+    data = {
+        name: [{"label": valor, "value": valor, "count": count} for valor, count in values]
+        for name, values in counts.items()
+    }
+    return Response(data)
+
+
+# Campos básicos que devuelve contracts_list (se proyectan con values() para no cargar los TextField)
+CONTRACTS_LIST_FIELDS = (
+    'id',
+    'numero_contrato',
+    'rubro',
+    'nombre_contratista',
+    'anio_paa',
+    'valor_total_final_contrato',
+    'adjudicado',
+    'grupo',
+    'subgrupo',
+    'area_pertenece',
+    'tipo_proceso',
+    'sistema_publicacion',
+    'impacto',
+)
+CONTRACTS_LIST_MAX_LIMIT = 1000
+
+
+def _contract_list_row(row):
+    """
+    Convierte una fila de values() al formato de contracts_list.
+    """
+    row['valor_total_final_contrato'] = float(row['valor_total_final_contrato'] or 0)
+    return row
+
+
+def _positive_int_param(request, name, maximum=None, minimum=1):
+    """
+    Lee un parámetro entero opcional (por defecto mayor que cero), lanzando ValidationError (400)
+    si es inválido o menor que `minimum`.
+    """
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: 'Debe ser un número entero.'})
+    if value < minimum:
+        raise ValidationError({name: f'Debe ser un número mayor o igual a {minimum}.'})
+    return min(value, maximum) if maximum else value
+
+
+def _contracts_full_list(qs):
+    """
+    Retorna la lista completa (sin paginar) de contratos proyectados con CONTRACTS_LIST_FIELDS.
+    """
+    return [_contract_list_row(row) for row in qs.iterator(chunk_size=2000)]
 
 
 @api_view(['GET'])
@@ -403,65 +529,124 @@ def estados_stats(request):
 def contracts_list(request):
     """
     Retorna una lista de contratos con campos básicos, aplicando filtros.
+
+    - Paginación por llave (keyset) sobre `id`: `limit=N` y `after=<último id recibido>`. En ese caso la respuesta es
+      {'results': [...], 'next_after': id o None, 'has_more': bool}.
+    - `stream=ndjson`: escribe una fila JSON por línea a medida que recorre el cursor, con memoria constante.
+    - Sin esos parámetros retorna la lista completa, como antes.
     """
-    qs = Contract.objects.all()
-
-    # Mismos filtros que en kpis_full_summary
-    anio = request.GET.get('anio')
-    rubro = request.GET.get('rubro')
-    contratista = request.GET.get('contratista')
-    fecha_inicio_desde = request.GET.get('fecha_inicio_desde')
-    fecha_inicio_hasta = request.GET.get('fecha_inicio_hasta')
-    grupo = request.GET.get('grupo')
-    subgrupo = request.GET.get('subgrupo')
-    area = request.GET.get('area')
-    tipo_proceso = request.GET.get('tipo_proceso')
-    sistema_pub = request.GET.get('sistema_publicacion')
-    impacto = request.GET.get('impacto')
-    supervisor = request.GET.get('supervisor')
-
-    if anio:
-        qs = qs.filter(anio_paa=anio)
-    if rubro:
-        qs = qs.filter(rubro__icontains=rubro)
-    if contratista:
-        qs = qs.filter(nombre_contratista__icontains=contratista)
-    if fecha_inicio_desde:
-        qs = qs.filter(fecha_inicio_ejecucion__gte=fecha_inicio_desde)
-    if fecha_inicio_hasta:
-        qs = qs.filter(fecha_inicio_ejecucion__lte=fecha_inicio_hasta)
-    if grupo:
-        qs = qs.filter(grupo__icontains=grupo)
-    if subgrupo:
-        qs = qs.filter(subgrupo__icontains=subgrupo)
-    if area:
-        qs = qs.filter(area_pertenece__icontains=area)
-    if tipo_proceso:
-        qs = qs.filter(tipo_proceso__icontains=tipo_proceso)
-    if sistema_pub:
-        qs = qs.filter(sistema_publicacion__icontains=sistema_pub)
-    if impacto:
-        qs = qs.filter(impacto__icontains=impacto)
-    if supervisor:
-        qs = qs.filter(supervisor_contrato__icontains=supervisor)
-
-    # devolver campos básicos
-    data = []
-    for c in qs:
-        data.append({
-            'id': c.id,
-            'numero_contrato': c.numero_contrato,
-            'rubro': c.rubro,
-            'nombre_contratista': c.nombre_contratista,
-            'anio_paa': c.anio_paa,
-            'valor_total_final_contrato': float(c.valor_total_final_contrato or 0),
-            'adjudicado': c.adjudicado,
-            'grupo': c.grupo,
-            'subgrupo': c.subgrupo,
-            'area_pertenece': c.area_pertenece,
-            'tipo_proceso': c.tipo_proceso,
-            'sistema_publicacion': c.sistema_publicacion,
-            'impacto': c.impacto,
-        })
+    qs = filter_contracts(request.GET).qs.values(*CONTRACTS_LIST_FIELDS).order_by('id')
+
+    after = _positive_int_param(request, 'after', minimum=0)
+    limit = _positive_int_param(request, 'limit', maximum=CONTRACTS_LIST_MAX_LIMIT)
+    if after is not None:
+        qs = qs.filter(id__gt=after)
+
+    if request.GET.get('stream') == 'ndjson':
+        if limit is not None:
+            qs = qs[:limit]
+        rows = (json.dumps(_contract_list_row(row), cls=DjangoJSONEncoder) + '\n'
+                for row in qs.iterator(chunk_size=2000))
+        return StreamingHttpResponse(rows, content_type='application/x-ndjson')
+
+    if limit is None and after is None:
+        return Response(_contracts_full_list(qs))
+
+    if limit is None:
+        limit = CONTRACTS_LIST_MAX_LIMIT
+    rows = [_contract_list_row(row) for row in qs[:limit + 1]]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return Response({
+        'results': rows,
+        'next_after': rows[-1]['id'] if has_more else None,
+        'has_more': has_more,
+    })
+
+
+CONTRACTS_SEARCH_PAGE_SIZE = 20
+CONTRACTS_SEARCH_MAX_PAGE_SIZE = 100
 
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def contracts_search(request):
+    """
+    Búsqueda de texto completo en objeto, detalle, descripción del rubro y observaciones, ordenada por relevancia.
+
+    - `q`: texto a buscar; cada palabra se busca como prefijo y sin distinguir tildes ni mayúsculas.
+    - `page` y `page_size` (máximo 100): paginación de los resultados.
+    - Acepta los mismos filtros que los demás endpoints (anio, rubro, supervisor, etc.).
+    """
+    text = request.GET.get('q', '').strip()
+    if not text:
+        raise ValidationError({'q': 'Este parámetro es obligatorio.'})
+
+    page = _positive_int_param(request, 'page') or 1
+    page_size = _positive_int_param(request, 'page_size', maximum=CONTRACTS_SEARCH_MAX_PAGE_SIZE) \
+        or CONTRACTS_SEARCH_PAGE_SIZE
+
+    filterset = filter_contracts(request.GET)
+    queryset = filterset.qs if filterset.applied else None
+    total, matches = search_contracts(text, queryset, offset=(page - 1) * page_size, limit=page_size)
+
+    rows = {
+        row['id']: row
+        for row in Contract.objects.filter(id__in=[contract_id for contract_id, _ in matches])
+        .values(*CONTRACTS_LIST_FIELDS, 'objeto')
+    }
+    results = []
+    for contract_id, rank in matches:
+        row = rows.get(contract_id)
+        if row is None:
+            continue  # eliminado entre la búsqueda en el índice y la lectura de los datos
+        row = _contract_list_row(row)
+        row['rank'] = rank
+        results.append(row)
+
+    return Response({
+        'count': total,
+        'page': page,
+        'page_size': page_size,
+        'results': results,
+    })
+
+
+# Secciones de dashboard_bundle: nombre -> función (request, filterset) que calcula sus datos
+DASHBOARD_SECTIONS = {
+    'kpis': lambda request, filterset: _kpis_summary(request, filterset),
+    'adiciones': lambda request, filterset: _adiciones_stats(filterset),
+    'supervisores': lambda request, filterset: _supervisores_stats(filterset),
+    'sistemas': lambda request, filterset: _sistemas_info_stats(filterset),
+    'estados': lambda request, filterset: _estados_stats(filterset),
+    'filtros': lambda request, filterset: get_or_set_by_data_version(request, 'filters_options', _filters_options),
+    'contratos': lambda request, filterset: _contracts_full_list(
+        filterset.qs.values(*CONTRACTS_LIST_FIELDS).order_by('id')
+    ),
+}
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def dashboard_bundle(request):
+    """
+    Retorna en una sola respuesta los datos del tablero de contratos, equivalentes a kpis-full-summary (kpis),
+    adiciones-stats (adiciones), supervisores-stats (supervisores), sistemas-info-stats (sistemas),
+    estados-stats (estados), filters-options (filtros) y contracts-list (contratos).
+    Los filtros se validan una sola vez y, si son costosos (LIKE) y más de una sección consulta la tabla
+    de contratos, también se evalúan una sola vez: todas filtran por los ids ya obtenidos (ContractFilter.materialize).
+    Con `sections=kpis,estados` se limita la respuesta a esas secciones.
+    """
+    selected = list(DASHBOARD_SECTIONS)
+    if request.GET.get('sections'):
+        selected = [name.strip() for name in request.GET['sections'].split(',') if name.strip()]
+        unknown = [name for name in selected if name not in DASHBOARD_SECTIONS]
+        if unknown:
+            raise ValidationError({'sections': f"Secciones desconocidas: {', '.join(unknown)}"})
+
+    filterset = filter_contracts(request.GET)
+    # Todas las secciones salvo `filtros` leen la tabla de contratos (kpis, al menos para el top de contratistas)
+    if len(set(selected) - {'filtros'}) > 1:
+        filterset.materialize()
+    data = {name: DASHBOARD_SECTIONS[name](request, filterset) for name in selected}
     return Response(data)
@@ -0,0 +1,33 @@
+import re
+
+# Descripción General del Código:
+
+# Este código reúne las utilidades compartidas por las búsquedas de texto completo (FTS5 de SQLite)
+# de contratos (contracts/search.py) y de tareas (tasks/search.py).
+
+# Funciones:
+
+# - search_words(text): separa el texto del usuario en palabras; también lo usan las búsquedas sin
+#   índice (`icontains`) de los motores sin FTS5.
+# - build_match_query(text): convierte el texto del usuario en una expresión MATCH segura.
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_words(text):
+    """
+    Retorna las palabras de `text` (letras, números y guion bajo), sin operadores ni signos.
+    """
+    return WORD_RE.findall(text or '')
+
+
+def build_match_query(text):
+    """
+    Convierte el texto del usuario en una expresión MATCH de FTS5: cada palabra entre comillas y como prefijo,
+    de modo que los operadores y caracteres especiales escritos por el usuario no rompan la consulta.
+    Retorna None si el texto no tiene palabras.
+    """
+    words = search_words(text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
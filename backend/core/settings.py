@@ -113,6 +113,12 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Canal de eventos en vivo del dashboard (api/dashboard/live/). Solo funciona servido con ASGI y un único
+# proceso (p. ej. `uvicorn core.asgi:application --workers 1`), porque el broker de eventos vive en memoria;
+# bajo WSGI o runserver la respuesta no se transmite y cada pestaña abierta ocupa un hilo. Deshabilitado,
+# el frontend no abre el canal y sigue consultando los datos periódicamente.
+LIVE_EVENTS_ENABLED = False
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://localhost:8000",
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from tasks.views import TaskViewSet, StrategicLineViewSet
 from users.views import UserViewSet
 from dashboard.views import DashboardViewSet
+from dashboard.live import live_events, live_ticket
 from maintenance.views import (
     MaintenanceSubGroupViewSet, 
     MaintenanceItemViewSet,
@@ -23,6 +24,8 @@ router.register(r'strategic-lines', StrategicLineViewSet, basename='strategic-li
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/dashboard/live/', live_events, name='dashboard-live'),
+    path('api/dashboard/live/ticket/', live_ticket, name='dashboard-live-ticket'),
     path('api/', include(router.urls)),
     path('api/auth/', include('djoser.urls')),
     path('api/auth/', include('djoser.urls.jwt')),
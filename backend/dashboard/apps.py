@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        # Registra las señales que publican los cambios de datos en el canal de eventos del dashboard
+        from . import signals  # noqa: F401
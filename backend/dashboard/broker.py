@@ -0,0 +1,121 @@
+import asyncio
+import threading
+from django.db import transaction
+
+# Descripción General del Código:
+
+# Este código implementa el broker en proceso que reparte los eventos de cambios de datos (tareas, contratos
+# y cronogramas de mantenimiento) a los clientes conectados al canal de eventos del dashboard (Server-Sent Events).
+
+# Funcionalidades Principales:
+
+# 1. Suscripciones (EventBroker.subscribe / unsubscribe):
+#    - Cada conexión SSE se suscribe con su propio event loop y una cola asyncio acotada.
+#    - Si un cliente no consume sus eventos y la cola se llena, se vacía y se le envía un único evento
+#      `resync`, para que vuelva a consultar los datos en lugar de acumular memoria.
+
+# 2. Publicación (EventBroker.publish / publish_on_commit):
+#    - `publish` se puede llamar desde código síncrono en cualquier hilo (señales, vistas de DRF): entrega el
+#      evento a cada suscriptor con `call_soon_threadsafe`.
+#    - `publish_on_commit` publica al confirmarse la transacción, de modo que una transacción revertida no notifica nada.
+#    - `merge_events` combina los eventos acumulados de una conexión en uno por tipo antes de enviarlos.
+
+# El broker vive en la memoria del proceso: con varios procesos de servidor cada uno reparte solo los
+# cambios hechos en él (los comandos de importación, que corren en otro proceso, no generan eventos).
+
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """
+    Cola de eventos de una conexión, ligada al event loop en el que se creó.
+    """
+    def __init__(self, loop, maxsize=QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'resync'})
+
+    async def get(self, timeout=None):
+        """
+        Espera el siguiente evento; retorna None si pasan `timeout` segundos sin eventos.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """
+    Broker de publicación/suscripción en memoria para los eventos de cambios.
+    """
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """
+        Registra una suscripción en el event loop actual (debe llamarse desde código asíncrono).
+        """
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    def publish(self, event):
+        """
+        Entrega `event` a todas las suscripciones; es seguro llamarlo desde cualquier hilo.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # El event loop de la conexión ya se cerró
+                self.unsubscribe(subscription)
+
+    def publish_on_commit(self, kind, changed=(), deleted=()):
+        """
+        Publica los ids cambiados y eliminados de `kind` cuando se confirme la transacción actual.
+        """
+        if not self._subscriptions:
+            return
+        event = {'type': kind, 'changed': sorted(set(changed)), 'deleted': sorted(set(deleted))}
+        transaction.on_commit(lambda: self.publish(event))
+
+
+def merge_events(events):
+    """
+    Combina los eventos pendientes de una conexión en uno por tipo (un `resync` reemplaza a todos).
+    """
+    merged = {}
+    for event in events:
+        if event['type'] == 'resync':
+            return [event]
+        current = merged.setdefault(event['type'], {'changed': set(), 'deleted': set()})
+        current['changed'].update(event['changed'])
+        current['changed'].difference_update(event['deleted'])
+        current['deleted'].update(event['deleted'])
+    return [
+        {'type': kind, 'changed': sorted(ids['changed']), 'deleted': sorted(ids['deleted'])}
+        for kind, ids in merged.items()
+    ]
+
+
+broker = EventBroker()
@@ -0,0 +1,80 @@
+import hashlib
+from functools import wraps
+from django.core.cache import cache
+from rest_framework.response import Response
+from tasks.models import TaskDataVersion
+
+# Descripción General del Código:
+
+# Este código implementa la caché compartida de las respuestas de DashboardViewSet. Todas las personas que
+# consultan el dashboard (por ejemplo, durante el comité semanal) reciben el mismo agregado calculado una sola vez.
+
+# Funcionalidades Principales:
+
+# 1. Caché por versión de datos de tareas (cache_dashboard_action):
+#    - Guarda `response.data` con una clave formada por la acción, TaskDataVersion y los parámetros de la petición.
+#    - Las señales de tasks/signals.py incrementan la versión al guardar o eliminar tareas o actualizaciones
+#      de tareas y al cambiar sus líderes o su equipo de apoyo, de modo que las entradas anteriores dejan de usarse.
+#    - Las entradas expiran además a los CACHE_TIMEOUT segundos, porque algunas métricas dependen de la fecha actual
+#      (vencidas, últimos 30 días).
+
+# 2. Contadores de aciertos y fallos (cache_stats):
+#    - Cada acción lleva en la caché sus contadores `hits` y `misses`; con la caché en memoria por defecto
+#      son contadores por proceso.
+
+CACHE_TIMEOUT = 60 * 5
+STATS_KEY = 'dashboard:stats:{action}:{kind}'
+
+
+def _request_signature(request):
+    """
+    Resume los parámetros de la petición (sin importar su orden) en un hash corto.
+    """
+    params = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+    return hashlib.md5(repr(params).encode('utf-8')).hexdigest()
+
+
+def _count(action, kind):
+    key = STATS_KEY.format(action=action, kind=kind)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La entrada se eliminó entre add e incr (p. ej. al vaciar la caché)
+        cache.set(key, 1, None)
+
+
+def cache_stats(actions):
+    """
+    Retorna {acción: {'hits': n, 'misses': n}} para las acciones indicadas.
+    """
+    keys = {
+        (action, kind): STATS_KEY.format(action=action, kind=kind)
+        for action in actions for kind in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    return {
+        action: {kind: values.get(keys[(action, kind)], 0) for kind in ('hits', 'misses')}
+        for action in actions
+    }
+
+
+def cache_dashboard_action(view_func):
+    """
+    Decorador (interno a @action) que guarda los datos de la respuesta en caché por versión de datos de tareas.
+    """
+    @wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        action = view_func.__name__
+        key = f"dashboard:{action}:{TaskDataVersion.current()}:{_request_signature(request)}"
+        data = cache.get(key)
+        if data is not None:
+            _count(action, 'hits')
+            return Response(data, headers={'X-Cache': 'HIT'})
+        _count(action, 'misses')
+        response = view_func(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .broker import broker, merge_events
+
+# Descripción General del Código:
+
+# Este código implementa el canal de eventos en vivo del dashboard (`api/dashboard/live/`) con Server-Sent Events.
+# En lugar de consultar periódicamente, el frontend abre un EventSource y recibe un evento compacto por cada
+# tipo de dato que cambió, por ejemplo:
+#
+#     event: tasks
+#     data: {"type": "tasks", "changed": [12, 15], "deleted": [3]}
+#
+# Tipos: `tasks`, `contracts` y `maintenance` (ver dashboard/signals.py) y `resync`, que indica que se
+# perdieron eventos y hay que volver a consultar todo.
+
+# Funcionalidades Principales:
+
+# 1. Autenticación:
+#    - Acepta el token JWT en el encabezado Authorization o, como EventSource no permite encabezados,
+#      un ticket en el parámetro `?ticket=`. El ticket lo emite `api/dashboard/live/ticket/` (autenticado con
+#      el JWT), está firmado con SECRET_KEY y vence a los TICKET_MAX_AGE segundos, así que el JWT nunca viaja
+#      en la URL ni queda en los registros del servidor o de los proxies.
+#    - El frontend pide un ticket nuevo cada vez que abre o reabre la conexión.
+
+# 2. Flujo de eventos:
+#    - Se suscribe al broker en proceso y, tras recibir un evento, espera COALESCE_DELAY segundos para
+#      combinar en uno por tipo los que lleguen juntos (p. ej. al guardar una tarea y su historial).
+#    - Envía un comentario de keepalive cada HEARTBEAT_INTERVAL segundos para que los proxies no cierren la conexión.
+
+# 3. Habilitación:
+#    - Requiere un servidor ASGI (por ejemplo `uvicorn core.asgi:application`); bajo WSGI la respuesta no se
+#      entrega de forma incremental. Por eso está deshabilitado salvo que `LIVE_EVENTS_ENABLED` sea True en
+#      settings; mientras tanto el canal y la emisión de tickets responden 404 y el frontend sigue consultando
+#      periódicamente.
+
+DISABLED_DETAIL = 'El canal de eventos en vivo está deshabilitado.'
+
+HEARTBEAT_INTERVAL = 15
+COALESCE_DELAY = 0.5
+RETRY_MS = 5000
+TICKET_SALT = 'dashboard.live.ticket'
+TICKET_MAX_AGE = 60
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def live_ticket(request):
+    """
+    Emite un ticket de corta duración para abrir el canal en vivo con `?ticket=`.
+    """
+    if not settings.LIVE_EVENTS_ENABLED:
+        return Response({'detail': DISABLED_DETAIL}, status=404)
+    return Response({
+        'ticket': signing.dumps(request.user.pk, salt=TICKET_SALT),
+        'expires_in': TICKET_MAX_AGE,
+    })
+
+
+def _user_from_ticket(ticket):
+    """
+    Retorna el usuario activo del ticket, o None si la firma no es válida o el ticket venció.
+    """
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+
+def _authenticate(request):
+    """
+    Retorna el usuario del token JWT del encabezado o del parámetro `ticket`, o None si no es válido.
+    """
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    if result is not None:
+        return result[0]
+    if request.GET.get('ticket'):
+        return _user_from_ticket(request.GET['ticket'])
+    return None
+
+
+def _format(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream():
+    subscription = broker.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            event = await subscription.get(timeout=HEARTBEAT_INTERVAL)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            await asyncio.sleep(COALESCE_DELAY)
+            events = [event]
+            while not subscription.queue.empty():
+                events.append(subscription.queue.get_nowait())
+            for merged in merge_events(events):
+                yield _format(merged)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def live_events(request):
+    """
+    Canal Server-Sent Events con los cambios de tareas, contratos y cronogramas de mantenimiento.
+    """
+    if not settings.LIVE_EVENTS_ENABLED:
+        return JsonResponse({'detail': DISABLED_DETAIL}, status=404)
+    user = await sync_to_async(_authenticate)(request)
+    if user is None or not user.is_authenticated:
+        return JsonResponse({'detail': 'Las credenciales de autenticación no se proveyeron o no son válidas.'}, status=401)
+    response = StreamingHttpResponse(_event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
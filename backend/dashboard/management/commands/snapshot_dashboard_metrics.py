@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from dashboard.models import DashboardMetrics
+
+# Descripción General del Código:
+
+# Este comando guarda el snapshot diario de las métricas del dashboard (DashboardMetrics y sus desgloses
+# por línea estratégica y área). Está pensado para ejecutarse una vez al día desde el programador del
+# servidor, por ejemplo con cron:
+#
+#     5 0 * * * cd /ruta/al/backend && python manage.py snapshot_dashboard_metrics
+#
+# Si se ejecuta varias veces el mismo día, el snapshot de ese día se reemplaza con los valores actuales.
+
+
+class Command(BaseCommand):
+    help = 'Guarda el snapshot diario de las métricas del dashboard'
+
+    def handle(self, *args, **options):
+        metrics = DashboardMetrics.take_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot del {metrics.date} guardado: {metrics.total_tasks} tareas, "
+            f"{metrics.completed_tasks} cumplidas, {metrics.overdue_tasks} vencidas "
+            f"({metrics.breakdowns.count()} desgloses)."
+        ))
@@ -0,0 +1,53 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remove_legacy_metrics(apps, schema_editor):
+    # La fila única anterior (pk=1) no tiene fecha y sus conteos por estado nunca coincidían con
+    # los estados reales de las tareas; el primer snapshot la reemplaza.
+    apps.get_model('dashboard', 'DashboardMetrics').objects.filter(date__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dashboardmetrics',
+            options={'ordering': ['date'], 'verbose_name': 'Métricas del dashboard', 'verbose_name_plural': 'Métricas del dashboard'},
+        ),
+        migrations.AddField(
+            model_name='dashboardmetrics',
+            name='date',
+            field=models.DateField(null=True, verbose_name='Fecha'),
+        ),
+        migrations.RunPython(remove_legacy_metrics, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='dashboardmetrics',
+            name='date',
+            field=models.DateField(unique=True, verbose_name='Fecha'),
+        ),
+        migrations.CreateModel(
+            name='DashboardMetricsBreakdown',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('strategic_line', 'Línea estratégica'), ('area', 'Área')], max_length=20, verbose_name='Dimensión')),
+                ('name', models.CharField(max_length=200, verbose_name='Nombre')),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('pending_tasks', models.IntegerField(default=0)),
+                ('in_progress_tasks', models.IntegerField(default=0)),
+                ('completed_tasks', models.IntegerField(default=0)),
+                ('overdue_tasks', models.IntegerField(default=0)),
+                ('metrics', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='breakdowns', to='dashboard.dashboardmetrics', verbose_name='Snapshot')),
+            ],
+            options={
+                'verbose_name': 'Desglose de métricas',
+                'verbose_name_plural': 'Desgloses de métricas',
+                'indexes': [models.Index(fields=['dimension', 'name'], name='metrics_breakdown_name_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metrics', 'dimension', 'name'), name='metrics_breakdown_unique')],
+            },
+        ),
+    ]
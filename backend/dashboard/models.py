@@ -1,40 +1,51 @@
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Count, Q
 from django.utils import timezone
 from tasks.models import Task
 
 # Descripción General del Código:
 
-# Este código define un modelo de Django llamado DashboardMetrics que almacena métricas agregadas
-# relacionadas con el estado de las tareas. Incluye campos para el total de tareas, tareas pendientes,
-# tareas en progreso, tareas completadas y tareas vencidas. También proporciona un método para actualizar
-# estas métricas automáticamente.
+# Este código define el modelo DashboardMetrics, una serie de tiempo con una fila (snapshot) por día
+# con los conteos de tareas por estado y las vencidas, y el modelo DashboardMetricsBreakdown con los
+# mismos conteos desglosados por línea estratégica y por área. Las tendencias del dashboard se leen de
+# estos snapshots, sin recorrer de nuevo toda la tabla de tareas.
 
 # Funcionalidades Principales:
 
 # 1. Definición del Modelo de Datos:
-#    - Define la estructura de la tabla DashboardMetrics en la base de datos, especificando los campos,
-#      tipos de datos y valores por defecto.
+#    - DashboardMetrics: un snapshot por fecha (`date` es única) con el total de tareas, pendientes,
+#      en proceso, cumplidas y vencidas.
+#    - DashboardMetricsBreakdown: los conteos del snapshot para cada línea estratégica y cada área.
 
-# 2. Actualización Automática de Métricas (método update_metrics):
-#    - Proporciona un método de clase para calcular y actualizar las métricas del dashboard
-#      en función del estado actual de las tareas.
-#    - Utiliza consultas a la base de datos para contar las tareas en diferentes estados.
-#    - Guarda las métricas actualizadas en la base de datos.
+# 2. Toma de Snapshots (método take_snapshot):
+#    - Calcula todos los conteos con una sola consulta de agregados condicionales agrupada por
+#      línea estratégica y área; el total y los desgloses se suman en Python a partir de esas filas.
+#    - Crea o reemplaza el snapshot del día. Lo ejecuta el comando `snapshot_dashboard_metrics`,
+#      pensado para programarse una vez al día (cron o el programador de tareas del servidor).
 
 # Clases:
 
-# - DashboardMetrics: Modelo Django que define la estructura de la tabla DashboardMetrics en la base de datos.
+# - DashboardMetrics: Modelo Django con un snapshot diario de las métricas de tareas.
+# - DashboardMetricsBreakdown: Modelo Django con el desglose de un snapshot por línea estratégica o área.
 
 # Métodos de la Clase DashboardMetrics:
 
+# - take_snapshot(cls, date=None):
+#   - Método de clase que calcula y guarda el snapshot del día indicado (por defecto, hoy).
 # - update_metrics(cls):
-#   - Método de clase para calcular y actualizar las métricas del dashboard.
+#   - Se mantiene por compatibilidad; equivale a take_snapshot().
+
+# Campos de conteo comunes al snapshot y a sus desgloses
+COUNT_FIELDS = ['total_tasks', 'pending_tasks', 'in_progress_tasks', 'completed_tasks', 'overdue_tasks']
+NO_AREA = 'Sin área'
+NO_STRATEGIC_LINE = 'Sin línea estratégica'
+
 
 class DashboardMetrics(models.Model):
     """
-    Define el modelo de datos para las métricas del dashboard, especificando los campos y sus tipos.
+    Snapshot diario de las métricas del dashboard: conteos de tareas por estado y vencidas en una fecha.
     """
+    date = models.DateField(unique=True, verbose_name='Fecha')
     total_tasks = models.IntegerField(default=0)
     pending_tasks = models.IntegerField(default=0)
     in_progress_tasks = models.IntegerField(default=0)
@@ -42,22 +53,99 @@ class DashboardMetrics(models.Model):
     overdue_tasks = models.IntegerField(default=0)
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        verbose_name = 'Métricas del dashboard'
+        verbose_name_plural = 'Métricas del dashboard'
+        ordering = ['date']
+
+    def __str__(self):
+        return f"Métricas del {self.date}"
+
+    @staticmethod
+    def _count_rows(now):
+        """
+        Ejecuta la única consulta del snapshot: conteos por estado y vencidas agrupados por línea estratégica y área.
+        """
+        return Task.objects.values('strategic_line__name', 'area__name').annotate(
+            total_tasks=Count('id'),
+            pending_tasks=Count('id', filter=Q(status='Pendiente')),
+            in_progress_tasks=Count('id', filter=Q(status='En proceso')),
+            completed_tasks=Count('id', filter=Q(status=Task.COMPLETED_STATUS)),
+            overdue_tasks=Count('id', filter=Q(due_date__lt=now) & ~Q(status=Task.COMPLETED_STATUS)),
+        ).order_by()
+
+    @classmethod
+    def take_snapshot(cls, date=None):
+        """
+        Calcula las métricas actuales de las tareas y las guarda como el snapshot de `date` (por defecto, hoy),
+        reemplazando el snapshot de ese día si ya existía.
+        """
+        now = timezone.now()
+        date = date or timezone.localdate(now)
+
+        totals = dict.fromkeys(COUNT_FIELDS, 0)
+        breakdowns = {}
+        for row in cls._count_rows(now):
+            groups = [
+                ('strategic_line', row['strategic_line__name'] or NO_STRATEGIC_LINE),
+                ('area', row['area__name'] or NO_AREA),
+            ]
+            for field in COUNT_FIELDS:
+                totals[field] += row[field]
+            for key in groups:
+                counts = breakdowns.setdefault(key, dict.fromkeys(COUNT_FIELDS, 0))
+                for field in COUNT_FIELDS:
+                    counts[field] += row[field]
+
+        with transaction.atomic():
+            metrics, _ = cls.objects.update_or_create(date=date, defaults=totals)
+            metrics.breakdowns.all().delete()
+            DashboardMetricsBreakdown.objects.bulk_create([
+                DashboardMetricsBreakdown(metrics=metrics, dimension=dimension, name=name, **counts)
+                for (dimension, name), counts in sorted(breakdowns.items())
+            ])
+        return metrics
+
     @classmethod
     def update_metrics(cls):
         """
         Método de clase que calcula y actualiza las métricas del dashboard en función del estado actual de las tareas.
         """
-        now = timezone.now()
-        metrics, _ = cls.objects.get_or_create(pk=1)
-        
-        metrics.total_tasks = Task.objects.count()
-        metrics.pending_tasks = Task.objects.filter(status='pending').count()
-        metrics.in_progress_tasks = Task.objects.filter(status='in_progress').count()
-        metrics.completed_tasks = Task.objects.filter(status='completed').count()
-        metrics.overdue_tasks = Task.objects.filter(
-            Q(status__in=['pending', 'in_progress']),
-            due_date__lt=now
-        ).count()
-        
-        metrics.save()
-        return metrics
\ No newline at end of file
+        return cls.take_snapshot()
+
+
+class DashboardMetricsBreakdown(models.Model):
+    """
+    Conteos de un snapshot de DashboardMetrics para una línea estratégica o un área.
+    """
+    DIMENSION_CHOICES = [
+        ('strategic_line', 'Línea estratégica'),
+        ('area', 'Área'),
+    ]
+
+    metrics = models.ForeignKey(
+        DashboardMetrics,
+        on_delete=models.CASCADE,
+        related_name='breakdowns',
+        verbose_name='Snapshot'
+    )
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES, verbose_name='Dimensión')
+    name = models.CharField(max_length=200, verbose_name='Nombre')
+    total_tasks = models.IntegerField(default=0)
+    pending_tasks = models.IntegerField(default=0)
+    in_progress_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+    overdue_tasks = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Desglose de métricas'
+        verbose_name_plural = 'Desgloses de métricas'
+        constraints = [
+            models.UniqueConstraint(fields=['metrics', 'dimension', 'name'], name='metrics_breakdown_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['dimension', 'name'], name='metrics_breakdown_name_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_dimension_display()} {self.name} - {self.metrics.date}"
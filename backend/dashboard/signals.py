@@ -0,0 +1,84 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from contracts.models import Contract
+from maintenance.models import MaintenanceSchedule
+from tasks.models import Task, TaskUpdate
+from tasks.signals import tasks_bulk_updated
+from .broker import broker
+
+# Descripción General del Código:
+
+# Este código publica en el broker del dashboard (dashboard/broker.py) un evento compacto cada vez que
+# cambian tareas, contratos o cronogramas de mantenimiento, para que los clientes conectados al canal
+# `api/dashboard/live/` actualicen solo lo necesario en lugar de consultar periódicamente.
+
+# Eventos (tipo: ids):
+# - tasks: tareas creadas, modificadas o eliminadas, con nuevas actualizaciones (TaskUpdate),
+#   con cambios de líderes o equipo de apoyo, o modificadas con la acción `bulk_update`.
+# - contracts: contratos creados, modificados o eliminados.
+# - maintenance: cronogramas de mantenimiento creados, modificados o eliminados.
+
+EVENT_TYPES = {
+    Task: 'tasks',
+    Contract: 'contracts',
+    MaintenanceSchedule: 'maintenance',
+}
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Contract)
+@receiver(post_save, sender=MaintenanceSchedule)
+def publish_saved(sender, instance, raw=False, **kwargs):
+    """
+    Publica el id del objeto guardado.
+    """
+    if raw:
+        return
+    broker.publish_on_commit(EVENT_TYPES[sender], changed=[instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Contract)
+@receiver(post_delete, sender=MaintenanceSchedule)
+def publish_deleted(sender, instance, **kwargs):
+    """
+    Publica el id del objeto eliminado.
+    """
+    broker.publish_on_commit(EVENT_TYPES[sender], deleted=[instance.pk])
+
+
+@receiver(post_save, sender=TaskUpdate)
+@receiver(post_delete, sender=TaskUpdate)
+def publish_task_update(sender, instance, raw=False, **kwargs):
+    """
+    Publica la tarea a la que se agregó o de la que se eliminó una actualización.
+    """
+    if raw:
+        return
+    broker.publish_on_commit('tasks', changed=[instance.task_id])
+
+
+@receiver(m2m_changed, sender=Task.leaders.through)
+@receiver(m2m_changed, sender=Task.support_team.through)
+def publish_task_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Publica las tareas cuyos líderes o equipo de apoyo cambiaron.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        task_ids = [instance.pk]
+    elif action == 'post_clear':
+        # tasks/signals.py guarda en pre_clear las tareas del líder antes de borrarlas
+        task_ids = getattr(instance, '_cleared_task_ids', [])
+    else:
+        task_ids = pk_set or []
+    broker.publish_on_commit('tasks', changed=task_ids)
+
+
+@receiver(tasks_bulk_updated)
+def publish_tasks_bulk_update(sender, task_ids, **kwargs):
+    """
+    Publica las tareas modificadas con la acción `bulk_update`, que no dispara post_save.
+    """
+    broker.publish_on_commit('tasks', changed=task_ids)
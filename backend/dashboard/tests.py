@@ -0,0 +1,308 @@
+import asyncio
+import io
+import time
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from tasks.models import Task, Leader, Area, StrategicLine
+from users.models import User
+from .broker import broker, merge_events
+from .live import TICKET_MAX_AGE, TICKET_SALT, _authenticate
+from .models import DashboardMetrics, NO_AREA
+
+# Descripción General del Código:
+
+# Pruebas del dashboard de tareas.
+
+# 1. Analítica de tareas (task_analytics):
+#    - byLeader agrupa por líder (id), no por nombre, y el tiempo medio de resolución sale de `completed_at`.
+
+# 2. Snapshots diarios (snapshot_dashboard_metrics):
+#    - El total y los desgloses por línea estratégica y área coinciden con contar las tareas directamente,
+#      se calculan con una sola consulta de lectura y volver a ejecutar el comando reemplaza el snapshot del día.
+
+# 3. Caché compartida (cache_dashboard_action):
+#    - La segunda petición igual se responde desde la caché (X-Cache: HIT) sin consultar las tareas; guardar una
+#      tarea incrementa TaskDataVersion y la siguiente petición se recalcula. cache_stats cuenta aciertos y fallos.
+
+# 4. Autenticación del canal en vivo:
+#    - `live/ticket/` exige sesión y emite un ticket que abre el canal; los tickets vencidos o alterados y el JWT
+#      en la URL (`?token=`) se rechazan.
+#    - Sin `LIVE_EVENTS_ENABLED` (valor por defecto, servidores WSGI) el canal y los tickets responden 404.
+
+# 5. Eventos en vivo (broker):
+#    - Guardar una tarea dentro de una transacción entrega al suscriptor un único evento `tasks` combinado
+#      al confirmarse; una transacción revertida no publica nada.
+
+ANALYTICS_URL = '/api/dashboard/task_analytics/'
+
+
+class TaskAnalyticsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_task(self, status='Pendiente', leaders=()):
+        task = Task.objects.create(
+            title='Tarea', assigned_to=self.user, created_by=self.user, status=status,
+            due_date=timezone.now() + timedelta(days=10),
+        )
+        task.leaders.set(leaders)
+        return task
+
+    def test_by_leader_keeps_homonymous_leaders_apart(self):
+        first = Leader.objects.create(name='Ana Gómez')
+        second = Leader.objects.create(name='Ana Gómez')
+        self.create_task(leaders=[first])
+        self.create_task(status='Cumplido', leaders=[first])
+        self.create_task(leaders=[second])
+
+        by_leader = self.client.get(ANALYTICS_URL).json()['byLeader']
+        groups = sorted(by_leader.values(), key=lambda group: group['total'])
+        self.assertEqual([group['name'] for group in groups], ['Ana Gómez', 'Ana Gómez'])
+        self.assertEqual([group['total'] for group in groups], [1, 2])
+        self.assertEqual(groups[1]['Cumplido'], 1)
+
+    def test_task_lists_are_projected(self):
+        leader = Leader.objects.create(name='Ana Gómez')
+        open_task = self.create_task(leaders=[leader])
+        self.create_task(status='Cumplido')
+
+        data = self.client.get(ANALYTICS_URL).json()
+        self.assertEqual(len(data['timeline']), 2)
+        self.assertEqual(set(data['timeline'][0]), {'id', 'title', 'due_date', 'status', 'strategic_line_name'})
+        self.assertEqual([task['id'] for task in data['openTasks']], [open_task.id])
+        self.assertEqual(data['openTasks'][0]['leader_name'], 'Ana Gómez')
+
+    def test_average_resolution_time_uses_completed_at(self):
+        now = timezone.now()
+        for days in (2, 4):
+            task = self.create_task(status='Cumplido')
+            Task.objects.filter(pk=task.pk).update(created_at=now - timedelta(days=days), completed_at=now)
+        self.create_task()
+
+        kpis = self.client.get(ANALYTICS_URL).json()['kpis']
+        self.assertAlmostEqual(kpis['averageResolutionTime'], 3, places=3)
+        self.assertEqual(kpis['averageResolutionTime'], kpis['averageCompletionDays'])
+
+
+class DashboardSnapshotTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+        lines = [StrategicLine.objects.create(name=name) for name in ('Línea A', 'Línea B')]
+        areas = [Area.objects.create(name='Sistemas'), None]
+        now = timezone.now()
+        statuses = ['Pendiente', 'En proceso', 'Cumplido']
+        for i in range(12):
+            Task.objects.create(
+                title=f'Tarea {i}', assigned_to=cls.user, created_by=cls.user, status=statuses[i % 3],
+                strategic_line=lines[i % 2], area=areas[i % 4 == 0],
+                due_date=now + timedelta(days=-5 if i % 5 == 0 else 10),
+            )
+
+    def expected_counts(self, tasks):
+        now = timezone.now()
+        return {
+            'total_tasks': tasks.count(),
+            'pending_tasks': tasks.filter(status='Pendiente').count(),
+            'in_progress_tasks': tasks.filter(status='En proceso').count(),
+            'completed_tasks': tasks.filter(status=Task.COMPLETED_STATUS).count(),
+            'overdue_tasks': tasks.filter(Q(due_date__lt=now) & ~Q(status=Task.COMPLETED_STATUS)).count(),
+        }
+
+    def snapshot_counts(self, row):
+        return {field: getattr(row, field) for field in self.expected_counts(Task.objects.none())}
+
+    def test_snapshot_matches_direct_counts(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('snapshot_dashboard_metrics', stdout=io.StringIO())
+        task_reads = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'tasks_task' in q['sql']]
+        self.assertEqual(len(task_reads), 1)
+
+        metrics = DashboardMetrics.objects.get(date=timezone.localdate())
+        self.assertEqual(self.snapshot_counts(metrics), self.expected_counts(Task.objects.all()))
+
+        breakdowns = {(row.dimension, row.name): self.snapshot_counts(row) for row in metrics.breakdowns.all()}
+        # Solo hay desglose para las líneas y áreas con tareas (las migraciones crean áreas sin tareas)
+        expected = {('area', NO_AREA): self.expected_counts(Task.objects.filter(area__isnull=True))}
+        for line in StrategicLine.objects.filter(tasks__isnull=False).distinct():
+            expected[('strategic_line', line.name)] = self.expected_counts(Task.objects.filter(strategic_line=line))
+        for area in Area.objects.filter(task__isnull=False).distinct():
+            expected[('area', area.name)] = self.expected_counts(Task.objects.filter(area=area))
+        self.assertEqual(breakdowns, expected)
+
+    def test_rerun_replaces_the_day_snapshot(self):
+        call_command('snapshot_dashboard_metrics', stdout=io.StringIO())
+        Task.objects.filter(status='Pendiente').update(status=Task.COMPLETED_STATUS)
+        call_command('snapshot_dashboard_metrics', stdout=io.StringIO())
+
+        metrics = DashboardMetrics.objects.get()
+        self.assertEqual(self.snapshot_counts(metrics), self.expected_counts(Task.objects.all()))
+        self.assertEqual(metrics.pending_tasks, 0)
+        self.assertEqual(metrics.breakdowns.count(), 4)
+        self.assertEqual(
+            sum(row.completed_tasks for row in metrics.breakdowns.filter(dimension='area')), metrics.completed_tasks
+        )
+
+
+class DashboardCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+        cls.task = Task.objects.create(
+            title='Tarea', assigned_to=cls.user, created_by=cls.user, status='Pendiente',
+            due_date=timezone.now() + timedelta(days=10),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(ANALYTICS_URL, params or {})
+        task_queries = sum('tasks_task' in q['sql'] and 'tasks_taskdataversion' not in q['sql'] for q in queries)
+        return response, task_queries
+
+    def test_hit_until_tasks_change(self):
+        first, first_queries = self.get()
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertGreater(first_queries, 0)
+
+        second, second_queries = self.get()
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second_queries, 0)
+        self.assertEqual(second.json(), first.json())
+
+        # Otros parámetros son otra entrada
+        self.assertEqual(self.get({'year': 2024})[0]['X-Cache'], 'MISS')
+
+        self.task.status = Task.COMPLETED_STATUS
+        self.task.save()
+        third, _ = self.get()
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(first.json()['kpis']['completed'], 0)
+        self.assertEqual(third.json()['kpis']['completed'], 1)
+
+        stats = self.client.get('/api/dashboard/cache_stats/').json()
+        self.assertEqual(stats['task_analytics'], {'hits': 1, 'misses': 3})
+        self.assertEqual(stats['user_performance'], {'hits': 0, 'misses': 0})
+
+
+@override_settings(LIVE_EVENTS_ENABLED=True)
+class LiveTicketTest(TestCase):
+    TICKET_URL = '/api/dashboard/live/ticket/'
+    LIVE_URL = '/api/dashboard/live/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+
+    def ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(self.TICKET_URL)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    def authenticate(self, **params):
+        return _authenticate(RequestFactory().get(self.LIVE_URL, params))
+
+    def test_ticket_requires_authentication(self):
+        self.assertEqual(APIClient().post(self.TICKET_URL).status_code, 401)
+
+    def test_ticket_authenticates_the_stream(self):
+        self.assertEqual(self.authenticate(ticket=self.ticket()), self.user)
+
+    def test_expired_or_tampered_ticket_is_rejected(self):
+        ticket = self.ticket()
+        with mock.patch('time.time', return_value=time.time() + TICKET_MAX_AGE + 1):
+            self.assertIsNone(self.authenticate(ticket=ticket))
+        self.assertIsNone(self.authenticate(ticket=ticket[:-1] + ('A' if ticket[-1] != 'A' else 'B')))
+
+    def test_jwt_in_query_string_is_not_accepted(self):
+        self.assertIsNone(self.authenticate(token=str(AccessToken.for_user(self.user))))
+
+    async def test_stream_opens_with_ticket(self):
+        ticket = await sync_to_async(self.ticket)()
+        self.assertEqual((await self.async_client.get(self.LIVE_URL)).status_code, 401)
+        response = await self.async_client.get(self.LIVE_URL, {'ticket': ticket})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+    @override_settings(LIVE_EVENTS_ENABLED=False)
+    async def test_disabled_by_setting(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual((await sync_to_async(client.post)(self.TICKET_URL)).status_code, 404)
+        ticket = signing.dumps(self.user.pk, salt=TICKET_SALT)
+        self.assertEqual((await self.async_client.get(self.LIVE_URL, {'ticket': ticket})).status_code, 404)
+
+
+class BrokerTest(TransactionTestCase):
+    # Transacciones reales: transaction.on_commit solo se ejecuta al confirmar fuera del atomic de TestCase
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='jenny', password='secreta')
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.subscription = self.loop.run_until_complete(self.subscribe())
+        self.addCleanup(broker.unsubscribe, self.subscription)
+
+    async def subscribe(self):
+        return broker.subscribe()
+
+    async def drain(self):
+        """
+        Retorna los eventos que llegaron al suscriptor, ya combinados como los envía el canal en vivo.
+        """
+        events = []
+        while (event := await self.subscription.get(timeout=0.1)) is not None:
+            events.append(event)
+        return merge_events(events)
+
+    def test_committed_task_save_is_published(self):
+        with transaction.atomic():
+            task = Task.objects.create(
+                title='Tarea', assigned_to=self.user, created_by=self.user, status='Pendiente',
+                due_date=timezone.now() + timedelta(days=10),
+            )
+            task.status = 'En proceso'
+            task.save()
+            # Antes de confirmar no se entrega nada
+            self.assertEqual(self.loop.run_until_complete(self.drain()), [])
+
+        events = self.loop.run_until_complete(self.drain())
+        self.assertEqual(events, [{'type': 'tasks', 'changed': [task.id], 'deleted': []}])
+
+    def test_rolled_back_transaction_publishes_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Task.objects.create(
+                    title='Tarea', assigned_to=self.user, created_by=self.user,
+                    due_date=timezone.now() + timedelta(days=10),
+                )
+                raise RuntimeError('rollback')
+
+        self.assertEqual(self.loop.run_until_complete(self.drain()), [])
+        self.assertFalse(Task.objects.exists())
@@ -2,11 +2,13 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q, Avg, F, ExpressionWrapper, fields
+from django.db.models import Count, Q, Avg, F, ExpressionWrapper, OuterRef, Subquery, fields
+from django.db.models.functions import Trunc, TruncMonth
 from django.utils import timezone
-from datetime import timedelta
-from tasks.models import Task
-from .models import DashboardMetrics
+from datetime import date, datetime, time, timedelta
+from tasks.models import Task, Leader
+from .models import DashboardMetrics, DashboardMetricsBreakdown
+from .caching import cache_dashboard_action, cache_stats
 
 # Descripción General del Código:
 
@@ -37,10 +39,11 @@ from .models import DashboardMetrics
 
 # 3. Tendencias de Finalización de Tareas (task_completion_trends):
 #    - Calcula y retorna las tendencias de creación y finalización de tareas en un período de tiempo especificado.
-#    - Permite especificar el número de días a considerar como un parámetro de consulta.
+#    - Permite especificar el número de días y la granularidad (día, semana o mes) como parámetros de consulta.
+#    - Agrupa con Trunc sobre `created_at` y `completed_at` (ambas indexadas) y completa los periodos sin tareas con 0.
 
 # 4. Eficiencia de los Departamentos (department_efficiency):
-#    - Calcula y retorna la eficiencia de los departamentos, mostrando:
+#    - Calcula y retorna la eficiencia de los departamentos a partir de `completed_at`, mostrando:
 #      - Total de tareas asignadas
 #      - Tareas completadas a tiempo
 #      - Tareas completadas tarde
@@ -51,6 +54,23 @@ from .models import DashboardMetrics
 #    - Calcula y retorna la distribución de las tareas por prioridad y estado.
 #    - Reorganiza los datos para facilitar la visualización en un dashboard.
 
+# 6. Analítica de Tareas (task_analytics):
+#    - Calcula en el servidor, con agregados SQL, las agrupaciones que antes hacía el navegador en
+#      `useDashboardData` descargando todas las tareas: por línea estratégica, estado, líder, mes y área,
+#      los rangos de vencimiento, la carga de los próximos seis meses y el tiempo medio de resolución.
+#    - Con `completed_at` calcula las tareas cumplidas a tiempo y tarde y los días promedio hasta el cumplimiento,
+#      que también se reportan como tiempo medio de resolución (averageResolutionTime).
+#    - Retorna los agregados con las mismas claves que usa el hook del frontend y, para la línea de tiempo
+#      y las listas de vencimiento, solo los pocos campos de cada tarea que esos gráficos muestran.
+
+# 7. Caché de Respuestas (cache_stats):
+#    - Las acciones anteriores se guardan en una caché compartida por acción y parámetros, invalidada con
+#      TaskDataVersion (ver dashboard/caching.py); `cache_stats` retorna sus aciertos y fallos.
+
+# 8. Tendencias de Métricas (metrics_trends):
+#    - Retorna las series de tiempo de los snapshots diarios de DashboardMetrics (total, pendientes, en proceso,
+#      cumplidas y vencidas) y sus desgloses por línea estratégica y área, sin recalcular sobre la tabla de tareas.
+
 # Tecnologías Utilizadas:
 
 # - Django: Framework web de alto nivel para construir aplicaciones web en Python.
@@ -69,8 +89,21 @@ class DashboardViewSet(viewsets.ViewSet):
     ViewSet de Django Rest Framework que proporciona endpoints para obtener datos para dashboards relacionados con la gestión de tareas.
     """
     permission_classes = [IsAuthenticated]
+    # Acciones cuya respuesta se comparte en caché entre usuarios (ver dashboard/caching.py)
+    CACHED_ACTIONS = [
+        'user_performance', 'workload_distribution', 'task_completion_trends',
+        'department_efficiency', 'priority_distribution', 'task_analytics',
+    ]
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """
+        Retorna los aciertos y fallos de la caché de cada acción del dashboard.
+        """
+        return Response(cache_stats(self.CACHED_ACTIONS))
 
     @action(detail=False, methods=['get'])
+    @cache_dashboard_action
     def user_performance(self, request):
         """
         Retorna métricas sobre el rendimiento de los usuarios en los últimos 30 días.
@@ -100,9 +133,10 @@ class DashboardViewSet(viewsets.ViewSet):
             )
         ).order_by('-completion_rate')
 
-        return Response(user_stats)
+        return Response(list(user_stats))
 
     @action(detail=False, methods=['get'])
+    @cache_dashboard_action
     def workload_distribution(self, request):
         """
         Retorna la distribución de la carga de trabajo entre los usuarios.
@@ -120,56 +154,150 @@ class DashboardViewSet(viewsets.ViewSet):
             low_priority=Count('id', filter=Q(priority='low')),
         ).order_by('-total_pending')
 
-        return Response(user_workload)
+        return Response(list(user_workload))
+
+    TREND_GRANULARITIES = ('day', 'week', 'month')
+
+    @staticmethod
+    def _bucket_start(day, granularity):
+        """
+        Retorna el primer día del periodo (día, semana que inicia el lunes o mes) al que pertenece `day`.
+        """
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def _next_bucket(day, granularity):
+        if granularity == 'week':
+            return day + timedelta(weeks=1)
+        if granularity == 'month':
+            return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        return day + timedelta(days=1)
+
+    def _count_by_bucket(self, field, start, granularity):
+        """
+        Cuenta las tareas por periodo de `field` desde `start`; el filtro por rango usa el índice de esa columna.
+        """
+        rows = (Task.objects.filter(**{f'{field}__gte': start})
+                .annotate(bucket=Trunc(field, granularity, output_field=fields.DateField()))
+                .values('bucket').annotate(count=Count('id')).order_by())
+        return {row['bucket']: row['count'] for row in rows}
 
     @action(detail=False, methods=['get'])
+    @cache_dashboard_action
     def task_completion_trends(self, request):
         """
         Retorna las tendencias de creación y finalización de tareas en un período de tiempo especificado.
+
+        Parámetros: `days` (por defecto 30) y `granularity` ('day', 'week' o 'month'). Las tareas creadas se cuentan
+        por `created_at` y las cumplidas por `completed_at` (cuándo se cumplieron realmente). La serie incluye
+        todos los periodos de la ventana, con 0 en los que no tienen tareas; la ventana empieza al inicio del
+        periodo que contiene el día de hace `days` días.
         """
-        days = int(request.query_params.get('days', 30))
-        start_date = timezone.now() - timedelta(days=days)
-        
-        trends = Task.objects.filter(
-            created_at__gte=start_date
-        ).extra(
-            select={'date': "DATE(created_at)"}
-        ).values('date').annotate(
-            created=Count('id'),
-            completed=Count('id', filter=Q(status='completed')),
-        ).order_by('date')
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'days': 'Debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in self.TREND_GRANULARITIES:
+            return Response(
+                {'granularity': f"Debe ser uno de: {', '.join(self.TREND_GRANULARITIES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        today = timezone.localdate()
+        first_bucket = self._bucket_start(today - timedelta(days=max(days, 0)), granularity)
+        start = timezone.make_aware(datetime.combine(first_bucket, time.min))
+        created = self._count_by_bucket('created_at', start, granularity)
+        completed = self._count_by_bucket('completed_at', start, granularity)
 
-        return Response(list(trends))
+        trends = []
+        bucket = first_bucket
+        while bucket <= today:
+            trends.append({
+                'date': bucket.isoformat(),
+                'created': created.get(bucket, 0),
+                'completed': completed.get(bucket, 0),
+            })
+            bucket = self._next_bucket(bucket, granularity)
+
+        return Response(trends)
 
     @action(detail=False, methods=['get'])
+    @cache_dashboard_action
     def department_efficiency(self, request):
         """
-        Retorna la eficiencia de los departamentos.
+        Retorna la eficiencia de los departamentos. Una tarea cuenta como cumplida a tiempo si su
+        `completed_at` (momento en que pasó a 'Cumplido') no supera la fecha límite.
         """
+        on_time = Q(completed_at__isnull=False, completed_at__lte=F('due_date'))
         departments = Task.objects.values(
             'assigned_to__department'
         ).annotate(
             total_tasks=Count('id'),
-            completed_on_time=Count('id', filter=Q(
-                status='completed',
-                updated_at__lte=F('due_date')
-            )),
-            completed_late=Count('id', filter=Q(
-                status='completed',
-                updated_at__gt=F('due_date')
-            )),
+            completed_on_time=Count('id', filter=on_time),
+            completed_late=Count('id', filter=Q(completed_at__gt=F('due_date'))),
             efficiency_rate=ExpressionWrapper(
-                Count('id', filter=Q(
-                    status='completed',
-                    updated_at__lte=F('due_date')
-                )) * 100.0 / Count('id'),
+                Count('id', filter=on_time) * 100.0 / Count('id'),
                 output_field=fields.FloatField()
             )
         ).exclude(assigned_to__department='')
 
         return Response(list(departments))
 
+    # Nombres de los conteos de los snapshots en las respuestas de metrics_trends
+    TREND_FIELDS = {
+        'total_tasks': 'total',
+        'pending_tasks': 'pending',
+        'in_progress_tasks': 'inProgress',
+        'completed_tasks': 'completed',
+        'overdue_tasks': 'overdue',
+    }
+    TREND_DIMENSIONS = {'strategic_line': 'byStrategicLine', 'area': 'byArea'}
+
+    def _trend_point(self, date, row):
+        return {'date': date.isoformat(), **{key: row[field] for field, key in self.TREND_FIELDS.items()}}
+
     @action(detail=False, methods=['get'])
+    def metrics_trends(self, request):
+        """
+        Retorna las tendencias de los últimos `days` días (por defecto 90) a partir de los snapshots diarios
+        de DashboardMetrics: la serie total y, por cada línea estratégica y área, su propia serie.
+        Con `dimension=strategic_line` o `dimension=area` solo se incluye ese desglose.
+        """
+        try:
+            days = int(request.query_params.get('days', 90))
+        except ValueError:
+            return Response({'days': 'Debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+        dimensions = list(self.TREND_DIMENSIONS)
+        if request.query_params.get('dimension'):
+            if request.query_params['dimension'] not in self.TREND_DIMENSIONS:
+                return Response(
+                    {'dimension': f"Debe ser uno de: {', '.join(self.TREND_DIMENSIONS)}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            dimensions = [request.query_params['dimension']]
+
+        start_date = timezone.localdate() - timedelta(days=days)
+        snapshots = DashboardMetrics.objects.filter(date__gte=start_date).order_by('date')
+        data = {'series': [self._trend_point(row['date'], row) for row in snapshots.values('date', *self.TREND_FIELDS)]}
+
+        breakdown_rows = DashboardMetricsBreakdown.objects.filter(
+            metrics__date__gte=start_date, dimension__in=dimensions
+        ).values('dimension', 'name', 'metrics__date', *self.TREND_FIELDS).order_by('dimension', 'name', 'metrics__date')
+        for dimension in dimensions:
+            data[self.TREND_DIMENSIONS[dimension]] = {}
+        for row in breakdown_rows:
+            series = data[self.TREND_DIMENSIONS[row['dimension']]].setdefault(row['name'], [])
+            series.append(self._trend_point(row['metrics__date'], row))
+
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    @cache_dashboard_action
     def priority_distribution(self, request):
         """
         Retorna la distribución de las tareas por prioridad y estado.
@@ -192,4 +320,181 @@ class DashboardViewSet(viewsets.ViewSet):
             priority_data[item['priority']]['by_status'][item['status']] = item['count']
             priority_data[item['priority']]['total'] += item['count']
 
-        return Response(priority_data)
\ No newline at end of file
+        return Response(priority_data)
+
+    # Estados que siempre aparecen en las agrupaciones de task_analytics (aunque tengan 0 tareas)
+    ANALYTICS_STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+    COMPLETED_STATUS = 'Cumplido'
+    NO_AREA = 'Sin área'
+    NO_STRATEGIC_LINE = 'Sin línea estratégica'
+
+    def _status_pivot(self, rows, key, label, extra=(), name_field=None):
+        """
+        Convierte filas (clave, estado, conteo, ...) en {clave: {'name': clave, <estado>: n, ..., 'total': n}},
+        sumando también los campos de `extra`. Con `name_field` se agrupa por `key` (p. ej. un id) y el
+        nombre mostrado se toma de ese campo, de modo que dos grupos con el mismo nombre no se mezclan.
+        """
+        result = {}
+        for row in rows:
+            group_key = row[key] if row[key] is not None else label
+            name = group_key if name_field is None else row[name_field]
+            group = result.setdefault(group_key, {
+                'name': name,
+                **{status: 0 for status in self.ANALYTICS_STATUSES},
+                'total': 0,
+                **{field: 0 for field in extra},
+            })
+            group[row['status']] = group.get(row['status'], 0) + row['count']
+            group['total'] += row['count']
+            for field in extra:
+                group[field] += row[field]
+        return result
+
+    @action(detail=False, methods=['get'])
+    @cache_dashboard_action
+    def task_analytics(self, request):
+        """
+        Retorna las agrupaciones del tablero de tareas calculadas con agregados SQL, para que el
+        frontend no tenga que descargar todas las tareas.
+
+        Los rangos de vencimiento usan los mismos umbrales que `useDashboardData`, con los días hasta
+        el vencimiento redondeados hacia arriba: vencida (< 0), crítica (0 a 7), próxima (8 a 30) y a tiempo (> 30).
+        """
+        now = timezone.now()
+        overdue = Q(due_date__lte=now - timedelta(days=1))
+        critical = Q(due_date__gt=now - timedelta(days=1), due_date__lte=now + timedelta(days=7))
+        warning = Q(due_date__gt=now + timedelta(days=7), due_date__lte=now + timedelta(days=30))
+        near_due = Q(due_date__gt=now - timedelta(days=1), due_date__lte=now + timedelta(days=30))
+
+        # KPIs y rangos de vencimiento: una consulta agrupada por estado
+        by_status_rows = Task.objects.values('status').annotate(
+            count=Count('id'),
+            overdue=Count('id', filter=overdue),
+            critical=Count('id', filter=critical),
+            warning=Count('id', filter=warning),
+            near_due=Count('id', filter=near_due),
+            on_time=Count('id', filter=Q(completed_at__lte=F('due_date'))),
+            late=Count('id', filter=Q(completed_at__gt=F('due_date'))),
+            completion_time=Avg(ExpressionWrapper(F('completed_at') - F('created_at'), output_field=fields.DurationField())),
+        ).order_by()
+        by_status = {}
+        buckets = {'total': 0, 'vencidas': 0, 'criticas': 0, 'advertencia': 0, 'aTiempo': 0}
+        near_deadline = 0
+        completion = {'onTime': 0, 'late': 0, 'averageDays': 0}
+        for row in by_status_rows:
+            by_status[row['status']] = row['count']
+            if row['status'] == self.COMPLETED_STATUS:
+                completion['onTime'] = row['on_time']
+                completion['late'] = row['late']
+                if row['completion_time'] is not None:
+                    completion['averageDays'] = row['completion_time'].total_seconds() / 86400
+                continue
+            buckets['total'] += row['count']
+            buckets['vencidas'] += row['overdue']
+            buckets['criticas'] += row['critical']
+            buckets['advertencia'] += row['warning']
+            buckets['aTiempo'] += row['count'] - row['overdue'] - row['critical'] - row['warning']
+            near_deadline += row['near_due']
+
+        total = sum(by_status.values())
+        completed = by_status.get(self.COMPLETED_STATUS, 0)
+
+        by_strategic_line = self._status_pivot(
+            Task.objects.values('strategic_line__name', 'status').annotate(count=Count('id')).order_by(),
+            'strategic_line__name', self.NO_STRATEGIC_LINE,
+        )
+
+        # Una tarea cuenta para cada uno de sus líderes; las tareas sin líderes no aparecen.
+        # Se agrupa por id para no sumar juntos a dos líderes con el mismo nombre.
+        by_leader = self._status_pivot(
+            Task.objects.filter(leaders__isnull=False)
+            .values('leaders__id', 'leaders__name', 'status').annotate(count=Count('id')).order_by(),
+            'leaders__id', None, name_field='leaders__name',
+        )
+
+        month_rows = (Task.objects.annotate(month=TruncMonth('due_date'))
+                      .values('month', 'status').annotate(count=Count('id')).order_by())
+        by_month = self._status_pivot(
+            [{**row, 'month': row['month'].strftime('%Y-%m')} for row in month_rows],
+            'month', None,
+        )
+        for group in by_month.values():
+            group['month'] = group.pop('name')
+        by_month = dict(sorted(by_month.items()))
+
+        by_area = self._status_pivot(
+            Task.objects.values('area__name', 'status').annotate(
+                count=Count('id'),
+                overdue=Count('id', filter=overdue),
+                nearDue=Count('id', filter=near_due),
+            ).order_by(),
+            'area__name', self.NO_AREA, extra=('overdue', 'nearDue'),
+        )
+
+        # Carga de trabajo de las tareas no cumplidas que vencen en los próximos seis meses
+        today = timezone.localdate()
+        months = [
+            date(today.year + (today.month - 1 + i) // 12, (today.month - 1 + i) % 12 + 1, 1)
+            for i in range(6)
+        ]
+        future_workload = {
+            month.strftime('%Y-%m'): {'month': month.strftime('%Y-%m'), 'total': 0, 'critical': 0, 'warning': 0, 'normal': 0}
+            for month in months
+        }
+        window_end = date(months[-1].year + months[-1].month // 12, months[-1].month % 12 + 1, 1)
+        workload_rows = (Task.objects.exclude(status=self.COMPLETED_STATUS)
+                         .filter(due_date__gte=timezone.make_aware(datetime.combine(months[0], time.min)),
+                                 due_date__lt=timezone.make_aware(datetime.combine(window_end, time.min)))
+                         .annotate(month=TruncMonth('due_date'))
+                         .values('month')
+                         .annotate(
+                             total=Count('id'),
+                             critical=Count('id', filter=overdue | critical),
+                             warning=Count('id', filter=warning),
+                         ).order_by())
+        for row in workload_rows:
+            month = future_workload.get(row['month'].strftime('%Y-%m'))
+            if month is None:
+                continue
+            month['total'] = row['total']
+            month['critical'] = row['critical']
+            month['warning'] = row['warning']
+            month['normal'] = row['total'] - row['critical'] - row['warning']
+
+        data = {
+            'kpis': {
+                'total': total,
+                'completed': completed,
+                'inProgress': by_status.get('En proceso', 0),
+                'pending': by_status.get('Pendiente', 0),
+                'nearDeadline': near_deadline,
+                'overdue': buckets['vencidas'],
+                # Días promedio entre la creación y el cumplimiento, ambos calculados en SQL con `completed_at`
+                'averageResolutionTime': completion['averageDays'],
+                'averageCompletionDays': completion['averageDays'],
+                'completedOnTime': completion['onTime'],
+                'completedLate': completion['late'],
+                'complianceRate': completed / total * 100 if total else 0,
+            },
+            'byStatus': by_status,
+            'byStrategicLine': by_strategic_line,
+            'byLeader': by_leader,
+            'byMonth': by_month,
+            'byArea': by_area,
+            'nearDueBuckets': buckets,
+            'futureWorkload': list(future_workload.values()),
+            # Proyecciones mínimas para los gráficos que muestran tareas individuales
+            'timeline': list(Task.objects.values(
+                'id', 'title', 'due_date', 'status', strategic_line_name=F('strategic_line__name'),
+            ).order_by('due_date', 'id')),
+            'openTasks': list(Task.objects.exclude(status=self.COMPLETED_STATUS).annotate(
+                area_name=F('area__name'),
+                strategic_line_name=F('strategic_line__name'),
+                leader_name=Subquery(
+                    Leader.objects.filter(tasks_as_leader=OuterRef('pk')).order_by('name').values('name')[:1]
+                ),
+            ).values(
+                'id', 'title', 'deliverable', 'due_date', 'status', 'area_name', 'strategic_line_name', 'leader_name',
+            ).order_by('due_date', 'id')),
+        }
+        return Response(data)
@@ -0,0 +1,53 @@
+from unittest import mock
+from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import MaintenanceSubGroup, MaintenanceItem, MaintenanceSchedule
+
+# Descripción General del Código:
+
+# Pruebas de la matriz de mantenimiento (acción `grid` de MaintenanceSubGroupViewSet).
+# Comprueba el formato columnar (listas paralelas por item) y que una programación de un item creado entre
+# la consulta de items y la de programaciones no rompe la respuesta.
+
+GRID_URL = '/api/maintenance-groups/grid/'
+
+
+class MaintenanceGridTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sub_group = MaintenanceSubGroup.objects.create(name='Servidores')
+        cls.item = cls.create_item('1')
+        MaintenanceSchedule.objects.create(item=cls.item, year=2024, month=1, week=2, is_scheduled=True)
+        MaintenanceSchedule.objects.create(item=cls.item, year=2024, month=1, week=3, is_completed=True)
+
+    @classmethod
+    def create_item(cls, item_number):
+        return MaintenanceItem.objects.create(
+            sub_group=cls.sub_group, item_number=item_number, element=f'Elemento {item_number}',
+            maintenance_type='preventive_logic',
+        )
+
+    def test_grid_is_columnar(self):
+        data = APIClient().get(GRID_URL, {'year': 2024}).json()
+        self.assertEqual(data['weeks'], 52)
+        self.assertEqual(data['items']['id'], [self.item.id])
+        self.assertEqual(data['items']['scheduleWeeks'], [[2, 3]])
+        self.assertEqual(data['items']['scheduledWeeks'], [[2]])
+        self.assertEqual(data['items']['completedWeeks'], [[3]])
+
+    def test_item_created_during_request_is_skipped(self):
+        filter_schedules = MaintenanceSchedule.objects.filter
+
+        def create_item_then_filter(*args, **kwargs):
+            # Otra petición crea un item con programación después de que `grid` leyó los items
+            late_item = self.create_item('2')
+            MaintenanceSchedule.objects.create(item=late_item, year=2024, month=12, week=53, is_scheduled=True)
+            return filter_schedules(*args, **kwargs)
+
+        with mock.patch.object(MaintenanceSchedule.objects, 'filter', side_effect=create_item_then_filter):
+            response = APIClient().get(GRID_URL, {'year': 2024})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items']['id'], [self.item.id])
+        self.assertEqual(response.json()['weeks'], 52)
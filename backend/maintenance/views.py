@@ -3,7 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Prefetch
 from .models import MaintenanceSubGroup, MaintenanceItem, MaintenanceSchedule
 from .serializers import (MaintenanceSubGroupSerializer, MaintenanceItemSerializer,
                         MaintenanceScheduleSerializer)
@@ -22,6 +22,9 @@ from .serializers import (MaintenanceSubGroupSerializer, MaintenanceItemSerializ
 #    - Permite crear, leer, actualizar y borrar subgrupos de mantenimiento.
 #    - Proporciona un endpoint para obtener estadísticas sobre un subgrupo específico,
 #      como el número total de elementos, el número de mantenimientos pendientes y el número de mantenimientos completados.
+#    - El listado precarga items, responsables y programaciones en un número fijo de consultas.
+#    - Proporciona un endpoint (grid) con la matriz items x semanas de un año en formato columnar,
+#      que es lo único que necesita MaintenanceGrid para dibujarse.
 
 # 2. Gestión de Elementos de Mantenimiento (MaintenanceItemViewSet):
 #    - Permite crear, leer, actualizar y borrar elementos de mantenimiento.
@@ -55,10 +58,75 @@ class MaintenanceSubGroupViewSet(viewsets.ModelViewSet):
     """
     ViewSet de Django Rest Framework para gestionar subgrupos de mantenimiento.
     """
-    queryset = MaintenanceSubGroup.objects.all()
+    queryset = MaintenanceSubGroup.objects.prefetch_related(
+        Prefetch(
+            'items',
+            queryset=MaintenanceItem.objects.select_related('sub_group', 'oasti_responsible').prefetch_related(
+                Prefetch('schedules', queryset=MaintenanceSchedule.objects.select_related('updated_by'))
+            )
+        )
+    )
     serializer_class = MaintenanceSubGroupSerializer
     # permission_classes = [IsAuthenticated]  # Comentar esta línea para desactivar autenticación
-    
+    # Semanas que siempre tiene la matriz de `grid` (se amplía si hay programaciones en la semana 53)
+    GRID_WEEKS = 52
+
+    @action(detail=False)
+    def grid(self, request):
+        """
+        Retorna la matriz de mantenimiento de un año (`year`, por defecto el actual) en formato columnar,
+        con tres consultas (subgrupos, items y programaciones del año):
+
+        - subGroups: {'id': [...], 'name': [...]}
+        - items: {'id', 'subGroup', 'itemNumber', 'element', 'maintenanceType'} como listas paralelas, y por item:
+          'scheduleWeeks'/'scheduleIds' (semanas con programación y su id, para actualizarla),
+          'scheduledWeeks' y 'completedWeeks' (semanas programadas y realizadas).
+        """
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            return Response({'year': 'Debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        sub_groups = list(MaintenanceSubGroup.objects.order_by('id').values_list('id', 'name'))
+        items = list(MaintenanceItem.objects.order_by('sub_group', 'item_number', 'id').values_list(
+            'id', 'sub_group_id', 'item_number', 'element', 'maintenance_type'
+        ))
+        columns = ('scheduleWeeks', 'scheduleIds', 'scheduledWeeks', 'completedWeeks')
+        cells = {item[0]: {column: [] for column in columns} for item in items}
+        weeks = self.GRID_WEEKS
+        schedules = MaintenanceSchedule.objects.filter(year=year).order_by('week', 'month', 'id').values_list(
+            'item_id', 'id', 'week', 'is_scheduled', 'is_completed'
+        )
+        for item_id, schedule_id, week, is_scheduled, is_completed in schedules:
+            row = cells.get(item_id)
+            if row is None:
+                # Item creado entre la consulta de items y la de programaciones: aparece en la siguiente petición
+                continue
+            row['scheduleWeeks'].append(week)
+            row['scheduleIds'].append(schedule_id)
+            if is_scheduled:
+                row['scheduledWeeks'].append(week)
+            if is_completed:
+                row['completedWeeks'].append(week)
+            weeks = max(weeks, week)
+
+        return Response({
+            'year': year,
+            'weeks': weeks,
+            'subGroups': {
+                'id': [sub_group_id for sub_group_id, _ in sub_groups],
+                'name': [name for _, name in sub_groups],
+            },
+            'items': {
+                'id': [item[0] for item in items],
+                'subGroup': [item[1] for item in items],
+                'itemNumber': [item[2] for item in items],
+                'element': [item[3] for item in items],
+                'maintenanceType': [item[4] for item in items],
+                **{column: [cells[item[0]][column] for item in items] for column in columns},
+            },
+        })
+
     @action(detail=True)
     def statistics(self, request, pk=None):
         """
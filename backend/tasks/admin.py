@@ -5,6 +5,7 @@ from .models import Task, TaskUpdate
 # Este script configura la interfaz de administración de Django para los modelos Task y TaskUpdate.
 # Define un inline para mostrar las actualizaciones de la tarea directamente en la página de administración de la tarea,
 # y personaliza la visualización, los filtros y los campos de búsqueda para ambos modelos.
+# El historial de actualizaciones es de solo inserción: desde el admin se pueden agregar comentarios, pero no modificarlos.
 
 class TaskUpdateInline(admin.TabularInline):
     """
@@ -13,9 +14,15 @@ class TaskUpdateInline(admin.TabularInline):
     model = TaskUpdate
     extra = 0
     readonly_fields = ('created_at',)
-    fields = ('status', 'comment', 'created_by', 'created_at')
+    fields = ('previous_status', 'status', 'comment', 'created_by', 'created_at')
     can_delete = False
 
+    def has_change_permission(self, request, obj=None):
+        """
+        Las actualizaciones existentes no se pueden modificar.
+        """
+        return False
+
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     """
@@ -24,7 +31,7 @@ class TaskAdmin(admin.ModelAdmin):
     list_display = ('title', 'assigned_to', 'status', 'priority', 'due_date', 'created_at')
     list_filter = ('status', 'priority', 'created_at', 'due_date')
     search_fields = ('title', 'description', 'assigned_to__username', 'assigned_to__email')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'completed_at')
     raw_id_fields = ('assigned_to', 'created_by')
     inlines = [TaskUpdateInline]
     
@@ -36,7 +43,7 @@ class TaskAdmin(admin.ModelAdmin):
             'fields': ('assigned_to', 'created_by')
         }),
         ('Estado', {
-            'fields': ('status', 'priority', 'due_date')
+            'fields': ('status', 'priority', 'due_date', 'completed_at')
         }),
         ('Fechas', {
             'fields': ('created_at', 'updated_at'),
@@ -57,8 +64,14 @@ class TaskUpdateAdmin(admin.ModelAdmin):
     """
     Configuración del admin para el modelo TaskUpdate.
     """
-    list_display = ('task', 'status', 'created_by', 'created_at')
+    list_display = ('task', 'previous_status', 'status', 'created_by', 'created_at')
     list_filter = ('status', 'created_at')
     search_fields = ('task__title', 'comment', 'created_by__username')
     readonly_fields = ('created_at',)
-    raw_id_fields = ('task', 'created_by')
\ No newline at end of file
+    raw_id_fields = ('task', 'created_by')
+
+    def has_change_permission(self, request, obj=None):
+        """
+        El historial es de solo inserción: las actualizaciones existentes solo se pueden consultar.
+        """
+        return False
\ No newline at end of file
@@ -1,18 +1,59 @@
+import time
+from collections import defaultdict
 import pandas as pd
 from django.core.management.base import BaseCommand
-from tasks.models import Task, StrategicLine, Area, Leader
+from django.db import transaction
+from django.utils import timezone
+from tasks.models import Task, TaskUpdate, StrategicLine, Area, Leader, TaskDataVersion
 from django.contrib.auth import get_user_model
 import pytz
 from datetime import datetime
 
 User = get_user_model()
 
+# Descripción general del código:
+# Este comando importa las tareas/metas de la hoja "Seguimiento" del Excel del PAI.
+# Resuelve en memoria las líneas estratégicas, áreas y líderes (creando en bloque los que falten),
+# inserta las tareas y sus relaciones de líderes y equipo de apoyo con bulk_create por lotes dentro de
+# una transacción y, con --upsert, actualiza las tareas existentes (por código Daruma) en lugar de duplicarlas.
+# Con --upsert solo se escriben las tareas cuyos campos, líderes o equipo de apoyo cambiaron; las demás
+# conservan su `updated_at` (y no aparecen en el feed de cambios) y se reportan como sin cambios.
+# Como bulk_create/bulk_update no disparan señales, aquí mismo se mantiene `completed_at` y se registran
+# en el historial (TaskUpdate) los estados iniciales y los cambios de estado.
+
+# Campos de Task que se escriben desde el Excel (también son los que actualiza --upsert)
+TASK_FIELDS = [
+    'title', 'strategic_line', 'status', 'year', 'description', 'evidence', 'due_date',
+    'alert_date', 'limit_month', 'area', 'daruma_code', 'deliverable',
+]
+
+
+def text(value):
+    """
+    Convierte una celda a texto sin espacios a los lados ('' si está vacía).
+    """
+    return str(value).strip() if pd.notna(value) else ''
+
+
+def split_names(value):
+    """
+    Separa una celda con varios nombres separados por comas.
+    """
+    return [name.strip() for name in text(value).split(',') if name.strip()]
+
+
 class Command(BaseCommand):
     help = 'Import tasks from an Excel file'
 
     def add_arguments(self, parser):
         parser.add_argument('file_path', type=str, help='The path to the Excel file')
         parser.add_argument('--clean', action='store_true', help='Limpiar datos existentes antes de importar')
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Actualiza las tareas existentes (por código Daruma, o año y meta si no tienen código) en lugar de duplicarlas'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Filas por lote de inserción')
 
     def clean_database(self):
         """Limpia todos los datos existentes"""
@@ -23,107 +64,211 @@ class Command(BaseCommand):
         StrategicLine.objects.all().delete()
         self.stdout.write(self.style.SUCCESS("Base de datos limpiada exitosamente"))
 
-    def create_leader_from_text(self, leader_text):
-        """Crea líderes a partir de texto, manejando múltiples nombres"""
-        if not leader_text or pd.isna(leader_text):
-            return []
-        
-        leaders = []
-        # Dividir por comas y limpiar espacios
-        names = [name.strip() for name in str(leader_text).split(',')]
-        
-        for name in names:
-            if name:  # Si el nombre no está vacío
-                leader, created = Leader.objects.get_or_create(
-                    name=name,
-                    defaults={'active': True}
-                )
-                if created:
+    def resolve_names(self, model, names, defaults=None):
+        """
+        Retorna {nombre: objeto} para todos los nombres, creando en bloque los que no existen.
+        """
+        names = set(names)
+        found = {}
+        for obj in model.objects.filter(name__in=names).order_by('-id'):
+            found[obj.name] = obj  # si hay nombres repetidos se queda con el más antiguo
+        missing = [name for name in names if name not in found]
+        if missing:
+            model.objects.bulk_create([model(name=name, **(defaults or {})) for name in missing])
+            for obj in model.objects.filter(name__in=missing).order_by('-id'):
+                found[obj.name] = obj
+            if model is Leader:
+                for name in sorted(missing):
                     self.stdout.write(f"Nuevo líder creado: {name}")
-                leaders.append(leader)
-        
-        return leaders
+        return found
+
+    def read_rows(self, df):
+        """
+        Convierte cada fila del Excel en (número de fila, campos de la tarea, nombres de líderes, nombres de apoyo).
+        Las filas con valores inválidos se reportan y se omiten.
+        """
+        rows = []
+        for index, row in enumerate(df.to_dict('records')):
+            if all(pd.isna(value) for value in row.values()):
+                continue  # omite filas completamente vacías
+            try:
+                fields = {
+                    'title': text(row['Meta']),
+                    'strategic_line': str(row['Línea']).strip(),
+                    'status': text(row['Estado']) or 'Pendiente',
+                    'year': int(row['Año']) if pd.notna(row['Año']) else datetime.now().year,
+                    'description': text(row['Observaciones']),
+                    'evidence': text(row['Evidencia']),
+                    'due_date': pd.to_datetime(row['Fecha límite']).replace(tzinfo=pytz.UTC) if pd.notna(row['Fecha límite']) else None,
+                    'alert_date': pd.to_datetime(row['Fecha alarma']).replace(tzinfo=pytz.UTC) if pd.notna(row['Fecha alarma']) else None,
+                    'limit_month': int(row['Mes límite']) if pd.notna(row['Mes límite']) else None,
+                    'area': text(row['AREA']) or None,
+                    'daruma_code': text(row.get('CODIGO DARUMA o ID')),
+                    'deliverable': text(row['Entregable/Acción']),
+                }
+                if fields['due_date'] is None:
+                    raise ValueError("La fecha límite es obligatoria")
+                rows.append((index + 2, fields, split_names(row['Lidera']), split_names(row['Apoya'])))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(
+                    f"Error en fila {index + 2}: {str(e)}\n"
+                    f"Datos: {row}"
+                ))
+        return rows
+
+    @staticmethod
+    def task_key(year, title, daruma_code):
+        """
+        Clave con la que --upsert identifica una tarea: el código Daruma o, si no tiene, el año y la meta.
+        """
+        if daruma_code:
+            return ('daruma', daruma_code)
+        return ('meta', year, title)
 
     def handle(self, *args, **options):
         if options['clean']:
             self.clean_database()
 
         file_path = options['file_path']
+        start = time.perf_counter()
 
         try:
             df = pd.read_excel(
-                file_path, 
+                file_path,
                 sheet_name="Seguimiento",
                 header=1,
             )
             self.stdout.write(self.style.SUCCESS(f"Archivo leído exitosamente"))
-            
-            # Crear usuario por defecto para assigned_to y created_by
-            default_user, _ = User.objects.get_or_create(
-                username='admin',
-                defaults={
-                    'is_staff': True,
-                    'is_superuser': True,
-                    'email': 'admin@example.com'
-                }
-            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error al procesar el archivo: {str(e)}"))
+            return
 
-            # Procesar cada fila
-            for index, row in df.iterrows():
-                try:
-                    # Crear línea estratégica
-                    strategic_line, _ = StrategicLine.objects.get_or_create(
-                        name=str(row['Línea']).strip()
-                    )
-
-                    # Crear área
-                    area = None
-                    if pd.notna(row['AREA']):
-                        area, _ = Area.objects.get_or_create(
-                            name=str(row['AREA']).strip()
-                        )
-
-                    # Crear líderes
-                    leaders = self.create_leader_from_text(row['Lidera'])
-                    support_team = self.create_leader_from_text(row['Apoya'])
-
-                    # Procesar fechas
-                    due_date = pd.to_datetime(row['Fecha límite']).replace(tzinfo=pytz.UTC) if pd.notna(row['Fecha límite']) else None
-                    alert_date = pd.to_datetime(row['Fecha alarma']).replace(tzinfo=pytz.UTC) if pd.notna(row['Fecha alarma']) else None
-
-                    # Crear la tarea
-                    task = Task.objects.create(
-                        title=str(row['Meta']).strip(),
-                        strategic_line=strategic_line,
-                        status=str(row['Estado']).strip() if pd.notna(row['Estado']) else 'Pendiente',
-                        year=int(row['Año']) if pd.notna(row['Año']) else datetime.now().year,
-                        description=str(row['Observaciones']).strip() if pd.notna(row['Observaciones']) else '',
-                        evidence=str(row['Evidencia']).strip() if pd.notna(row['Evidencia']) else '',
-                        due_date=due_date,
-                        alert_date=alert_date,
-                        limit_month=int(row['Mes límite']) if pd.notna(row['Mes límite']) else None,
-                        area=area,
-                        daruma_code=str(row['CODIGO DARUMA o ID']).strip() if pd.notna(row['CODIGO DARUMA o ID']) else '',
-                        deliverable=str(row['Entregable/Acción']).strip() if pd.notna(row['Entregable/Acción']) else '',
-                        assigned_to=default_user,
-                        created_by=default_user
-                    )
-
-                    # Asignar líderes y equipo de apoyo
-                    if leaders:
-                        task.leaders.set(leaders)
-                    if support_team:
-                        task.support_team.set(support_team)
-
-                    self.stdout.write(self.style.SUCCESS(
-                        f"Tarea creada exitosamente: {task.title} (fila {index + 2})"
-                    ))
-
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(
-                        f"Error en fila {index + 2}: {str(e)}\n"
-                        f"Datos: {row.to_dict()}"
-                    ))
+        rows = self.read_rows(df)
+        with transaction.atomic():
+            created_count, updated_count, unchanged_count = self.import_rows(rows, options['upsert'], options['batch_size'])
+            # bulk_create/bulk_update no disparan señales: se invalida la caché de tareas una sola vez
+            TaskDataVersion.bump()
 
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error al procesar el archivo: {str(e)}"))
\ No newline at end of file
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación completada. Tareas creadas: {created_count}, actualizadas: {updated_count}, "
+            f"sin cambios: {unchanged_count} en {elapsed:.2f} s."
+        ))
+
+    @staticmethod
+    def changed_fields(task, fields):
+        """
+        Retorna los campos de `fields` cuyo valor (normalizado como lo guardaría el modelo) difiere del de `task`.
+        """
+        changed = []
+        for name, value in fields.items():
+            field = Task._meta.get_field(name)
+            if field.is_relation:
+                current, value = getattr(task, field.attname), value.pk if value is not None else None
+            else:
+                current, value = getattr(task, name), field.to_python(value)
+            if current != value:
+                changed.append(name)
+        return changed
+
+    def import_rows(self, rows, upsert, batch_size):
+        """
+        Guarda las filas leídas: inserta las tareas nuevas y, con `upsert`, actualiza las existentes
+        que cambiaron. Retorna (creadas, actualizadas, sin cambios).
+        """
+        # Crear usuario por defecto para assigned_to y created_by
+        default_user, _ = User.objects.get_or_create(
+            username='admin',
+            defaults={
+                'is_staff': True,
+                'is_superuser': True,
+                'email': 'admin@example.com'
+            }
+        )
+
+        # Dimensiones resueltas una sola vez para todo el archivo
+        lines = self.resolve_names(StrategicLine, (fields['strategic_line'] for _, fields, _, _ in rows))
+        areas = self.resolve_names(Area, (fields['area'] for _, fields, _, _ in rows if fields['area']))
+        leaders = self.resolve_names(
+            Leader, (name for _, _, lead, support in rows for name in lead + support), defaults={'active': True}
+        )
+
+        LeadersThrough = Task.leaders.through
+        SupportThrough = Task.support_team.through
+
+        existing = defaultdict(list)
+        # task_id -> (ids de líderes, ids del equipo de apoyo) guardados
+        stored_relations = defaultdict(lambda: (set(), set()))
+        if upsert:
+            for task in Task.objects.order_by('id'):
+                existing[self.task_key(task.year, task.title, task.daruma_code)].append(task)
+            for task_id, leader_id in LeadersThrough.objects.values_list('task_id', 'leader_id'):
+                stored_relations[task_id][0].add(leader_id)
+            for task_id, leader_id in SupportThrough.objects.values_list('task_id', 'leader_id'):
+                stored_relations[task_id][1].add(leader_id)
+
+        seen = defaultdict(int)
+        to_create, to_update, relations, history = [], [], [], []
+        # Tareas existentes cuyas relaciones se reescriben
+        rewritten_ids = []
+        unchanged_count = 0
+        now = timezone.now()
+        for row_number, fields, lead, support in rows:
+            fields = dict(fields)
+            fields['strategic_line'] = lines[fields['strategic_line']]
+            fields['area'] = areas[fields['area']] if fields['area'] else None
+
+            key = self.task_key(fields['year'], fields['title'], fields['daruma_code'])
+            occurrence = seen[key]
+            seen[key] += 1
+            matches = existing.get(key, [])
+            task_leaders = [leaders[name] for name in lead]
+            task_support = [leaders[name] for name in support]
+            if occurrence < len(matches):
+                task = matches[occurrence]
+                changed = self.changed_fields(task, fields)
+                relations_changed = stored_relations[task.id] != (
+                    {leader.id for leader in task_leaders}, {leader.id for leader in task_support}
+                )
+                if not changed and not relations_changed:
+                    unchanged_count += 1
+                    continue
+                if relations_changed:
+                    rewritten_ids.append(task.id)
+                previous_status = task.status
+                for field in changed:
+                    setattr(task, field, fields[field])
+                task.updated_at = now
+                to_update.append(task)
+            else:
+                task = Task(assigned_to=default_user, created_by=default_user, **fields)
+                previous_status = None
+                relations_changed = True
+                to_create.append(task)
+            if task.apply_status(previous_status, now):
+                history.append((task, previous_status))
+            if relations_changed:
+                relations.append((task, task_leaders, task_support))
+
+        Task.objects.bulk_create(to_create, batch_size=batch_size)
+        Task.objects.bulk_update(to_update, TASK_FIELDS + ['updated_at', 'completed_at'], batch_size=batch_size)
+        TaskUpdate.objects.bulk_create(
+            [TaskUpdate.status_change(task, previous_status) for task, previous_status in history],
+            batch_size=batch_size,
+        )
+
+        # Líderes y equipo de apoyo: se reemplazan en bloque las filas de las tareas cuyas relaciones cambiaron
+        LeadersThrough.objects.filter(task_id__in=rewritten_ids).delete()
+        SupportThrough.objects.filter(task_id__in=rewritten_ids).delete()
+        LeadersThrough.objects.bulk_create(
+            [LeadersThrough(task_id=task.id, leader_id=leader.id)
+             for task, lead, _ in relations for leader in dict.fromkeys(lead)],
+            batch_size=batch_size,
+        )
+        SupportThrough.objects.bulk_create(
+            [SupportThrough(task_id=task.id, leader_id=leader.id)
+             for task, _, support in relations for leader in dict.fromkeys(support)],
+            batch_size=batch_size,
+        )
+
+        return len(to_create), len(to_update), unchanged_count
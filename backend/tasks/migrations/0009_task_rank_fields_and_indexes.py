@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_taskdataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(priority='low', then=models.Value(1)), models.When(priority='medium', then=models.Value(2)), models.When(priority='high', then=models.Value(3)), default=models.Value(0)), output_field=models.SmallIntegerField(), verbose_name='Orden de prioridad'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='status_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(status='Pendiente', then=models.Value(1)), models.When(status='En proceso', then=models.Value(2)), models.When(status='Cumplido', then=models.Value(3)), default=models.Value(4)), output_field=models.SmallIntegerField(), verbose_name='Orden de estado'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['year', 'status', '-created_at'], name='task_year_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-created_at', 'id'], name='task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['priority_rank', 'due_date'], name='task_priority_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status_rank', 'due_date'], name='task_status_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+from django.db import migrations
+
+# Reindexa una tarea: borra su fila del índice y la vuelve a insertar con los comentarios de sus actualizaciones
+REINDEX_TASK_SQL = """
+        DELETE FROM tasks_task_fts WHERE rowid = {task_id};
+        INSERT INTO tasks_task_fts(rowid, title, description, deliverable, evidence, daruma_code, comments)
+        SELECT t.id, t.title, t.description, t.deliverable, t.evidence, t.daruma_code,
+               (SELECT group_concat(u.comment, ' ') FROM tasks_taskupdate u WHERE u.task_id = t.id)
+        FROM tasks_task t WHERE t.id = {task_id};
+"""
+
+CREATE_FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE tasks_task_fts USING fts5(
+        title, description, deliverable, evidence, daruma_code, comments,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        {REINDEX_TASK_SQL.format(task_id='new.id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER tasks_task_fts_au
+    AFTER UPDATE OF title, description, deliverable, evidence, daruma_code ON tasks_task BEGIN
+        DELETE FROM tasks_task_fts WHERE rowid = old.id;
+        {REINDEX_TASK_SQL.format(task_id='new.id')}
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        DELETE FROM tasks_task_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER tasks_taskupdate_fts_ai AFTER INSERT ON tasks_taskupdate BEGIN
+        {REINDEX_TASK_SQL.format(task_id='new.task_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER tasks_taskupdate_fts_au AFTER UPDATE OF comment, task_id ON tasks_taskupdate BEGIN
+        {REINDEX_TASK_SQL.format(task_id='old.task_id')}
+        {REINDEX_TASK_SQL.format(task_id='new.task_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER tasks_taskupdate_fts_ad AFTER DELETE ON tasks_taskupdate BEGIN
+        {REINDEX_TASK_SQL.format(task_id='old.task_id')}
+    END
+    """,
+    # Indexa las tareas que ya existían
+    """
+    INSERT INTO tasks_task_fts(rowid, title, description, deliverable, evidence, daruma_code, comments)
+    SELECT t.id, t.title, t.description, t.deliverable, t.evidence, t.daruma_code,
+           (SELECT group_concat(u.comment, ' ') FROM tasks_taskupdate u WHERE u.task_id = t.id)
+    FROM tasks_task t
+    """,
+]
+
+DROP_FTS_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskupdate_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskupdate_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_taskupdate_fts_ad",
+    "DROP TABLE IF EXISTS tasks_task_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    """
+    Crea el índice FTS5 de tareas y sus triggers (solo SQLite; en otros motores la búsqueda usa icontains).
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_FTS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_rank_fields_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+# SQLite reconstruye tasks_taskupdate al cambiar `comment` y `created_by`; los triggers del índice de búsqueda
+# (0010_task_fts) hacen referencia a esa tabla e impiden renombrarla, así que se eliminan antes y se recrean después.
+REINDEX_TASK_SQL = """
+        DELETE FROM tasks_task_fts WHERE rowid = {task_id};
+        INSERT INTO tasks_task_fts(rowid, title, description, deliverable, evidence, daruma_code, comments)
+        SELECT t.id, t.title, t.description, t.deliverable, t.evidence, t.daruma_code,
+               (SELECT group_concat(u.comment, ' ') FROM tasks_taskupdate u WHERE u.task_id = t.id)
+        FROM tasks_task t WHERE t.id = {task_id};
+"""
+
+FTS_TRIGGERS = {
+    'tasks_task_fts_ai': f"""
+    CREATE TRIGGER tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        {REINDEX_TASK_SQL.format(task_id='new.id')}
+    END
+    """,
+    'tasks_task_fts_au': f"""
+    CREATE TRIGGER tasks_task_fts_au
+    AFTER UPDATE OF title, description, deliverable, evidence, daruma_code ON tasks_task BEGIN
+        DELETE FROM tasks_task_fts WHERE rowid = old.id;
+        {REINDEX_TASK_SQL.format(task_id='new.id')}
+    END
+    """,
+    'tasks_task_fts_ad': """
+    CREATE TRIGGER tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        DELETE FROM tasks_task_fts WHERE rowid = old.id;
+    END
+    """,
+    'tasks_taskupdate_fts_ai': f"""
+    CREATE TRIGGER tasks_taskupdate_fts_ai AFTER INSERT ON tasks_taskupdate BEGIN
+        {REINDEX_TASK_SQL.format(task_id='new.task_id')}
+    END
+    """,
+    'tasks_taskupdate_fts_au': f"""
+    CREATE TRIGGER tasks_taskupdate_fts_au AFTER UPDATE OF comment, task_id ON tasks_taskupdate BEGIN
+        {REINDEX_TASK_SQL.format(task_id='old.task_id')}
+        {REINDEX_TASK_SQL.format(task_id='new.task_id')}
+    END
+    """,
+    'tasks_taskupdate_fts_ad': f"""
+    CREATE TRIGGER tasks_taskupdate_fts_ad AFTER DELETE ON tasks_taskupdate BEGIN
+        {REINDEX_TASK_SQL.format(task_id='old.task_id')}
+    END
+    """,
+}
+
+
+def _has_fts(schema_editor):
+    return (schema_editor.connection.vendor == 'sqlite'
+            and 'tasks_task_fts' in schema_editor.connection.introspection.table_names())
+
+
+def drop_fts_triggers(apps, schema_editor):
+    if not _has_fts(schema_editor):
+        return
+    for name in FTS_TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def create_fts_triggers(apps, schema_editor):
+    if not _has_fts(schema_editor):
+        return
+    for sql in FTS_TRIGGERS.values():
+        schema_editor.execute(sql)
+
+
+def backfill_completed_at(apps, schema_editor):
+    """
+    Para las tareas ya cumplidas la mejor aproximación disponible es su última modificación.
+    """
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(status='Cumplido', completed_at__isnull=True).update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_changes_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_triggers, create_fts_triggers),
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Fecha de cumplimiento'),
+        ),
+        migrations.AddField(
+            model_name='taskupdate',
+            name='previous_status',
+            field=models.CharField(blank=True, choices=[('Pendiente', 'Pendiente'), ('En proceso', 'En Proceso'), ('Cumplido', 'Cumplido')], max_length=50, null=True, verbose_name='Estado anterior'),
+        ),
+        migrations.AlterField(
+            model_name='taskupdate',
+            name='comment',
+            field=models.TextField(blank=True, verbose_name='Comentario'),
+        ),
+        migrations.AlterField(
+            model_name='taskupdate',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Creado por'),
+        ),
+        migrations.AddIndex(
+            model_name='taskupdate',
+            index=models.Index(fields=['task', '-created_at'], name='taskupdate_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskupdate',
+            index=models.Index(fields=['status', 'created_at'], name='taskupdate_status_idx'),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+        migrations.RunPython(create_fts_triggers, drop_fts_triggers),
+    ]
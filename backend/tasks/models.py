@@ -1,11 +1,16 @@
 from django.db import models
 from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
 from users.models import User
 
 # Descripción general del código:
 # Este script define modelos de Django para la gestión de tareas y elementos relacionados,
 # como áreas, líderes y líneas estratégicas. Incluye modelos para representar la estructura
 # organizativa y el seguimiento del progreso de las tareas, así como el registro de actualizaciones.
+# TaskDataVersion lleva un contador de escrituras de tareas que sirve como clave de caché.
+# TaskDeletion registra las tareas eliminadas para el feed de cambios incremental.
+# TaskUpdate es el historial de solo inserción de cada tarea y `completed_at` guarda cuándo pasó a cumplida.
 
 class Area(models.Model):
     """
@@ -127,13 +132,51 @@ class Task(models.Model):
     evidence = models.TextField(blank=True, verbose_name='Evidencia')    
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Última actualización')
+    # Momento en que la tarea pasó a 'Cumplido' (se borra si vuelve a otro estado); lo mantiene apply_status
+    completed_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name='Fecha de cumplimiento')
     area = models.ForeignKey(Area, on_delete=models.PROTECT, verbose_name='Área',null=True,blank=True)
     leaders = models.ManyToManyField(Leader,related_name='tasks_as_leader',verbose_name='Líderes')
     support_team = models.ManyToManyField(Leader,related_name='tasks_as_support',verbose_name='Equipo de Apoyo',blank=True)
+    # Ordinales calculados por la base de datos para ordenar por prioridad y estado en su orden lógico
+    # (alfabéticamente 'high' < 'low' < 'medium'); al ser columnas generadas se mantienen incluso con update/bulk_update.
+    priority_rank = models.GeneratedField(
+        expression=models.Case(
+            models.When(priority='low', then=models.Value(1)),
+            models.When(priority='medium', then=models.Value(2)),
+            models.When(priority='high', then=models.Value(3)),
+            default=models.Value(0),
+        ),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+        verbose_name='Orden de prioridad'
+    )
+    status_rank = models.GeneratedField(
+        expression=models.Case(
+            models.When(status='Pendiente', then=models.Value(1)),
+            models.When(status='En proceso', then=models.Value(2)),
+            models.When(status='Cumplido', then=models.Value(3)),
+            default=models.Value(4),
+        ),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+        verbose_name='Orden de estado'
+    )
     class Meta:
         verbose_name = 'Tarea/Meta'
         verbose_name_plural = 'Tareas/Metas'
         ordering = ['-created_at']
+        indexes = [
+            # Filtros de TaskViewSet (año, estado) y orden por defecto / de la paginación por cursor
+            models.Index(fields=['year', 'status', '-created_at'], name='task_year_status_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(fields=['-created_at', 'id'], name='task_created_idx'),
+            models.Index(fields=['priority_rank', 'due_date'], name='task_priority_rank_idx'),
+            models.Index(fields=['status_rank', 'due_date'], name='task_status_rank_idx'),
+            # `ordering=due_date` sin filtro de estado
+            models.Index(fields=['due_date'], name='task_due_idx'),
+            # Feed de cambios (`changes/?since=`)
+            models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+        ]
 
     def __str__(self):
         """
@@ -141,9 +184,25 @@ class Task(models.Model):
         """
         return f"{self.title} - {self.get_status_display()}"
 
+    COMPLETED_STATUS = 'Cumplido'
+
+    def apply_status(self, previous_status, now=None):
+        """
+        Ajusta `completed_at` según el paso de `previous_status` al estado actual de la tarea.
+        Retorna True si el estado cambió (y por tanto hay que registrarlo en el historial).
+        """
+        if previous_status == self.status:
+            return False
+        if self.status == self.COMPLETED_STATUS:
+            self.completed_at = now or timezone.now()
+        elif previous_status == self.COMPLETED_STATUS:
+            self.completed_at = None
+        return True
+
 class TaskUpdate(models.Model):
     """
-    Modelo para registrar las actualizaciones de una tarea.
+    Modelo para registrar las actualizaciones de una tarea. Es un historial de solo inserción: los cambios
+    de estado se registran automáticamente (ver tasks/signals.py) y los registros no se modifican.
     """
     task = models.ForeignKey(
         Task,
@@ -151,7 +210,14 @@ class TaskUpdate(models.Model):
         related_name='updates',
         verbose_name='Tarea'
     )
-    comment = models.TextField(verbose_name='Comentario')
+    comment = models.TextField(verbose_name='Comentario', blank=True)
+    previous_status = models.CharField(
+        max_length=50,
+        choices=Task.STATUS_CHOICES,
+        null=True,
+        blank=True,
+        verbose_name='Estado anterior'
+    )
     status = models.CharField(
         max_length=50,
         choices=Task.STATUS_CHOICES,
@@ -160,6 +226,8 @@ class TaskUpdate(models.Model):
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         verbose_name='Creado por'
     )
     created_at = models.DateTimeField(
@@ -171,6 +239,10 @@ class TaskUpdate(models.Model):
         verbose_name = 'Actualización de Tarea'
         verbose_name_plural = 'Actualizaciones de Tareas'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['task', '-created_at'], name='taskupdate_task_idx'),
+            models.Index(fields=['status', 'created_at'], name='taskupdate_status_idx'),
+        ]
 
     def __str__(self):
         """
@@ -178,3 +250,63 @@ class TaskUpdate(models.Model):
         """
         return f"Actualización de {self.task.title} - {self.created_at}"
 
+    def save(self, *args, **kwargs):
+        """
+        Guarda la actualización; el historial es de solo inserción, así que no se permite modificar una existente.
+        """
+        if not self._state.adding:
+            raise ValueError("Las actualizaciones de tareas no se pueden modificar.")
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def status_change(cls, task, previous_status, user=None):
+        """
+        Retorna (sin guardar) el registro del cambio de estado de `task` desde `previous_status`.
+        """
+        if user is not None and not user.is_authenticated:
+            user = None
+        return cls(task=task, previous_status=previous_status, status=task.status, created_by=user)
+
+
+class TaskDataVersion(models.Model):
+    """
+    Guarda la versión de los datos de tareas en una fila única (pk=1). Se incrementa con cada escritura
+    de Task o de sus líderes y equipo de apoyo, lo que invalida los valores en caché (p. ej. los conteos de la paginación).
+    """
+    version = models.BigIntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def current(cls):
+        """
+        Retorna la versión actual de los datos de tareas.
+        """
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        """
+        Incrementa la versión de los datos de tareas.
+        """
+        if not cls.objects.filter(pk=1).update(version=F('version') + 1, last_updated=timezone.now()):
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+class TaskDeletion(models.Model):
+    """
+    Registro liviano (lápida) de una tarea eliminada, para que los clientes que sincronizan con
+    `tasks/changes/?since=` puedan quitarla de su copia local.
+    """
+    task_id = models.BigIntegerField(verbose_name='Tarea')
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='Fecha de eliminación')
+
+    class Meta:
+        verbose_name = 'Tarea eliminada'
+        verbose_name_plural = 'Tareas eliminadas'
+        ordering = ['deleted_at']
+
+    def __str__(self):
+        """
+        Retorna el id de la tarea eliminada y la fecha.
+        """
+        return f"Tarea {self.task_id} eliminada el {self.deleted_at}"
@@ -0,0 +1,90 @@
+import html
+from django.db import connection, DatabaseError
+from django.db.models import Q, Exists, OuterRef
+from core.fts import build_match_query, search_words
+from .models import Task, TaskUpdate
+
+# Descripción general del código:
+# Este script implementa la búsqueda de texto completo de tareas con un índice FTS5 de SQLite
+# (tasks_task_fts) sobre título, descripción, entregable, evidencia, código Daruma y los comentarios
+# de sus actualizaciones (TaskUpdate). El índice lo crea la migración 0010_task_fts y lo mantienen
+# sincronizado triggers sobre tasks_task y tasks_taskupdate, incluso con update() o bulk_update().
+# Los resultados se ordenan con bm25 y traen un fragmento resaltado con <mark> donde aparece la búsqueda.
+# El texto de las tareas lo escriben los usuarios: SQLite marca las coincidencias con caracteres de control,
+# el texto se escapa como HTML y solo después los marcadores se convierten en <mark>, de modo que el
+# fragmento se puede mostrar como HTML sin riesgo de inyectar etiquetas.
+
+FTS_TABLE = 'tasks_task_fts'
+FTS_FIELDS = ('title', 'description', 'deliverable', 'evidence', 'daruma_code', 'comments')
+# Índice de la columna del título en FTS_FIELDS (para resaltarlo aparte)
+TITLE_COLUMN = 0
+SNIPPET_TOKENS = 16
+# Marcadores que SQLite inserta alrededor de las coincidencias (no aparecen en texto escrito normalmente)
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+
+def render_highlight(text):
+    """
+    Escapa `text` como HTML y convierte los marcadores de coincidencia en <mark></mark>.
+    """
+    if text is None:
+        return None
+    return html.escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search_tasks(text, queryset=None, offset=0, limit=20):
+    """
+    Busca `text` en las tareas y retorna (total, [(id, rango, título resaltado, fragmento), ...]) ordenado por relevancia.
+    Si se pasa `queryset` (p. ej. con los filtros de TaskViewSet) solo se consideran esas tareas.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return 0, []
+
+    if connection.vendor != 'sqlite':
+        return _search_tasks_fallback(text, queryset, offset, limit)
+
+    where = f"{FTS_TABLE} MATCH %s"
+    params = [match]
+    if queryset is not None:
+        subquery, subparams = queryset.order_by().values('id').query.sql_with_params()
+        where += f" AND rowid IN ({subquery})"
+        params.extend(subparams)
+
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}", params)
+        except DatabaseError:
+            # SQLite compilado sin FTS5 o índice aún no creado
+            return _search_tasks_fallback(text, queryset, offset, limit)
+        total = cursor.fetchone()[0]
+        if total == 0 or offset >= total:
+            return total, []
+        cursor.execute(
+            f"SELECT rowid, bm25({FTS_TABLE}) AS rank, "
+            f"highlight({FTS_TABLE}, {TITLE_COLUMN}, %s, %s), "
+            f"snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS}) "
+            f"FROM {FTS_TABLE} WHERE {where} ORDER BY rank, rowid LIMIT %s OFFSET %s",
+            [MARK_START, MARK_END, MARK_START, MARK_END] + params + [limit, offset],
+        )
+        return total, [
+            (task_id, rank, render_highlight(title), render_highlight(snippet))
+            for task_id, rank, title, snippet in cursor.fetchall()
+        ]
+
+
+def _search_tasks_fallback(text, queryset, offset, limit):
+    """
+    Búsqueda sin índice para motores sin FTS5: todas las palabras con `icontains`, sin rango ni resaltado.
+    """
+    qs = queryset if queryset is not None else Task.objects.all()
+    for word in search_words(text):
+        condition = Q()
+        for field in FTS_FIELDS[:-1]:
+            condition |= Q(**{f'{field}__icontains': word})
+        condition |= Q(Exists(TaskUpdate.objects.filter(task_id=OuterRef('pk'), comment__icontains=word)))
+        qs = qs.filter(condition)
+    total = qs.count()
+    ids = qs.order_by('-created_at', 'id').values_list('id', flat=True)[offset:offset + limit]
+    return total, [(task_id, None, None, None) for task_id in ids]
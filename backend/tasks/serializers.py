@@ -6,6 +6,7 @@ from datetime import datetime, date
 # Este script define Serializers de Django REST Framework para los modelos Task, StrategicLine, Area y Leader.
 # Incluye serializadores para listado, detalle y creación de tareas, con métodos personalizados para la
 # representación de datos y la gestión de relaciones.
+# TaskBulkUpdateSerializer valida las peticiones de la acción `bulk_update` (varias tareas, un mismo cambio).
 
 class AreaSerializer(serializers.ModelSerializer):
     """
@@ -39,8 +40,8 @@ class TaskListSerializer(serializers.ModelSerializer):
     strategic_line = serializers.SerializerMethodField()
     leader = serializers.SerializerMethodField()
     area_data = AreaSerializer(source='area', read_only=True)
-    leaders = LeaderSerializer(many=True, read_only=True)
-    support_team = LeaderSerializer(many=True, read_only=True)
+    leaders = serializers.SerializerMethodField()
+    support_team = serializers.SerializerMethodField()
     leaders_names = serializers.SerializerMethodField()
 
     class Meta:
@@ -68,6 +69,17 @@ class TaskListSerializer(serializers.ModelSerializer):
             'support_team'
         ]
 
+    @staticmethod
+    def related_list(obj, name):
+        """
+        Retorna los objetos de una relación muchos a muchos, usando la lista precargada por
+        TaskViewSet (`prefetched_<name>`) si existe, para no consultar la base de datos por cada tarea.
+        """
+        prefetched = getattr(obj, f'prefetched_{name}', None)
+        if prefetched is not None:
+            return prefetched
+        return list(getattr(obj, name).all())
+
     def get_assigned_to_name(self, obj):
         """
         Retorna el nombre completo o el nombre de usuario del asignado.
@@ -88,11 +100,23 @@ class TaskListSerializer(serializers.ModelSerializer):
         """
         return obj.assigned_to.get_full_name() or obj.assigned_to.username
 
+    def get_leaders(self, obj):
+        """
+        Retorna los líderes asignados a la tarea.
+        """
+        return LeaderSerializer(self.related_list(obj, 'leaders'), many=True).data
+
+    def get_support_team(self, obj):
+        """
+        Retorna el equipo de apoyo de la tarea.
+        """
+        return LeaderSerializer(self.related_list(obj, 'support_team'), many=True).data
+
     def get_leaders_names(self, obj):
         """
         Retorna una lista de los nombres de los líderes asignados a la tarea.
         """
-        return [leader.name for leader in obj.leaders.all()]
+        return [leader.name for leader in self.related_list(obj, 'leaders')]
 
 class TaskSerializer(serializers.ModelSerializer):
     """
@@ -131,12 +155,13 @@ class TaskSerializer(serializers.ModelSerializer):
             'limit_month',
             'deliverable',
             'evidence',
-            'support_team'
+            'support_team',
+            'completed_at'
         ]
         extra_kwargs = {
             'description': {'required': False, 'allow_blank': True}
         }
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at', 'completed_at']
 
     def get_assigned_to_name(self, obj):
         """
@@ -245,4 +270,45 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         strategic_line_name = validated_data.pop('strategic_line')
         strategic_line_obj, _ = StrategicLine.objects.get_or_create(name=strategic_line_name)
         validated_data['strategic_line'] = strategic_line_obj
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class TaskBulkPatchSerializer(serializers.ModelSerializer):
+    """
+    Serializador de los campos que se pueden cambiar en bloque con la acción `bulk_update`.
+    Todos son opcionales; `leaders` y `support_team` reemplazan la lista completa.
+    """
+    strategic_line = serializers.CharField(required=False)
+
+    class Meta:
+        model = Task
+        fields = [
+            'status',
+            'priority',
+            'year',
+            'strategic_line',
+            'area',
+            'assigned_to',
+            'due_date',
+            'alert_date',
+            'limit_month',
+            'leaders',
+            'support_team',
+        ]
+        extra_kwargs = {field: {'required': False} for field in fields}
+
+
+class TaskBulkUpdateSerializer(serializers.Serializer):
+    """
+    Serializador de la petición de `bulk_update`: los ids de las tareas y el cambio a aplicar.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    patch = TaskBulkPatchSerializer()
+
+    def validate_patch(self, value):
+        """
+        Exige al menos un campo en el cambio.
+        """
+        if not value:
+            raise serializers.ValidationError('Debe indicar al menos un campo a modificar.')
+        return value
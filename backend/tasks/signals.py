@@ -0,0 +1,105 @@
+import threading
+from contextlib import contextmanager
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver, Signal
+from django.utils import timezone
+from .models import Task, TaskUpdate, TaskDataVersion, TaskDeletion
+
+# Descripción general del código:
+# Este script incrementa TaskDataVersion cada vez que se crea, modifica o elimina una tarea o una de sus
+# actualizaciones (TaskUpdate), o cambian sus líderes o su equipo de apoyo, para invalidar los valores en caché
+# que dependen de las tareas (conteos de la paginación y respuestas del dashboard).
+# Además mantiene los datos del feed de cambios (`tasks/changes/`): registra una lápida (TaskDeletion)
+# por cada tarea eliminada y actualiza `updated_at` cuando cambian sus líderes o su equipo de apoyo.
+# Cada cambio de estado de una tarea (incluida su creación) queda registrado en el historial TaskUpdate con el
+# estado anterior y el usuario indicado con `task_changes_by`, y mantiene `completed_at` (ver Task.apply_status).
+
+_state = threading.local()
+
+# Se envía (con `task_ids`) cuando la acción `bulk_update` modifica tareas, ya que bulk_update no dispara post_save
+tasks_bulk_updated = Signal()
+
+
+@contextmanager
+def task_changes_by(user):
+    """
+    Atribuye a `user` los cambios de estado que se registren en el historial dentro del bloque.
+    """
+    previous = getattr(_state, 'user', None)
+    _state.user = user
+    try:
+        yield
+    finally:
+        _state.user = previous
+
+
+@receiver(pre_save, sender=Task)
+def remember_previous_status(sender, instance, raw=False, **kwargs):
+    """
+    Lee el estado guardado de la tarea y ajusta `completed_at` si el estado cambia.
+    """
+    if raw:
+        return
+    previous = None
+    if instance.pk is not None:
+        previous = Task.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    instance._status_changed = instance.apply_status(previous)
+    instance._previous_status = previous
+
+
+@receiver(post_save, sender=Task)
+def bump_task_version(sender, instance, raw=False, **kwargs):
+    """
+    Registra el cambio de estado en el historial e incrementa la versión de datos de tareas al guardar una tarea.
+    """
+    if raw:
+        return
+    if getattr(instance, '_status_changed', False):
+        instance._status_changed = False
+        TaskUpdate.status_change(instance, instance._previous_status, getattr(_state, 'user', None)).save()
+    TaskDataVersion.bump()
+
+
+@receiver(post_delete, sender=Task)
+def record_task_deletion(sender, instance, **kwargs):
+    """
+    Registra la lápida de la tarea eliminada e incrementa la versión de datos de tareas.
+    """
+    TaskDeletion.objects.create(task_id=instance.pk)
+    TaskDataVersion.bump()
+
+
+@receiver(post_save, sender=TaskUpdate)
+@receiver(post_delete, sender=TaskUpdate)
+def bump_version_on_task_update(sender, raw=False, **kwargs):
+    """
+    Incrementa la versión de datos de tareas cuando se agrega o elimina una actualización de tarea.
+    """
+    if raw:
+        return
+    TaskDataVersion.bump()
+
+
+@receiver(m2m_changed, sender=Task.leaders.through)
+@receiver(m2m_changed, sender=Task.support_team.through)
+def touch_task_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Cuando cambian los líderes o el equipo de apoyo, marca como modificadas las tareas afectadas
+    (para el feed de cambios) e incrementa la versión de datos de tareas.
+    """
+    if reverse and action == 'pre_clear':
+        # Se limpian las tareas de un líder: hay que recordar cuáles eran antes de borrarlas
+        instance._cleared_task_ids = list(sender.objects.filter(leader_id=instance.pk).values_list('task_id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        task_ids = [instance.pk]
+    elif action == 'post_clear':
+        task_ids = getattr(instance, '_cleared_task_ids', [])
+    else:
+        task_ids = list(pk_set or [])
+    if task_ids:
+        Task.objects.filter(pk__in=task_ids).update(updated_at=timezone.now())
+    TaskDataVersion.bump()
@@ -0,0 +1,410 @@
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+from openpyxl import Workbook
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.models import User
+from django.db import DatabaseError
+from .models import Task, TaskUpdate, Leader, StrategicLine, Area
+from .search import search_tasks, _search_tasks_fallback
+
+# Descripción general del código:
+# Pruebas del listado de tareas (TaskViewSet).
+# Fija el número de consultas de GET /api/tasks/: con los líderes y el equipo de apoyo precargados
+# (apply_query_plan), una página de 50 tareas cuesta lo mismo que una de 2.
+# También revisa con EXPLAIN QUERY PLAN que las consultas comunes del listado usan los índices
+# compuestos de Task y no ordenan con un B-tree temporal.
+# Los filtros `leaders[]` y `support_team[]` (modos any y all) usan EXISTS y no repiten tareas.
+# El feed `tasks/changes/?since=` entrega las tareas modificadas, las lápidas de las eliminadas y pagina
+# sin cortar un grupo de tareas con el mismo `updated_at`.
+# La paginación por cursor recorre todas las tareas sin contar y el conteo de la paginación por página
+# se guarda en caché por combinación de filtros.
+# Comprueba que `import_tasks --upsert` no reescribe las tareas que no cambiaron y que la acción
+# `bulk_update` cuesta lo mismo para pocas o muchas tareas y no deja datos a medias si falla.
+# Por último, prueba la búsqueda de texto completo (acción `search`): orden por relevancia, prefijos,
+# tildes, la búsqueda sin índice, el escape HTML de los fragmentos y las tareas eliminadas a mitad de la búsqueda.
+
+TASKS_URL = '/api/tasks/'
+
+
+def create_tasks(count, user, leaders, strategic_line=None, area=None, year=2024, status='Pendiente'):
+    """
+    Crea `count` tareas con dos líderes y un integrante del equipo de apoyo cada una.
+    """
+    now = timezone.now()
+    tasks = []
+    for i in range(count):
+        task = Task.objects.create(
+            title=f'Tarea {i}',
+            assigned_to=user,
+            created_by=user,
+            status=status,
+            priority=['low', 'medium', 'high'][i % 3],
+            year=year,
+            strategic_line=strategic_line,
+            area=area,
+            due_date=now + timedelta(days=i),
+        )
+        task.leaders.set(leaders[:2])
+        task.support_team.set(leaders[2:])
+        tasks.append(task)
+    return tasks
+
+
+class TaskListQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+        cls.strategic_line = StrategicLine.objects.create(name='Transformación digital')
+        cls.area = Area.objects.create(name='OASTI')
+        cls.leaders = [Leader.objects.create(name=f'Líder {i}') for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_all_tasks(self, expected):
+        # versión de datos (clave del conteo) + COUNT + página + líderes + equipo de apoyo
+        with self.assertNumQueries(5):
+            response = self.client.get(TASKS_URL, {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], expected)
+        self.assertEqual(len(data['results']), expected)
+        return data['results']
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        create_tasks(2, self.user, self.leaders, self.strategic_line, self.area)
+        self.get_all_tasks(2)
+
+        # Crear tareas incrementa TaskDataVersion, así que el conteo en caché anterior no se reutiliza
+        create_tasks(48, self.user, self.leaders, self.strategic_line, self.area)
+        results = self.get_all_tasks(50)
+        self.assertEqual([leader['name'] for leader in results[0]['leaders']], ['Líder 0', 'Líder 1'])
+        self.assertEqual([member['name'] for member in results[0]['support_team']], ['Líder 2'])
+
+
+class TaskListIndexesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='jenny', password='secreta')
+        leaders = [Leader.objects.create(name=f'Líder {i}') for i in range(3)]
+        create_tasks(10, user, leaders)
+        cls.user = user
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def list_query_plan(self, params):
+        """
+        Retorna el plan de SQLite de la consulta que trae la página de tareas.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(TASKS_URL, params)
+        self.assertEqual(response.status_code, 200)
+        page_queries = [q['sql'] for q in queries if q['sql'].startswith('SELECT "tasks_task"."id"') and 'LIMIT' in q['sql']]
+        self.assertEqual(len(page_queries), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page_queries[0]}')
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def test_list_queries_use_indexes(self):
+        cases = [
+            ({'year': 2024, 'status': 'Pendiente'}, 'task_year_status_idx'),
+            ({'ordering': 'priority'}, 'task_priority_rank_idx'),
+            ({'ordering': 'due_date'}, 'task_due_idx'),
+            ({'pagination': 'cursor'}, 'task_created_idx'),
+        ]
+        for params, index in cases:
+            with self.subTest(params=params):
+                plan = self.list_query_plan(params)
+                self.assertIn(f'USING INDEX {index}', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ImportTasksUpsertTest(TestCase):
+
+    HEADERS = [
+        'Meta', 'Línea', 'Estado', 'Año', 'Observaciones', 'Evidencia', 'Fecha límite', 'Fecha alarma',
+        'Mes límite', 'AREA', 'CODIGO DARUMA o ID', 'Entregable/Acción', 'Lidera', 'Apoya',
+    ]
+
+    def write_sheet(self, rows):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'Seguimiento'
+        # El comando lee los encabezados de la segunda fila
+        for col_idx, header in enumerate(self.HEADERS, start=1):
+            sheet.cell(row=2, column=col_idx, value=header)
+        for row_idx, row in enumerate(rows, start=3):
+            for col_idx, value in enumerate(row, start=1):
+                sheet.cell(row=row_idx, column=col_idx, value=value)
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        workbook.save(path)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def row(self, code, leaders='Ana, Luis', status='Pendiente'):
+        return [
+            f'Meta {code}', 'Transformación digital', status, 2024, 'Observación', '', datetime(2024, 11, 30),
+            datetime(2024, 11, 1), 11, 'OASTI', code, 'Informe', leaders, 'Marta',
+        ]
+
+    def upsert(self, path):
+        stdout = io.StringIO()
+        call_command('import_tasks', path, upsert=True, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        path = self.write_sheet([self.row('D-1'), self.row('D-2')])
+        self.assertIn('Tareas creadas: 2, actualizadas: 0, sin cambios: 0', self.upsert(path))
+        before = dict(Task.objects.values_list('daruma_code', 'updated_at'))
+
+        self.assertIn('Tareas creadas: 0, actualizadas: 0, sin cambios: 2', self.upsert(path))
+        self.assertEqual(dict(Task.objects.values_list('daruma_code', 'updated_at')), before)
+
+        # Solo cambia un líder de D-1 y el estado de D-2
+        path = self.write_sheet([self.row('D-1', leaders='Ana, Pedro'), self.row('D-2', status='Cumplido')])
+        self.assertIn('Tareas creadas: 0, actualizadas: 2, sin cambios: 0', self.upsert(path))
+        first, second = Task.objects.order_by('daruma_code')
+        self.assertEqual(sorted(first.leaders.values_list('name', flat=True)), ['Ana', 'Pedro'])
+        self.assertEqual(list(second.leaders.values_list('name', flat=True).order_by('name')), ['Ana', 'Luis'])
+        self.assertIsNotNone(second.completed_at)
+        self.assertNotEqual(first.updated_at, before['D-1'])
+
+
+class TaskSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_task(self, title, description=''):
+        return Task.objects.create(
+            title=title, description=description, assigned_to=self.user, created_by=self.user,
+            due_date=timezone.now() + timedelta(days=10),
+        )
+
+    def search_ids(self, text):
+        total, matches = search_tasks(text)
+        return [match[0] for match in matches]
+
+    def test_ranking_prefix_and_accents(self):
+        strong = self.create_task('Migración de licenciamiento', 'Licenciamiento de servidores')
+        weak = self.create_task('Plan anual', 'Revisar contratos vigentes, proveedores y, al final, el licenciamiento')
+        self.create_task('Capacitación', 'Sin relación')
+
+        # "licencia" es prefijo de "licenciamiento"; la tarea con más coincidencias en menos texto va primero
+        self.assertEqual(self.search_ids('licencia'), [strong.id, weak.id])
+        # Sin tilde encuentra "Migración"
+        self.assertEqual(self.search_ids('migracion'), [strong.id])
+        # Todas las palabras deben aparecer
+        self.assertEqual(self.search_ids('licencia anual'), [weak.id])
+
+    def test_fallback_without_fts(self):
+        task = self.create_task('Migración de licenciamiento')
+        self.create_task('Capacitación')
+        total, matches = _search_tasks_fallback('licencia', None, 0, 20)
+        self.assertEqual((total, [match[0] for match in matches]), (1, [task.id]))
+
+    def test_highlights_escape_task_text(self):
+        self.create_task('<b>Licencias</b>')
+        self.create_task('Soporte', '<img src=x onerror=alert(1)> renovar licencias')
+        response = self.client.get(f'{TASKS_URL}search/', {'q': 'licencias'})
+        self.assertEqual(response.status_code, 200)
+        title_match, description_match = response.json()['results']
+        self.assertEqual(title_match['title_highlight'], '&lt;b&gt;<mark>Licencias</mark>&lt;/b&gt;')
+        self.assertNotIn('<img', description_match['snippet'])
+        self.assertIn('&lt;img', description_match['snippet'])
+        self.assertIn('<mark>licencias</mark>', description_match['snippet'])
+
+    def test_task_deleted_after_index_query_is_skipped(self):
+        task = self.create_task('Licencias')
+        matches = (2, [(task.id, -1.5, None, None), (task.id + 1000, -1.0, None, None)])
+        with mock.patch('tasks.views.search_tasks', return_value=matches):
+            response = self.client.get(f'{TASKS_URL}search/', {'q': 'licencias'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [task.id])
+
+
+class TaskBulkUpdateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+        cls.leaders = [Leader.objects.create(name=f'Líder {i}') for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk_update(self, ids, patch):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'{TASKS_URL}bulk_update/', {'ids': ids, 'patch': patch}, format='json')
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_task_count(self):
+        # La línea ya existe: crearla costaría consultas extra solo en la primera llamada
+        StrategicLine.objects.create(name='Nueva línea')
+        patch = {'status': 'Cumplido', 'strategic_line': 'Nueva línea', 'leaders': [self.leaders[0].id]}
+        few = [task.id for task in create_tasks(3, self.user, self.leaders)]
+        many = [task.id for task in create_tasks(30, self.user, self.leaders)]
+
+        response, few_queries = self.bulk_update(few, patch)
+        self.assertEqual(response.json()['updated'], 3)
+        response, many_queries = self.bulk_update(many, patch)
+        self.assertEqual(response.json()['updated'], 30)
+        self.assertEqual(many_queries, few_queries)
+
+        task = Task.objects.get(pk=many[0])
+        self.assertEqual(task.strategic_line.name, 'Nueva línea')
+        self.assertEqual(list(task.leaders.all()), [self.leaders[0]])
+        self.assertIsNotNone(task.completed_at)
+        self.assertEqual(TaskUpdate.objects.filter(task=task, status='Cumplido').count(), 1)
+
+    def test_failed_update_leaves_no_strategic_line(self):
+        ids = [task.id for task in create_tasks(2, self.user, self.leaders)]
+        with mock.patch.object(TaskUpdate.objects, 'bulk_create', side_effect=DatabaseError('falla')):
+            with self.assertRaises(DatabaseError):
+                self.bulk_update(ids, {'status': 'Cumplido', 'strategic_line': 'Línea huérfana'})
+        self.assertFalse(StrategicLine.objects.filter(name='Línea huérfana').exists())
+        self.assertFalse(Task.objects.filter(status='Cumplido').exists())
+
+
+class TaskPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+        cls.tasks = create_tasks(7, cls.user, [Leader.objects.create(name='Líder')])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_all_tasks_without_count(self):
+        ids, url, params = [], TASKS_URL, {'pagination': 'cursor', 'page_size': 3}
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(url, params).json()
+            self.assertFalse(any('COUNT(' in q['sql'] for q in queries))
+            self.assertNotIn('count', data)
+            ids += [task['id'] for task in data['results']]
+            url, params = data['next'], None
+        # Orden (-created_at, id), sin repetidos ni saltos
+        self.assertEqual(ids, [task.id for task in sorted(self.tasks, key=lambda t: (-t.created_at.timestamp(), t.id))])
+
+    def test_count_is_cached_per_filters(self):
+        def count_queries(params):
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(TASKS_URL, params).json()
+            return data['count'], sum('COUNT(' in q['sql'] for q in queries)
+
+        self.assertEqual(count_queries({'page_size': 3}), (7, 1))
+        # Otra página u otro orden con los mismos filtros reutiliza el conteo
+        self.assertEqual(count_queries({'page_size': 3, 'page': 2, 'ordering': 'due_date'}), (7, 0))
+        # Otros filtros cuentan de nuevo
+        self.assertEqual(count_queries({'page_size': 3, 'status': 'Cumplido'}), (0, 1))
+        # Una escritura incrementa TaskDataVersion e invalida el conteo
+        Task.objects.filter(pk=self.tasks[0].pk).first().save()
+        self.assertEqual(count_queries({'page_size': 3}), (7, 1))
+
+
+class TaskRelatedFiltersTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+        cls.ana, cls.luis, cls.eva = (Leader.objects.create(name=name) for name in ('Ana', 'Luis', 'Eva'))
+        cls.both, cls.only_ana, cls.only_luis = create_tasks(3, cls.user, [])
+        cls.both.leaders.set([cls.ana, cls.luis])
+        cls.only_ana.leaders.set([cls.ana])
+        cls.only_luis.leaders.set([cls.luis])
+        cls.only_luis.support_team.set([cls.eva])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def filtered_ids(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(TASKS_URL, {'page_size': 50, **params}).json()
+        task_sql = [q['sql'] for q in queries if 'FROM "tasks_task"' in q['sql'] and 'EXISTS' in q['sql']]
+        self.assertTrue(task_sql)
+        self.assertFalse(any('DISTINCT' in sql for sql in task_sql))
+        return sorted(task['id'] for task in data['results'])
+
+    def test_any_mode_matches_one_leader_without_duplicates(self):
+        ids = self.filtered_ids({'leaders[]': [self.ana.id, self.luis.id]})
+        self.assertEqual(ids, sorted([self.both.id, self.only_ana.id, self.only_luis.id]))
+
+    def test_all_mode_requires_every_leader(self):
+        ids = self.filtered_ids({'leaders[]': [self.ana.id, self.luis.id], 'leaders_mode': 'all'})
+        self.assertEqual(ids, [self.both.id])
+
+    def test_support_team_filter(self):
+        self.assertEqual(self.filtered_ids({'support_team[]': [self.eva.id]}), [self.only_luis.id])
+
+
+class TaskChangesFeedTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='jenny', password='secreta')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def changes(self, **params):
+        return self.client.get(f'{TASKS_URL}changes/', params).json()
+
+    def test_since_returns_updates_and_deletions(self):
+        kept, edited, deleted = create_tasks(3, self.user, [])
+        since = self.changes()['next_since']
+
+        edited.status = 'En proceso'
+        edited.save()
+        deleted_id = deleted.id
+        deleted.delete()
+
+        data = self.changes(since=since)
+        self.assertEqual([task['id'] for task in data['changes']], [edited.id])
+        self.assertEqual(data['deleted'], [deleted_id])
+        self.assertFalse(data['has_more'])
+        # Sin cambios nuevos, el siguiente `since` no devuelve nada
+        self.assertEqual(self.changes(since=data['next_since'])['changes'], [])
+
+    def test_page_keeps_same_timestamp_group(self):
+        tasks = create_tasks(4, self.user, [])
+        stamp = timezone.now()
+        Task.objects.filter(pk__in=[task.pk for task in tasks[1:]]).update(updated_at=stamp)
+        Task.objects.filter(pk=tasks[0].pk).update(updated_at=stamp - timedelta(seconds=1))
+
+        data = self.changes(limit=2)
+        # La página de 2 se completa con las otras tareas del mismo updated_at
+        self.assertEqual([task['id'] for task in data['changes']], [task.id for task in tasks])
+        self.assertTrue(data['has_more'])
+        self.assertEqual(self.changes(since=data['next_since'])['changes'], [])
+
+    def test_invalid_since_is_rejected(self):
+        self.assertEqual(self.client.get(f'{TASKS_URL}changes/', {'since': 'ayer'}).status_code, 400)
@@ -3,20 +3,32 @@ from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status
 from django.shortcuts import get_object_or_404
-from .models import Task, StrategicLine, Area, Leader
+from .models import Task, TaskUpdate, StrategicLine, Area, Leader, TaskDataVersion, TaskDeletion
 from .serializers import (
     TaskSerializer, 
     TaskListSerializer, 
     TaskCreateSerializer, 
     StrategicLineSerializer,
     AreaSerializer,
-    LeaderSerializer
+    LeaderSerializer,
+    TaskBulkUpdateSerializer
 )
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from django.db import models
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from functools import partial
+import hashlib
+from datetime import timezone as dt_timezone
+from django.db import models, transaction
+from django.db.models import Prefetch, Exists, OuterRef
 from .permissions import CanManageTasks
+from .search import search_tasks
+from .signals import task_changes_by, tasks_bulk_updated
 import logging
 logger = logging.getLogger(__name__)
 
@@ -25,6 +37,52 @@ logger = logging.getLogger(__name__)
 # líneas estratégicas, áreas y líderes. Utiliza serializadores para la conversión de datos,
 # permisos personalizados para controlar el acceso, y paginación personalizada para la gestión de resultados.
 # Incluye filtros, búsqueda y ordenamiento para las tareas.
+# La paginación por página guarda en caché el conteo de cada combinación de filtros (invalidado con TaskDataVersion)
+# y, con `?pagination=cursor`, se usa paginación por cursor ordenada por (-created_at, id) para scroll infinito.
+# La acción `bulk_update` aplica un mismo cambio a varias tareas en una sola transacción.
+# Crear o editar tareas por la API atribuye al usuario los cambios de estado que quedan en el historial (TaskUpdate).
+# La acción `changes` retorna las tareas modificadas y las eliminadas desde un momento dado (sincronización incremental).
+# La acción `search` busca con el índice FTS5 de tareas y retorna los resultados por relevancia con fragmentos resaltados.
+
+COUNT_CACHE_TIMEOUT = 60 * 60
+# Parámetros que no cambian el conjunto filtrado y por eso no forman parte de la clave del conteo
+COUNT_IGNORED_PARAMS = {'page', 'page_size', 'ordering', 'cursor', 'pagination'}
+SEARCH_PAGE_SIZE = 20
+CHANGES_LIMIT = 500
+CHANGES_MAX_LIMIT = 1000
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+def task_count_cache_key(request):
+    """
+    Clave de caché del conteo de tareas: versión de datos de tareas y firma de los filtros de la petición.
+    """
+    params = sorted(
+        (name, sorted(values)) for name, values in request.query_params.lists()
+        if name not in COUNT_IGNORED_PARAMS
+    )
+    signature = hashlib.md5(repr(params).encode('utf-8')).hexdigest()
+    return f"tasks:count:{TaskDataVersion.current()}:{signature}"
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator de Django que lee el total de la caché en lugar de ejecutar el COUNT en cada página.
+    """
+    def __init__(self, *args, count_cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_cache_key = count_cache_key
+
+    @cached_property
+    def count(self):
+        if self.count_cache_key is None:
+            return super().count
+        count = cache.get(self.count_cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.count_cache_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
 
 class CustomPagination(PageNumberPagination):
     """
@@ -34,6 +92,13 @@ class CustomPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 10000
 
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Pagina el queryset usando el conteo en caché para esta combinación de filtros.
+        """
+        self.django_paginator_class = partial(CachedCountPaginator, count_cache_key=task_count_cache_key(request))
+        return super().paginate_queryset(queryset, request, view)
+
     def get_paginated_response(self, data):
         """
         Retorna la respuesta paginada con información adicional como total de páginas y página actual.
@@ -47,6 +112,34 @@ class CustomPagination(PageNumberPagination):
             'current_page': self.page.number,
         })
 
+class TaskOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter que ordena `priority` y `status` por sus ordinales (priority_rank, status_rank)
+    en lugar de alfabéticamente, usando los índices del modelo Task.
+    """
+    RANK_FIELDS = {'priority': 'priority_rank', 'status': 'status_rank'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        mapped = []
+        for field in ordering:
+            descending = field.startswith('-')
+            name = self.RANK_FIELDS.get(field.lstrip('-'), field.lstrip('-'))
+            mapped.append(f"-{name}" if descending else name)
+        return mapped
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para scroll infinito: no cuenta el total ni usa OFFSET,
+    por lo que las páginas profundas cuestan lo mismo que la primera.
+    """
+    page_size = 15
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', 'id')
+
 class AreaViewSet(viewsets.ModelViewSet):
     """
     ViewSet para el modelo Area (solo lectura).
@@ -70,12 +163,25 @@ class TaskViewSet(viewsets.ModelViewSet):
     ViewSet para el modelo Task con permisos, filtros, búsqueda, ordenamiento y paginación.
     """
     permission_classes = [CanManageTasks]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, TaskOrderingFilter]
     filterset_fields = ['status', 'priority', 'assigned_to', 'year', 'area','leaders', 'support_team']
     search_fields = ['title', 'description']
-    ordering_fields = ['due_date', 'created_at', 'priority']
+    ordering_fields = ['due_date', 'created_at', 'priority', 'status']
     pagination_class = CustomPagination
 
+    @property
+    def paginator(self):
+        """
+        Usa TaskCursorPagination si la petición incluye `pagination=cursor` (o un `cursor`); si no, CustomPagination.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = TaskCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
         """
         Obtiene el conjunto de tareas, aplicando filtros por línea estratégica, líderes y equipo de soporte. 
@@ -87,19 +193,46 @@ class TaskViewSet(viewsets.ModelViewSet):
         if strategic_line_name and strategic_line_name != 'all':
             queryset = queryset.filter(strategic_line__name=strategic_line_name)
 
-        # Nuevos filtros múltiples para líderes y equipo de soporte
-        leaders = self.request.query_params.getlist('leaders[]', [])
-        support_team = self.request.query_params.getlist('support_team[]', [])
-
-        if leaders:
-            queryset = queryset.filter(leaders__id__in=leaders).distinct()
-            
-        if support_team:
-            queryset = queryset.filter(support_team__id__in=support_team).distinct()        
+        # Nuevos filtros múltiples para líderes y equipo de soporte.
+        # `leaders_mode=all` / `support_team_mode=all` exigen todos los indicados; por defecto basta con uno.
+        queryset = self.filter_by_related(queryset, Task.leaders.through, 'leader_id', 'leaders')
+        queryset = self.filter_by_related(queryset, Task.support_team.through, 'leader_id', 'support_team')
 
         # Si el usuario está autenticado y es Jenny, puede ver todo
         # Si no está autenticado o no es Jenny, también puede ver todo
-        return queryset
+        return self.apply_query_plan(queryset)
+
+    def filter_by_related(self, queryset, through, column, param):
+        """
+        Filtra las tareas por los ids de `<param>[]` con subconsultas EXISTS sobre la tabla intermedia,
+        en lugar de un JOIN seguido de DISTINCT sobre todas las columnas de Task.
+        Con `<param>_mode=all` la tarea debe tener todos los ids; en modo `any` (por defecto), al menos uno.
+        """
+        ids = {value for value in self.request.query_params.getlist(f'{param}[]', []) if value.isdigit()}
+        if not ids:
+            return queryset
+
+        related = through.objects.filter(task_id=OuterRef('pk'))
+        if self.request.query_params.get(f'{param}_mode') == 'all':
+            for related_id in ids:
+                queryset = queryset.filter(Exists(related.filter(**{column: related_id})))
+            return queryset
+        return queryset.filter(Exists(related.filter(**{f'{column}__in': ids})))
+
+    def apply_query_plan(self, queryset):
+        """
+        Carga de antemano las relaciones que usa el serializador de cada acción, para que una página
+        de tareas cueste un número fijo de consultas sin importar su tamaño.
+        """
+        queryset = queryset.select_related('assigned_to', 'strategic_line', 'area')
+        if self.action in ('list', 'search', 'changes'):
+            # TaskListSerializer lee estas listas (ver TaskListSerializer.related_list)
+            return queryset.prefetch_related(
+                Prefetch('leaders', queryset=Leader.objects.all(), to_attr='prefetched_leaders'),
+                Prefetch('support_team', queryset=Leader.objects.all(), to_attr='prefetched_support_team'),
+            )
+        # En detalle y edición se usa la caché normal de prefetch, que DRF y `.set()` invalidan al actualizar
+        return queryset.prefetch_related('leaders', 'support_team')
 
     def get_serializer_class(self):
         """
@@ -111,7 +244,14 @@ class TaskViewSet(viewsets.ModelViewSet):
             return TaskListSerializer
         return TaskSerializer
 
-    
+
+    def perform_create(self, serializer):
+        """
+        Crea una tarea; el estado inicial queda en el historial a nombre del usuario de la petición.
+        """
+        with task_changes_by(self.request.user):
+            serializer.save()
+
     def perform_update(self, serializer):
         """
         Actualiza una tarea, permitiendo solo a 'jenny' modificar todos los campos o a otros usuarios solo la descripción.
@@ -123,9 +263,11 @@ class TaskViewSet(viewsets.ModelViewSet):
         logger.error("==== END UPDATE DEBUG ====")
 
         if self.request.user.is_authenticated and self.request.user.username == 'jenny':
-            serializer.save()
+            with task_changes_by(self.request.user):
+                serializer.save()
         elif set(self.request.data.keys()) == {'description'}:
-            serializer.save()
+            with task_changes_by(self.request.user):
+                serializer.save()
         else:
             return Response(
                 {"detail": "Solo puedes modificar el campo de descripción."},
@@ -145,6 +287,150 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        """
+        Aplica el mismo cambio (`patch`) a varias tareas (`ids`) en una sola transacción y retorna el resultado por id.
+        Los campos simples se guardan con un solo bulk_update y `leaders`/`support_team` reemplazan las relaciones
+        con inserciones por lotes en las tablas intermedias.
+        """
+        serializer = TaskBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        patch = dict(serializer.validated_data['patch'])
+
+        related = {name: patch.pop(name) for name in ('leaders', 'support_team') if name in patch}
+
+        fields = list(patch) + ['updated_at']
+        if 'status' in patch:
+            fields.append('completed_at')
+
+        with transaction.atomic():
+            tasks = Task.objects.select_for_update().in_bulk(ids)
+            # Dentro de la transacción: si algo falla no queda una línea estratégica huérfana
+            if tasks and isinstance(patch.get('strategic_line'), str):
+                patch['strategic_line'], _ = StrategicLine.objects.get_or_create(name=patch['strategic_line'])
+            # updated_at se actualiza aunque solo cambien líderes o equipo de apoyo (feed de cambios)
+            now = timezone.now()
+            history = []
+            for task in tasks.values():
+                previous_status = task.status
+                for field, value in patch.items():
+                    setattr(task, field, value)
+                task.updated_at = now
+                # bulk_update no dispara señales: el historial de estados se registra aquí
+                if task.apply_status(previous_status, now):
+                    history.append(TaskUpdate.status_change(task, previous_status, request.user))
+            Task.objects.bulk_update(tasks.values(), fields, batch_size=500)
+            TaskUpdate.objects.bulk_create(history, batch_size=500)
+
+            for name, leaders in related.items():
+                through = getattr(Task, name).through
+                through.objects.filter(task_id__in=tasks).delete()
+                through.objects.bulk_create(
+                    [through(task_id=task_id, leader_id=leader.id) for task_id in tasks for leader in leaders],
+                    batch_size=500,
+                )
+
+            # bulk_update y las tablas intermedias no disparan señales
+            if tasks:
+                TaskDataVersion.bump()
+                tasks_bulk_updated.send(sender=Task, task_ids=list(tasks))
+
+        results = [
+            {'id': task_id, 'result': 'updated' if task_id in tasks else 'not_found'}
+            for task_id in ids
+        ]
+        return Response({'updated': len(tasks), 'results': results})
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Feed de cambios para mantener una copia local de las tareas: retorna las tareas con `updated_at`
+        posterior a `since` (fecha ISO 8601; sin ella, todas) y los ids de las tareas eliminadas en ese intervalo.
+
+        Respuesta: {'changes': [...], 'deleted': [ids], 'next_since': fecha, 'has_more': bool}. El cliente guarda
+        `next_since` y lo envía en la siguiente petición; mientras `has_more` sea verdadero quedan cambios por leer.
+        Una página nunca corta un grupo de tareas con el mismo `updated_at` (p. ej. las de un bulk_update).
+        """
+        since = None
+        if request.query_params.get('since'):
+            since = parse_datetime(request.query_params['since'])
+            if since is None:
+                return Response({'since': 'Debe ser una fecha ISO 8601.'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        try:
+            limit = min(max(int(request.query_params.get('limit', CHANGES_LIMIT)), 1), CHANGES_MAX_LIMIT)
+        except ValueError:
+            return Response({'limit': 'Debe ser un número entero.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.apply_query_plan(Task.objects.all()).order_by('updated_at', 'id')
+        deletions = TaskDeletion.objects.all()
+        if since is not None:
+            queryset = queryset.filter(updated_at__gt=since)
+            deletions = deletions.filter(deleted_at__gt=since)
+
+        tasks = list(queryset[:limit + 1])
+        has_more = len(tasks) > limit
+        if has_more:
+            tasks = tasks[:limit]
+            # Completa el grupo de tareas con el mismo updated_at que la última, para no saltarlas con `since`
+            last = tasks[-1]
+            tasks += list(queryset.filter(updated_at=last.updated_at, id__gt=last.id))
+            deletions = deletions.filter(deleted_at__lte=last.updated_at)
+
+        deleted = list(deletions.values_list('task_id', 'deleted_at'))
+        stamps = [task.updated_at for task in tasks] + [deleted_at for _, deleted_at in deleted]
+        next_since = max(stamps) if stamps else since
+
+        return Response({
+            'changes': TaskListSerializer(tasks, many=True, context=self.get_serializer_context()).data,
+            'deleted': [task_id for task_id, _ in deleted],
+            'next_since': next_since.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z') if next_since else None,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Búsqueda de texto completo (`q`) en título, descripción, entregable, evidencia, código Daruma y comentarios
+        de las actualizaciones, ordenada por relevancia. Acepta los mismos filtros que el listado y `page`/`page_size`.
+        Cada resultado incluye `rank`, `title_highlight` y `snippet` con el texto escapado como HTML y las
+        coincidencias entre <mark></mark>.
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'q': 'Este parámetro es obligatorio.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({'detail': 'page y page_size deben ser números enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Solo se restringe al queryset filtrado si la petición trae filtros además de la búsqueda
+        filtered = set(request.query_params) - {'q', 'page', 'page_size'}
+        queryset = self.filter_queryset(self.get_queryset()) if filtered else None
+        total, matches = search_tasks(text, queryset, offset=(page - 1) * page_size, limit=page_size)
+
+        tasks = self.apply_query_plan(Task.objects.filter(id__in=[match[0] for match in matches])).in_bulk()
+        results = []
+        for task_id, rank, title_highlight, snippet in matches:
+            task = tasks.get(task_id)
+            if task is None:
+                # Eliminada entre la consulta al índice y la lectura de las tareas
+                continue
+            data = TaskListSerializer(task, context=self.get_serializer_context()).data
+            data.update({'rank': rank, 'title_highlight': title_highlight, 'snippet': snippet})
+            results.append(data)
+
+        return Response({
+            'count': total,
+            'page': page,
+            'page_size': page_size,
+            'results': results,
+        })
+
     @action(detail=False, methods=['get'])
     def strategic_lines(self, request):
         """
@@ -6,11 +6,19 @@ import Maintenance from './pages/Maintenance';
 import Strategic from './pages/Strategic';
 import Login from './pages/login';
 import ContractsDashboard from './components/contracts/ContractsDashboard'
+import { useLiveUpdates } from './hooks/useLiveUpdates';
+
+// Mantiene abierto el canal de eventos en vivo mientras haya una sesión iniciada
+function LiveUpdates() {
+  useLiveUpdates();
+  return null;
+}
 
 // Eliminamos el ProtectedRoute ya que no lo necesitamos para las rutas principales
 function App() {
   return (
     <AuthProvider>
+      <LiveUpdates />
       <Router>
         <Routes>
           <Route path="/login" element={<Login />} />
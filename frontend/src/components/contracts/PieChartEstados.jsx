@@ -2,6 +2,7 @@
 import React from 'react'
 import { useQuery } from '@tanstack/react-query'
 import api from '../../api/axios'
+import { useLiveStaleTime } from '../../hooks/useLiveUpdates'
 import { PieChart, Pie, Cell, Tooltip, ResponsiveContainer } from 'recharts'
 import numeral from 'numeral'
 
@@ -27,12 +28,14 @@ const CustomTooltip = ({ active, payload }) => {
 export default function PieChartEstados({ filters }) {
   const queryString = new URLSearchParams(filters).toString()
 
+  const staleTime = useLiveStaleTime()
   const { data, isLoading, error } = useQuery({
     queryKey: ['estados-stats', filters],
     queryFn: async () => {
       const { data } = await api.get(`/contracts/estados-stats/?${queryString}`)
       return data
-    }
+    },
+    staleTime
   })
 
   if (isLoading) return <div>Cargando estados...</div>
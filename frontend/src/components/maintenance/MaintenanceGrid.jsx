@@ -1,11 +1,38 @@
 // src/components/maintenance/MaintenanceGrid.jsx
 
-import React, { useState } from 'react';
-import { useMaintenanceData } from '../../hooks/useMaintenanceData';
+import React, { useMemo, useState } from 'react';
+import { useMaintenanceGrid } from '../../hooks/useMaintenanceData';
 
 const MaintenanceGrid = () => {
   const [selectedYear, setSelectedYear] = useState(new Date().getFullYear());
-  const { subGroups, items, schedules, isLoading, isError, error, updateScheduleStatus } = useMaintenanceData();
+  const { grid, isLoading, isError, error, updateScheduleStatus } = useMaintenanceGrid(selectedYear);
+
+  // Convertir la respuesta columnar en subgrupos con sus items y un mapa semana -> programación por item
+  const subGroupItems = useMemo(() => {
+    if (!grid) return [];
+    const { subGroups, items } = grid;
+    const rowsBySubGroup = new Map(subGroups.id.map((id) => [id, []]));
+    items.id.forEach((id, index) => {
+      const scheduled = new Set(items.scheduledWeeks[index]);
+      const completed = new Set(items.completedWeeks[index]);
+      const schedules = new Map();
+      items.scheduleWeeks[index].forEach((week, i) => {
+        if (!schedules.has(week)) {
+          schedules.set(week, {
+            id: items.scheduleIds[index][i],
+            is_scheduled: scheduled.has(week),
+            is_completed: completed.has(week),
+          });
+        }
+      });
+      rowsBySubGroup.get(items.subGroup[index])?.push({ id, element: items.element[index], schedules });
+    });
+    return subGroups.id.map((id, index) => ({
+      id,
+      name: subGroups.name[index],
+      items: rowsBySubGroup.get(id),
+    }));
+  }, [grid]);
 
   if (isLoading) {
     return <div>Cargando datos de mantenimiento...</div>;
@@ -15,14 +42,11 @@ const MaintenanceGrid = () => {
     return <div>Error al cargar datos: {error.message}</div>;
   }
 
-  // Asociar items a sus subgrupos correspondientes
-  const subGroupItems = subGroups.map((subGroup) => ({
-    ...subGroup,
-    items: items.filter((item) => item.sub_group === subGroup.id),
-  }));
-
-  // Generar las semanas del año (1-52)
-  const weeks = Array.from({ length: 52 }, (_, i) => i + 1);
+  // Generar las semanas del año (1-52, o hasta la última semana con programaciones)
+  const weeks = Array.from({ length: grid.weeks }, (_, i) => i + 1);
+  const currentWeek = Math.ceil(
+    (new Date() - new Date(selectedYear, 0, 1)) / (7 * 24 * 60 * 60 * 1000)
+  );
 
   const handleStatusToggle = (schedule) => {
     const updates = { is_completed: !schedule.is_completed };
@@ -52,9 +76,7 @@ const MaintenanceGrid = () => {
                 <tr key={item.id}>
                   <td className="border px-4 py-2">{item.element}</td>
                   {weeks.map((week) => {
-                    const schedule = schedules.find(
-                      (s) => s.item === item.id && s.week === week && s.year === selectedYear
-                    );
+                    const schedule = item.schedules.get(week);
 
                     // Determinar el color según el estado
                     let bgColor = 'bg-gray-200'; // No programado
@@ -63,13 +85,8 @@ const MaintenanceGrid = () => {
                         bgColor = 'bg-green-400'; // Completado
                       } else if (schedule.is_scheduled) {
                         bgColor = 'bg-blue-400'; // Programado
-                      } else {
-                        const currentWeek = Math.ceil(
-                          (new Date() - new Date(selectedYear, 0, 1)) / (7 * 24 * 60 * 60 * 1000)
-                        );
-                        if (week < currentWeek) {
-                          bgColor = 'bg-red-400'; // Retrasado
-                        }
+                      } else if (week < currentWeek) {
+                        bgColor = 'bg-red-400'; // Retrasado
                       }
                     }
 
@@ -1,15 +1,17 @@
 // frontend/src/hooks/useAdicionesStats.js
 import { useQuery } from '@tanstack/react-query'
 import api from '../api/axios'
+import { useLiveStaleTime } from './useLiveUpdates'
 
 export const useAdicionesStats = () => {
+  const staleTime = useLiveStaleTime(1000 * 60) // 1 minuto sin el canal en vivo
   const { data, isLoading, error } = useQuery({
     queryKey: ['adiciones-stats'],
     queryFn: async () => {
       const { data } = await api.get('/contracts/adiciones-stats/')
       return data
     },
-    staleTime: 1000 * 60
+    staleTime
   })
 
   return { data, isLoading, error }
@@ -1,15 +1,17 @@
 // frontend/src/hooks/useAllFilterOptions.js
 import { useQuery } from '@tanstack/react-query'
 import api from '../api/axios'
+import { useLiveStaleTime } from './useLiveUpdates'
 
 export const useAllFilterOptions = () => {
+  const staleTime = useLiveStaleTime(1000 * 60) // 1 minuto sin el canal en vivo
   const { data, isLoading, error } = useQuery({
     queryKey: ['filters-options'],
     queryFn: async () => {
       const { data } = await api.get('/contracts/filters-options/')
       return data
     },
-    staleTime: 1000 * 60
+    staleTime
   })
 
   return { data, isLoading, error }
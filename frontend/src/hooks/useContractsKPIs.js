@@ -1,5 +1,6 @@
 import { useQuery } from '@tanstack/react-query'
 import api from '../api/axios'
+import { useLiveStaleTime } from './useLiveUpdates'
 
 export const useContractsKPIs = (params = {}) => {
   // params es un objeto que puede contener { anio, rubro, contratista }
@@ -7,6 +8,8 @@ export const useContractsKPIs = (params = {}) => {
   // Convertimos params en querystring
   const queryString = new URLSearchParams(params).toString()
 
+  const staleTime = useLiveStaleTime(1000 * 60) // 1 minuto sin el canal en vivo
+
   // Llamamos al endpoint kpis-full-summary con los parámetros
   const { data, isLoading, error } = useQuery({
     queryKey: ['contracts-kpis', params],
@@ -14,7 +17,7 @@ export const useContractsKPIs = (params = {}) => {
       const { data } = await api.get(`/contracts/kpis-full-summary/?${queryString}`)
       return data
     },
-    staleTime: 1000 * 60 // 1 minuto
+    staleTime
   })
 
   return { data, isLoading, error }
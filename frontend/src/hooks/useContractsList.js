@@ -1,15 +1,18 @@
 // frontend/src/hooks/useContractsList.js
 import { useQuery } from '@tanstack/react-query'
 import api from '../api/axios'
+import { useLiveStaleTime } from './useLiveUpdates'
 
 export const useContractsList = (filters = {}) => {
   const queryString = new URLSearchParams(filters).toString()
+  const staleTime = useLiveStaleTime()
   const { data, isLoading, error } = useQuery({
     queryKey: ['contracts-list', filters],
     queryFn: async () => {
       const { data } = await api.get(`/contracts/contracts-list/?${queryString}`)
       return data
-    }
+    },
+    staleTime
   })
   return { data: data || [], isLoading, error }
 }
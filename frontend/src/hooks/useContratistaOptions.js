@@ -1,15 +1,17 @@
 // frontend/src/hooks/useContratistaOptions.js
 import { useQuery } from '@tanstack/react-query'
 import api from '../api/axios'
+import { useLiveStaleTime } from './useLiveUpdates'
 
 export const useContratistaOptions = () => {
+  const staleTime = useLiveStaleTime(1000 * 60) // 1 minuto sin el canal en vivo
   const { data, isLoading, error } = useQuery({
     queryKey: ['contratistas-options'],
     queryFn: async () => {
       const { data } = await api.get('/contracts/contratistas-options/')
       return data
     },
-    staleTime: 1000 * 60
+    staleTime
   })
 
   return { data: data || [], isLoading, error }
@@ -0,0 +1,130 @@
+import { useEffect, useSyncExternalStore } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import api from '../api/axios';
+import { useAuth } from '../context/AuthContext';
+
+// Con el canal en vivo conectado las consultas se invalidan cuando cambian los datos,
+// así que no hace falta volver a pedirlas cada minuto ni al volver a la pestaña.
+const LIVE_STALE_TIME = 1000 * 60 * 30; // 30 minutos
+
+// Espera antes de reabrir el canal tras un error: se duplica en cada intento hasta el máximo
+const MIN_RETRY_DELAY = 1000; // 1 segundo
+const MAX_RETRY_DELAY = 1000 * 60; // 1 minuto
+
+// Tipo de evento de api/dashboard/live/ -> prefijos de queryKey que dependen de esos datos
+const QUERY_KEYS_BY_EVENT = {
+  tasks: [['dashboard-tasks'], ['strategic-tasks']],
+  contracts: [
+    ['contracts-kpis'],
+    ['contracts-list'],
+    ['adiciones-stats'],
+    ['supervisores-stats'],
+    ['sistemas-info-stats'],
+    ['estados-stats'],
+    ['filters-options'],
+    ['anios-disponibles'],
+    ['rubros-options'],
+    ['contratistas-options'],
+  ],
+  maintenance: [['maintenanceSchedules'], ['maintenanceGrid']],
+};
+
+// Estado de la conexión compartido con las consultas (ver useLiveConnected y useLiveStaleTime)
+let liveConnected = false;
+const connectionListeners = new Set();
+
+const setLiveConnected = (connected) => {
+  if (liveConnected === connected) return;
+  liveConnected = connected;
+  connectionListeners.forEach((listener) => listener());
+};
+
+const subscribeToConnection = (listener) => {
+  connectionListeners.add(listener);
+  return () => connectionListeners.delete(listener);
+};
+
+// Indica si el canal en vivo está abierto en este momento
+export const useLiveConnected = () =>
+  useSyncExternalStore(subscribeToConnection, () => liveConnected);
+
+// staleTime de una consulta: LIVE_STALE_TIME solo mientras el canal está conectado; si no lo está
+// (canal deshabilitado, reconectando, cambios hechos por comandos en otro proceso) se usa el de siempre
+export const useLiveStaleTime = (pollingStaleTime = 0) =>
+  useLiveConnected() ? LIVE_STALE_TIME : pollingStaleTime;
+
+export const useLiveUpdates = () => {
+  const queryClient = useQueryClient();
+  const { user } = useAuth();
+
+  useEffect(() => {
+    if (!user) return undefined;
+
+    let source = null;
+    let retryTimer = null;
+    let retryDelay = MIN_RETRY_DELAY;
+    let connectedBefore = false;
+    let stopped = false;
+
+    const invalidate = (type) => () => {
+      QUERY_KEYS_BY_EVENT[type].forEach((queryKey) => {
+        queryClient.invalidateQueries({ queryKey });
+      });
+    };
+    const resync = () => queryClient.invalidateQueries();
+
+    const scheduleReconnect = () => {
+      if (stopped) return;
+      retryTimer = setTimeout(connect, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, MAX_RETRY_DELAY);
+    };
+
+    // EventSource no permite encabezados: se abre con un ticket de corta duración en lugar del JWT,
+    // y se pide uno nuevo en cada reconexión (el anterior ya pudo vencer)
+    async function connect() {
+      let ticket;
+      try {
+        ({ data: { ticket } } = await api.post('/dashboard/live/ticket/'));
+      } catch (error) {
+        // Canal deshabilitado en el servidor (LIVE_EVENTS_ENABLED): las consultas siguen con su refresco normal
+        if (error.response?.status === 404) return;
+        scheduleReconnect();
+        return;
+      }
+      if (stopped) return;
+
+      source = new EventSource(
+        `${api.defaults.baseURL}/dashboard/live/?ticket=${encodeURIComponent(ticket)}`
+      );
+      Object.keys(QUERY_KEYS_BY_EVENT).forEach((type) => {
+        source.addEventListener(type, invalidate(type));
+      });
+      // Se perdieron eventos (cola llena en el servidor): se vuelve a consultar todo
+      source.addEventListener('resync', resync);
+
+      source.onopen = () => {
+        retryDelay = MIN_RETRY_DELAY;
+        setLiveConnected(true);
+        // Al reconectar no se sabe qué cambió mientras tanto
+        if (connectedBefore) resync();
+        connectedBefore = true;
+      };
+      source.onerror = () => {
+        // Se cierra en lugar de dejar que el navegador reintente con el mismo ticket
+        setLiveConnected(false);
+        source.close();
+        source = null;
+        scheduleReconnect();
+      };
+    }
+
+    connect();
+
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+      setLiveConnected(false);
+    };
+  }, [user, queryClient]);
+};
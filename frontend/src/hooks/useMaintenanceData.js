@@ -19,6 +19,11 @@ const fetchSchedules = async () => {
   return data;
 };
 
+const fetchGrid = async (year) => {
+  const { data } = await axios.get('/maintenance-groups/grid/', { params: { year } });
+  return data;
+};
+
 // Función para actualizar el estado de un mantenimiento
 const updateSchedule = async ({ scheduleId, updates }) => {
   const { data } = await axios.patch(`/maintenance-schedules/${scheduleId}/`, updates);
@@ -101,3 +106,28 @@ export const useMaintenanceData = () => {
     updateScheduleStatus: mutation.mutate,
   };
 };
+
+// Matriz items x semanas de un año (columnar) para MaintenanceGrid
+export const useMaintenanceGrid = (year) => {
+  const queryClient = useQueryClient();
+
+  const { data: grid, isLoading, isError, error } = useQuery({
+    queryKey: ['maintenanceGrid', year],
+    queryFn: () => fetchGrid(year),
+  });
+
+  const mutation = useMutation({
+    mutationFn: updateSchedule,
+    onSettled: () => {
+      queryClient.invalidateQueries({ queryKey: ['maintenanceGrid', year] });
+    },
+  });
+
+  return {
+    grid,
+    isLoading,
+    isError,
+    error,
+    updateScheduleStatus: mutation.mutate,
+  };
+};
@@ -1,10 +1,12 @@
 import { useInfiniteQuery, useMutation, useQueryClient, useQuery } from '@tanstack/react-query';
 import api from '../api/axios';
+import { useLiveStaleTime } from './useLiveUpdates';
 
 const PAGE_SIZE = 15;
 
 export const useStrategicData = (filters) => {
   const queryClient = useQueryClient();
+  const staleTime = useLiveStaleTime(1 * 60 * 1000);
 
   // Aseguramos que leaders[] y support_team[] no sean undefined
   const adjustedFilters = {
@@ -95,7 +97,7 @@ export const useStrategicData = (filters) => {
     suspense: false,
     refetchOnWindowFocus: false,
     cacheTime: 5 * 60 * 1000,
-    staleTime: 1 * 60 * 1000,
+    staleTime,
     retry: 2,
   });
 
@@ -1,15 +1,17 @@
 // frontend/src/hooks/useSupervisoresStats.js
 import { useQuery } from '@tanstack/react-query'
 import api from '../api/axios'
+import { useLiveStaleTime } from './useLiveUpdates'
 
 export const useSupervisoresStats = () => {
+  const staleTime = useLiveStaleTime(1000 * 60) // 1 minuto sin el canal en vivo
   const { data, isLoading, error } = useQuery({
     queryKey: ['supervisores-stats'],
     queryFn: async () => {
       const { data } = await api.get('/contracts/supervisores-stats/')
       return data
     },
-    staleTime: 1000 * 60
+    staleTime
   })
 
   return { data: data || [], isLoading, error }